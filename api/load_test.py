@@ -0,0 +1,229 @@
+"""Local load generator for the SmartPanda API.
+
+Without ``--url`` it copies ``data/`` to a scratch directory (stock topped up so
+checkouts never run out, plus a ``loadtest`` customer), starts ``api.server``
+on it in a subprocess and drives that, so the real data is never touched::
+
+    python -m api.load_test --clients 50 --duration 10
+
+Each scenario (``browse``: category listings and searches, ``checkout``: orders
+of one to three products) runs for ``--duration`` seconds on ``--clients``
+keep-alive connections, and requests/sec and latency percentiles are printed.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+LOADTEST_USER = "loadtest"
+LOADTEST_PASSWORD = "loadtest"
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, host, port, token=None):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if self.token:
+            head += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line, *header_lines = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").rstrip("\r\n").split("\r\n")
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        response = await self.reader.readexactly(length)
+        return int(status_line.split(" ", 2)[1]), json.loads(response)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def percentile(latencies, share):
+    if not latencies:
+        return 0.0
+    return latencies[min(int(len(latencies) * share), len(latencies) - 1)]
+
+
+async def run_scenario(name, host, port, token, clients, duration, catalog):
+    """Drive one scenario on ``clients`` connections for ``duration`` seconds."""
+    categories = sorted({product["category"] for product in catalog})
+    queries = sorted({product["name"][:2].lower() for product in catalog})
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        connection = Connection(host, port, token)
+        await connection.open()
+        try:
+            while time.perf_counter() < deadline:
+                if name == "browse":
+                    if random.random() < 0.5:
+                        path = f"/products?category={urllib.parse.quote(random.choice(categories))}&in_stock=1"
+                    else:
+                        path = f"/products/search?q={urllib.parse.quote(random.choice(queries))}&limit=10"
+                    request = ("GET", path, None)
+                else:
+                    items = [{"product_id": product["id"], "quantity": random.randint(1, 3)} for product in random.sample(catalog, random.randint(1, 3))]
+                    request = ("POST", "/orders", {"items": items, "payment_method": "Credit Card"})
+                started = time.perf_counter()
+                status, _ = await connection.request(*request)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "statuses": statuses,
+    }
+
+
+async def load_test(host, port, username, password, clients, duration, scenarios):
+    connection = Connection(host, port)
+    await connection.open()
+    try:
+        status, body = await connection.request("POST", "/login", {"username": username, "password": password})
+        if status != 200:
+            raise SystemExit(f"Login as {username} failed: {body.get('error')}")
+        connection.token = body["token"]
+        _, body = await connection.request("GET", "/products?in_stock=1")
+        catalog = body["products"]
+    finally:
+        connection.close()
+    if not catalog:
+        raise SystemExit("The catalog has no products in stock to load test with.")
+    return [await run_scenario(name, host, port, connection.token, clients, duration, catalog) for name in scenarios]
+
+
+def prepare_scratch_data(source_dir, target_dir):
+    """Copy the data files, give every product plenty of stock and add the load test user."""
+    os.makedirs(target_dir, exist_ok=True)
+    for name in ("products.json", "orders.json", "users.json"):
+        if os.path.exists(os.path.join(source_dir, name)):
+            shutil.copy(os.path.join(source_dir, name), target_dir)
+
+    products_file = os.path.join(target_dir, "products.json")
+    with open(products_file, "r") as file:
+        products = json.load(file)
+    for product in products:
+        product["quantity"] = 10 ** 9
+    with open(products_file, "w") as file:
+        json.dump(products, file, indent=4)
+
+    users_file = os.path.join(target_dir, "users.json")
+    try:
+        with open(users_file, "r") as file:
+            users = json.load(file)
+    except FileNotFoundError:
+        users = {}
+    users[LOADTEST_USER] = {
+        "username": LOADTEST_USER,
+        "full_name": "Load Test",
+        "email": "loadtest@example.com",
+        "phone": "0000000000",
+        "address": "",
+        "password": hashlib.sha256(LOADTEST_PASSWORD.encode()).hexdigest(),
+        "role": "customer",
+    }
+    with open(users_file, "w") as file:
+        json.dump(users, file, indent=4)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_local_server(data_dir, port):
+    """Start ``api.server`` on ``data_dir`` and wait until it accepts connections."""
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "api.server", "--port", str(port), "--data-dir", data_dir],
+        cwd=project_dir,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise SystemExit("The API server failed to start.")
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("The API server did not start listening in time.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the SmartPanda API and report requests/sec and p99 latency.")
+    parser.add_argument("--url", help="API to test (default: start a local server on a scratch copy of data/)")
+    parser.add_argument("--username", default=LOADTEST_USER)
+    parser.add_argument("--password", default=LOADTEST_PASSWORD)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--scenario", choices=("browse", "checkout", "all"), default="all")
+    args = parser.parse_args()
+    scenarios = ("browse", "checkout") if args.scenario == "all" else (args.scenario,)
+
+    server = scratch_dir = None
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        scratch_dir = tempfile.mkdtemp(prefix="smartpanda-loadtest-")
+        prepare_scratch_data("data", scratch_dir)
+        host, port = "127.0.0.1", free_port()
+        server = start_local_server(scratch_dir, port)
+    try:
+        results = asyncio.run(load_test(host, port, args.username, args.password, args.clients, args.duration, scenarios))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if scratch_dir is not None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    print(f"{'Scenario':<10}{'Requests':>10}{'Req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  Statuses")
+    for result in results:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(result["statuses"].items()))
+        print(f"{result['scenario']:<10}{result['requests']:>10}{result['rps']:>10.0f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
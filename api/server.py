@@ -0,0 +1,419 @@
+"""HTTP/JSON API over the ordering and inventory core, built on asyncio alone.
+
+Run it from the project directory::
+
+    python -m api.server --port 8080 [--branch <name>]
+
+Each branch of the chain is served by its own process; they share user
+accounts, so one token works against all of them.
+
+Clients log in with ``POST /login`` and send the returned token as
+``Authorization: Bearer <token>``. Every request is handled on a worker
+thread, so the event loop never waits for the data store's lock (which the
+writer holds while it fsyncs). Reads (browse, search, order status) answer from
+the in-memory indexes while holding that lock, so they never see a collection
+halfway through a change. Anything that commits runs without it, so many
+checkouts wait on disk at once and the data store's writer folds them into
+group commits.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import re
+import urllib.parse
+from data_storage.store import encode_collection, store
+from services.account_service import AccountService
+from services.inventory_service import InventoryService, RestockItem, EDITABLE_FIELDS
+from services.order_service import OrderService, OrderLine, OrderRequest, STAFF_ROLES, BUSY
+from services.report_service import ReportService
+from services.validation import InvalidRequest
+from data_storage.branches import get_branch
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    """Ends a request with ``status`` and a JSON error body."""
+
+    def __init__(self, status, message, **details):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": message, **details}
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body, params=None):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.params = params or {}
+        self.session = None  # Looked up by ApiServer.handle
+
+    @property
+    def token(self):
+        scheme, _, token = self.headers.get("authorization", "").partition(" ")
+        return token.strip() if scheme.lower() == "bearer" else None
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Request body is not valid JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object.")
+        return data
+
+    def flag(self, name):
+        return self.query.get(name, "").lower() in ("1", "true", "yes")
+
+
+def route(method, pattern, blocking=False):
+    """Mark an ApiServer method as the handler of ``method`` on paths matching ``pattern``.
+
+    ``blocking`` handlers commit to storage and take the store lock themselves;
+    the others are reads, run while holding it.
+    """
+    def decorate(handler):
+        handler.route = (method, re.compile(f"^{pattern}$"), blocking)
+        return handler
+    return decorate
+
+
+class ApiServer:
+    """Serves the order, inventory and account services to many clients at once."""
+
+    def __init__(self, data_dir="data", workers=32, branch=None):
+        # One process serves one branch's catalog and orders; accounts are shared by all branches
+        self.branch = get_branch(branch, data_dir)
+        self.ordering = OrderService(self.branch.products_file, self.branch.orders_file)
+        self.inventory = InventoryService(self.branch.products_file)
+        self.accounts = AccountService(self.branch.users_file, self.branch.sessions_file)
+        self.reports = ReportService(data_dir)
+        self.sessions = self.accounts.sessions
+        self.products = self.ordering.products
+        self.orders = self.ordering.orders
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        self.routes = [
+            getattr(self, name).route + (getattr(self, name),)
+            for name in dir(type(self)) if hasattr(getattr(type(self), name), "route")
+        ]
+
+    # Plumbing
+
+    async def dispatch(self, method, target, headers, body):
+        """Route one request; returns ``(status, JSON-able body)``."""
+        url = urllib.parse.urlsplit(target)
+        path = urllib.parse.unquote(url.path).rstrip("/") or "/"
+        query = dict(urllib.parse.parse_qsl(url.query))
+        allowed = False
+        for route_method, pattern, blocking, handler in self.routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            request = Request(method, path, query, headers, body, match.groupdict())
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executor, self.handle, handler, request, blocking)
+            except HttpError as error:
+                return error.status, error.body
+            except InvalidRequest as error:
+                return 400, {"error": str(error)}
+            except Exception as error:
+                return 500, {"error": f"{type(error).__name__}: {error}"}
+        if allowed:
+            return 405, {"error": f"{method} is not supported on {path}."}
+        return 404, {"error": f"No endpoint at {path}."}
+
+    def handle(self, handler, request, blocking):
+        """Run a handler on a worker thread, after picking up what other processes wrote."""
+        store.sync()  # A stat per data file; reloads only what other processes wrote
+        # Looking a session up may save it (sliding expiry, or ending an expired one), and saving
+        # waits for the commit writer, which takes the store lock; so it can't wait under that lock
+        request.session = self.sessions.get(request.token)
+        if blocking:
+            return handler(request)
+        # Worker threads change the collections under this lock; reads must not iterate them meanwhile
+        with store.lock:
+            return handler(request)
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    writer.write(self.encode_response(400, {"error": "Malformed request line."}, False))
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    writer.write(self.encode_response(400, {"error": "Malformed Content-Length header."}, False))
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method.upper(), target, headers, body)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+                writer.write(self.encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def encode_response(self, status, payload, keep_alive):
+        body = json.dumps(payload, default=encode_collection).encode()
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode("latin-1") + body
+
+    def require(self, request, roles=None):
+        """Return the caller's session, or fail with 401/403."""
+        session = request.session
+        if session is None:
+            raise HttpError(401, "Log in first and send the token as 'Authorization: Bearer <token>'.")
+        if roles is not None and session["role"] not in roles:
+            raise HttpError(403, "Your role can't do that.")
+        return session
+
+    def product_json(self, product):
+        data = product.to_json()
+        data["quantity"] = self.products.quantity(product["id"])
+        data["available"] = self.products.reservations.available(product["id"])
+        return data
+
+    def product_id(self, request):
+        return int(request.params["product_id"])
+
+    def order_lines(self, items):
+        """OrderLines from the JSON ``items`` of an order."""
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise HttpError(400, "items must be a list of {product_id, quantity, extras} objects.")
+        return [OrderLine(item.get("product_id"), item.get("quantity", 1), item.get("extras", ())) for item in items]
+
+    def result_json(self, result):
+        if result.placed:
+            return {"order": result.order}
+        return {"error": result.error, "product_ids": result.shortages}
+
+    def find_order(self, request, session):
+        order = self.ordering.find_order(request.params["order_id"])
+        if order is None or (order["username"] != session["username"] and session["role"] not in STAFF_ROLES):
+            raise HttpError(404, "No such order.")
+        return order
+
+    # Sessions
+
+    @route("POST", "/login", blocking=True)
+    def login(self, request):
+        data = request.json()
+        token = self.accounts.login(str(data.get("username", "")), str(data.get("password", "")))
+        if token is None:
+            raise HttpError(401, "Wrong username or password.")
+        session = self.sessions.get(token)
+        return 200, {"token": token, "username": session["username"], "role": session["role"]}
+
+    @route("POST", "/logout", blocking=True)
+    def logout(self, request):
+        self.require(request)
+        self.accounts.logout(request.token)
+        return 200, {"logged_out": True}
+
+    # Catalog
+
+    @route("GET", "/categories")
+    def list_categories(self, request):
+        return 200, {"categories": self.products.categories(in_stock_only=request.flag("in_stock"))}
+
+    @route("GET", "/products")
+    def list_products(self, request):
+        category = request.query.get("category")
+        in_stock = request.flag("in_stock")
+        if category:
+            products = self.products.products_in(category, in_stock_only=in_stock)
+        else:
+            products = [product for product in list(self.products) if not in_stock or self.products.in_stock_now(product)]
+        return 200, {"products": [self.product_json(product) for product in products]}
+
+    @route("GET", "/products/search")
+    def search_products(self, request):
+        try:
+            limit = int(request.query["limit"]) if "limit" in request.query else None
+        except ValueError:
+            raise HttpError(400, "limit must be a number.")
+        products = self.products.search(request.query.get("q", ""), limit)
+        return 200, {"products": [self.product_json(product) for product in products]}
+
+    @route("GET", r"/products/(?P<product_id>\d+)")
+    def show_product(self, request):
+        product = self.products.get(self.product_id(request))
+        if product is None:
+            raise HttpError(404, "No such product.")
+        return 200, self.product_json(product)
+
+    # Inventory
+
+    @route("POST", "/products", blocking=True)
+    def create_product(self, request):
+        self.require(request, STAFF_ROLES)
+        data = request.json()
+        try:
+            product = self.inventory.create_product(data["name"], data["price"], data["quantity"], data["category"], data.get("extras", []))
+        except KeyError as missing:
+            raise HttpError(400, f"Missing field {missing}.")
+        return 201, self.product_json(product)
+
+    @route("POST", "/products/restock", blocking=True)
+    def restock_products(self, request):
+        self.require(request, STAFF_ROLES)
+        items = request.json().get("items")
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise HttpError(400, "items must be a list of {product_id, quantity} objects.")
+        missing = self.inventory.restock([RestockItem(item.get("product_id"), item.get("quantity")) for item in items])
+        return 200, {"missing": missing}
+
+    @route("PATCH", r"/products/(?P<product_id>\d+)", blocking=True)
+    def update_product(self, request):
+        self.require(request, STAFF_ROLES)
+        product_id = self.product_id(request)
+        data = request.json()
+        product = self.products.get(product_id)
+        if product is None:
+            raise HttpError(404, "No such product.")
+        changes = {field: data[field] for field in EDITABLE_FIELDS if field in data}
+        version = data.get("version", product.get("version", 0))
+        updated = self.inventory.edit_product(product_id, changes, version)
+        if updated is None:
+            current = self.products.get(product_id)
+            raise HttpError(409, "The product was changed by someone else.", current=current)
+        return 200, self.product_json(updated)
+
+    @route("DELETE", r"/products/(?P<product_id>\d+)", blocking=True)
+    def delete_product(self, request):
+        self.require(request, STAFF_ROLES)
+        if self.inventory.remove_product(self.product_id(request)) is None:
+            raise HttpError(404, "No such product.")
+        return 200, {"deleted": True}
+
+    # Orders
+
+    @route("POST", "/orders", blocking=True)
+    def checkout(self, request):
+        session = self.require(request)
+        data = request.json()
+        result = self.ordering.place_order(session["username"], self.order_lines(data.get("items")), data.get("payment_method", "Credit Card"))
+        if result.placed:
+            return 201, result.order
+        if result.shortages:
+            raise HttpError(409, result.error, product_ids=result.shortages)
+        raise HttpError(503 if result.error == BUSY else 400, result.error)
+
+    @route("POST", "/orders/batch", blocking=True)
+    def import_orders(self, request):
+        """Place many orders (e.g. from a delivery platform) in one commit; staff only."""
+        self.require(request, STAFF_ROLES)
+        orders = request.json().get("orders")
+        if not isinstance(orders, list) or not all(isinstance(order, dict) for order in orders):
+            raise HttpError(400, "orders must be a list of {username, items, payment_method} objects.")
+        batch = [
+            OrderRequest(order.get("username"), self.order_lines(order.get("items")), order.get("payment_method", "Credit Card"))
+            for order in orders
+        ]
+        results = self.ordering.place_orders(batch)
+        return 200, {"placed": sum(result.placed for result in results), "results": [self.result_json(result) for result in results]}
+
+    @route("GET", "/orders")
+    def list_orders(self, request):
+        session = self.require(request)
+        if request.flag("all") and session["role"] in STAFF_ROLES:
+            return 200, {"orders": self.orders.snapshot()}
+        return 200, {"orders": self.orders.for_user(session["username"])}
+
+    @route("GET", r"/orders/(?P<order_id>[^/]+)")
+    def show_order(self, request):
+        return 200, self.find_order(request, self.require(request))
+
+    @route("PATCH", r"/orders/(?P<order_id>[^/]+)", blocking=True)
+    def update_order_status(self, request):
+        session = self.require(request, STAFF_ROLES)
+        order = self.find_order(request, session)
+        return 200, self.ordering.set_status(order["order_id"], request.json().get("status"))
+
+    @route("DELETE", r"/orders/(?P<order_id>[^/]+)", blocking=True)
+    def cancel_order(self, request):
+        session = self.require(request)
+        order = self.find_order(request, session)
+        if not self.ordering.can_cancel(order, session["username"], session["role"]):
+            raise HttpError(403, "You can't cancel this order.")
+        self.ordering.cancel_order(order["order_id"])
+        return 200, {"cancelled": order["order_id"]}
+
+    # Reports
+
+    @route("GET", "/reports/branches", blocking=True)
+    def branch_report(self, request):
+        self.require(request, roles=("admin",))
+        branches = [name for name in request.query.get("branches", "").split(",") if name] or None
+        try:
+            return 200, self.reports.consolidated(branches)
+        except ValueError as error:
+            raise HttpError(400, str(error))
+
+
+async def serve(host="127.0.0.1", port=8080, data_dir="data", branch=None):
+    api = ApiServer(data_dir, branch=branch)
+    server = await asyncio.start_server(api.handle_connection, host, port, backlog=1024)
+    print(f"SmartPanda API for branch '{api.branch.name}' listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the SmartPanda ordering API over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--branch", help="Branch to serve (default: SMARTPANDA_BRANCH or main)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.data_dir, args.branch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
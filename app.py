@@ -1,266 +1,263 @@
+import argparse
 import utilities.common as common
 import user_authentication.user_auth as user_auth
 import inventory_management.inventory as inventory_management
 import frontEnd.frontend as frontend_management
+from data_storage.store import store
 
-auth = user_auth.UserAuth()
-def dashboard_menu():
-    """Show options based on user role."""
+STAFF_ROLES = ("admin", "manager", "staff")
 
-    common.clear_console()
-    common.print_main_header()  # Fixed main header for all the time
-    if auth.is_logged_in():
 
-        # Display loading animation before final content
-        common.loading_message_with_delay("Loading your dashboard", 'green', 2)
+class App:
+    """The role-based menus as a state machine.
+
+    Every screen is a method that shows its menu once, handles one choice and
+    returns the name of the screen to show next (None quits). ``run`` is the
+    only loop, so going back, logging out or logging in again never nests
+    calls: the stack and memory stay the same however long a kiosk runs, and
+    the ``Inventory``/``Frontend`` of a screen are dropped once the dashboard is
+    shown again.
+    """
+
+    def __init__(self):
+        # Built here rather than on import: report workers are spawned and import this module again
+        self.auth = user_auth.UserAuth()
+        self.inventory = None
+        self.frontend = None
+        self.screens = {
+            "dashboard": self.dashboard,
+            "login": self.login_menu,
+            "staff": self.staff_menu,
+            "inventory": self.inventory_menu,
+            "orders": self.orders_menu,
+            "users": self.users_menu,
+            "customer": self.customer_menu,
+        }
+
+    def run(self, screen="dashboard"):
+        while screen is not None:
+            screen = self.screens[screen]()
+
+    # Helpers
+
+    def choose(self):
+        choice = common.get_valid_number_input("Choose an option: ")
+        # Pick up what other terminals changed before showing the next screen
+        store.sync()
+        return choice
+
+    def enter(self, message, color="green", work=None):
+        """Show a screen's loading message on a clear console while ``work`` (if any) runs; returns its result."""
+        common.clear_console()
+        return common.loading_message(message, color, work)
+
+    def action(self, message, handler, paged=False):
+        """Run a menu action that returns its output, then wait for the user.
+
+        A ``paged`` view returns None once the user has paged through it, and
+        then there is nothing left to wait for.
+        """
+        self.enter(message)
+        self.show(handler(), paged)
+
+    def show(self, result, paged=False):
+        if paged and result is None:
+            return
+        print(result)
+        common.wait_for_keypress()
+
+    def logout(self, message="Logging out, please wait"):
+        self.enter(message, "blue")
         common.clear_console()
+        common.show_message_with_delay(self.auth.logout_user())
+        return "dashboard"
+
+    def invalid_choice(self, screen):
+        common.show_message_with_delay("Invalid input choice. Please enter valid menu number.", "red")
+        return screen
 
-        common.print_main_header()  # Fixed main header for all the time
-        
-        if auth.session["role"] == "admin" or auth.session["role"] == "manager" or auth.session["role"] == "staff":
-            common.print_sub_header(f"{auth.session['role'].capitalize()} Dashboard")
-            print("1. Manage Inventory")
-            print("2. Manage Orders")
-            print("3. Manage Users (Only Admin Access)")
-            print("4. Logout")
+    def show_menu(self, title, options):
+        common.new_screen(title)
+        for option in options:
+            print(option)
 
-            while True:
-                choice = common.get_valid_number_input("Choose an option: ")
-                if choice == 1:
-                    inventory = inventory_management.Inventory()
-                    common.clear_console()
-                    common.loading_message_with_delay("Inventory management system is loading, please wait", 'green', 2)
-                    while True:
-                        common.clear_console()
-                        common.print_main_header()  # Fixed main header
-                        common.print_sub_header(f"Inventory Management System")
-                        print("1. Add Product")
-                        print("2. View All Products")
-                        print("3. Search Product")
-                        print("4. Update Product")
-                        print("5. Delete Product")
-                        print("6. Logout")
-                        print("0. Back to Main Menu")
+    # Screens
 
-                        choice = common.get_valid_number_input("Choose an option: ")
-                        if choice == 1:
-                            common.clear_console()
-                            common.loading_message_with_delay("Adding product, please wait", 'green', 2)
-                            result = inventory.add_product()
-                            print(result)
-                            common.wait_for_keypress()
-                        elif choice == 2:
-                            common.clear_console()
-                            common.loading_message_with_delay("Viewing all products, please wait", 'green', 2)
-                            result = inventory.view_all_products()
-                            print(result)
-                            common.wait_for_keypress()
-                        elif choice == 3:
-                            common.clear_console()
-                            common.loading_message_with_delay("Searching product, please wait", 'green', 2)
-                            result = inventory.search_product()
-                            print(result)
-                            common.wait_for_keypress()
-                        elif choice == 4:
-                            common.clear_console()
-                            common.loading_message_with_delay("Updating product, please wait", 'green', 2)
-                            result = inventory.update_product()
-                            print(result)
-                            common.wait_for_keypress()
-                        elif choice == 5:
-                            common.clear_console()
-                            common.loading_message_with_delay("Deleting product, please wait", 'green', 2)
-                            result = inventory.delete_product()
-                            print(result)
-                            common.wait_for_keypress()
-                        elif choice == 6:
-                            common.clear_console()
-                            common.loading_message_with_delay("Logging out, please wait", "blue", 2)
-                            common.clear_console()
-                            result = auth.logout_user()
-                            common.show_message_with_delay(result)
-                            dashboard_menu()
-                        elif choice == 0:
-                            dashboard_menu()
-                        else:
-                            print(common.show_message_with_delay("Invalid input choice. Please enter valid menu number.", "red"))
-                            continue
+    def dashboard(self):
+        """Send the user to the menu of their role, or to login."""
+        self.inventory = self.frontend = None
+        common.new_screen()
+        if not self.auth.is_logged_in():
+            return "login"
 
-                elif choice == 2:
-                    common.clear_console()
-                    common.loading_message_with_delay("Workers order management system is loading, please wait", 'green', 2)
-                    frontend = frontend_management.Frontend()
-                    while True:
-                        common.clear_console()
-                        common.print_main_header()
-                        common.print_sub_header("Order Management System Backend")
-                        print("1. View All Orders")
-                        print("2. Update Order Status")
-                        print("3. Cancel Order")
-                        print("4. Logout")
-                        print("0. Back to Main Menu")
+        # The loading animation lasts as long as the dashboard's data takes to load
+        if self.auth.session["role"] in STAFF_ROLES:
+            common.loading_message("Loading your dashboard", 'green')
+            return "staff"
+        # Built once; data comes from the shared store
+        self.frontend = common.loading_message("Loading your dashboard", 'green', frontend_management.Frontend)
+        return "customer"
 
-                        choice = common.get_valid_number_input("Choose an option: ")
-                        if choice == 1:
-                            frontend.view_all_orders()
-                            common.wait_for_keypress()
-                        elif choice == 2:
-                            frontend.update_order_status()
-                            common.wait_for_keypress()
-                        elif choice == 3:
-                            frontend.cancel_order()
-                            common.wait_for_keypress()
-                        elif choice == 4:
-                            common.clear_console()
-                            common.loading_message_with_delay("Logging out, please wait", "blue", 2)
-                            common.clear_console()
-                            result = auth.logout_user()
-                            common.show_message_with_delay(result)
-                            dashboard_menu()
-                        elif choice == 0:
-                            dashboard_menu()
-                        else:
-                            common.show_message_with_delay("Invalid input choice. Please enter valid menu number.", "red")
-                            continue
-                elif choice == 3:
-                    if auth.session["role"] == "admin":
-                        common.clear_console()
-                        common.loading_message_with_delay("Users managing system is loading, please wait", 'green', 2)
-                        while True:
-                            common.clear_console()
-                            common.print_main_header()  # Fixed main header
-                            common.print_sub_header(f"Users Managing System")
-                            print("1. View All Users")
-                            print("2. Search User")
-                            print("3. Delete User")
-                            print("4. Update User Role")
-                            print("5. View All Workers Only")
-                            print("6. Logout")
+    def login_menu(self):
+        self.show_menu("User Authentication System", ["1. Login", "2. Register"])
+        choice = self.choose()
+        if choice == 1:
+            self.enter("Login form is loading, please wait")
+            common.show_message_with_delay(self.auth.login_user())
+            return "dashboard"
+        if choice == 2:
+            self.enter("Register form is loading, please wait")
+            common.show_message_with_delay(self.auth.register_user())
+            return "dashboard"
+        return self.invalid_choice("login")
+
+    def staff_menu(self):
+        self.show_menu(f"{self.auth.session['role'].capitalize()} Dashboard", [
+            "1. Manage Inventory",
+            "2. Manage Orders",
+            "3. Manage Users (Only Admin Access)",
+            "4. Logout",
+        ])
+        choice = self.choose()
+        if choice == 1:
+            self.inventory = self.enter("Inventory management system is loading, please wait", work=inventory_management.Inventory)
+            return "inventory"
+        if choice == 2:
+            self.frontend = self.enter("Workers order management system is loading, please wait", work=frontend_management.Frontend)
+            return "orders"
+        if choice == 3:
+            if self.auth.session["role"] != "admin":
+                common.show_message_with_delay("Only admin can manage users!!! Please login as a admin.", "red")
+                return "staff"
+            self.enter("Users managing system is loading, please wait")
+            return "users"
+        if choice == 4:
+            return self.logout("Logging out is loading, please wait")
+        return self.invalid_choice("staff")
+
+    def inventory_menu(self):
+        self.show_menu("Inventory Management System", [
+            "1. Add Product",
+            "2. View All Products",
+            "3. Search Product",
+            "4. Update Product",
+            "5. Delete Product",
+            "6. Logout",
+            "0. Back to Main Menu",
+        ])
+        choice = self.choose()
+        actions = {
+            1: ("Adding product, please wait", self.inventory.add_product),
+            2: ("Viewing all products, please wait", self.inventory.view_all_products, True),
+            3: ("Searching product, please wait", self.inventory.search_product),
+            4: ("Updating product, please wait", self.inventory.update_product),
+            5: ("Deleting product, please wait", self.inventory.delete_product),
+        }
+        if choice in actions:
+            self.action(*actions[choice])
+            return "inventory"
+        if choice == 6:
+            return self.logout()
+        if choice == 0:
+            return "dashboard"
+        return self.invalid_choice("inventory")
+
+    def orders_menu(self):
+        self.show_menu("Order Management System Backend", [
+            "1. View All Orders",
+            "2. Update Order Status",
+            "3. Cancel Order",
+            "4. Logout",
+            "5. Branch Report (Only Admin Access)",
+            "0. Back to Main Menu",
+        ])
+        choice = self.choose()
+        if choice == 1:
+            self.show(self.frontend.view_all_orders(), paged=True)
+            return "orders"
+        elif choice == 2:
+            self.frontend.update_order_status()
+        elif choice == 3:
+            self.frontend.cancel_order()
+        elif choice == 4:
+            return self.logout()
+        elif choice == 5:
+            if self.auth.session["role"] == "admin":
+                self.frontend.view_branch_report()
+            else:
+                print(common.color_text("Only admin can view the branch report!!! Please login as a admin.", "red"))
+        elif choice == 0:
+            return "dashboard"
+        else:
+            return self.invalid_choice("orders")
+        common.wait_for_keypress()
+        return "orders"
 
-                            choice = common.get_valid_number_input("Choose an option: ")
-                            if choice == 1:
-                                common.clear_console()
-                                common.loading_message_with_delay("Viewing all users is loading, please wait", 'green', 2)
-                                result = auth.view_all_users()
-                                print(result)
-                                common.wait_for_keypress()
-                            elif choice == 2:
-                                common.clear_console()
-                                common.loading_message_with_delay("User searching form is loading, please wait", 'green', 2)                                
-                                result = auth.search_user()
-                                print(result)
-                                common.wait_for_keypress()
-                            elif choice == 3:
-                                common.clear_console()
-                                common.loading_message_with_delay("Delete user is loading, please wait", 'green', 2)                                
-                                result = auth.delete_user()
-                                print(result)
-                                common.wait_for_keypress()
-                            elif choice == 4:
-                                common.clear_console()
-                                common.loading_message_with_delay("Update user role is loading, please wait", 'green', 2)                                
-                                result = auth.update_role()
-                                print(result)
-                                common.wait_for_keypress()
-                            elif choice == 5:
-                                common.clear_console()
-                                common.loading_message_with_delay("View all workers is loading, please wait", 'green', 2)                                
-                                result = auth.view_all_workers()
-                                print(result)
-                                common.wait_for_keypress()
-                            elif choice == 6:
-                                common.clear_console()
-                                common.loading_message_with_delay("Logging out is loading, please wait", "blue", 2)
-                                common.clear_console()
-                                result = auth.logout_user()
-                                common.show_message_with_delay(result)
-                                dashboard_menu()
-                            else:
-                                print(common.show_message_with_delay("Invalid input choice. Please enter valid menu number.", "red"))
-                                continue
+    def users_menu(self):
+        self.show_menu("Users Managing System", [
+            "1. View All Users",
+            "2. Search User",
+            "3. Delete User",
+            "4. Update User Role",
+            "5. View All Workers Only",
+            "6. Logout",
+            "0. Back to Main Menu",
+        ])
+        choice = self.choose()
+        actions = {
+            1: ("Viewing all users is loading, please wait", self.auth.view_all_users, True),
+            2: ("User searching form is loading, please wait", self.auth.search_user),
+            3: ("Delete user is loading, please wait", self.auth.delete_user),
+            4: ("Update user role is loading, please wait", self.auth.update_role),
+            5: ("View all workers is loading, please wait", self.auth.view_all_workers),
+        }
+        if choice in actions:
+            self.action(*actions[choice])
+            return "users"
+        if choice == 6:
+            return self.logout("Logging out is loading, please wait")
+        if choice == 0:
+            return "dashboard"
+        return self.invalid_choice("users")
 
-                    else:
-                       print(common.color_text("Only admin can manage users!!! Please login as a admin.", "red"))
-                       continue
-                elif choice == 4:
-                    common.clear_console()
-                    common.loading_message_with_delay("Logging out is loading, please wait", "blue", 2)
-                    common.clear_console()
-                    result = auth.logout_user()
-                    common.show_message_with_delay(result)
-                    dashboard_menu()
-                else:
-                    print(common.color_text("Invalid input choice. Please enter 1, 2, 3, or 4 as valid menu number.", "red"))
-                    continue
+    def customer_menu(self):
+        self.show_menu("Customer Dashboard", [
+            "1. New Order",
+            "2. View My Orders",
+            "3. Update Order",
+            "4. Cancel Order",
+            "5. Panda Assistant (Voice Assistance)",
+            "6. Logout",
+        ])
+        choice = self.choose()
+        if choice == 1:
+            self.frontend.new_order()
+        elif choice == 2:
+            self.show(self.frontend.view_my_orders(), paged=True)
+        elif choice in (3, 4):
+            handler = {3: self.frontend.update_order, 4: self.frontend.cancel_order}[choice]
+            result = handler()
+            if result is not None:
+                print(result)
+            common.wait_for_keypress()
+        elif choice == 5:
+            import voice_ordering.panda_assistant as panda_assistant
+            # Returns here once the customer is done talking to it
+            panda_assistant.PandaAssistant(self.frontend).starting()
+        elif choice == 6:
+            return self.logout()
         else:
-            # Customer Dashboard
-            while True:
-                common.clear_console()
-                common.print_main_header()  # Fixed main header
-                common.print_sub_header(f"Customer Dashboard")
-                frontend = frontend_management.Frontend()
-                print("1. New Order")
-                print("2. View My Orders")
-                print("3. Update Order")
-                print("4. Cancel Order")
-                print("5. Panda Assistant (Voice Assistance)")
-                print("6. Logout")
+            return self.invalid_choice("customer")
+        return "customer"
 
-                choice = common.get_valid_number_input("Choose an option: ")
-                if choice == 1:
-                    frontend.new_order()
-                elif choice == 2:
-                    result = frontend.view_my_orders()
-                    print(result)
-                    common.wait_for_keypress()
-                elif choice == 3:
-                    result = frontend.update_order()
-                    print(result)
-                    common.wait_for_keypress()
-                elif choice == 4:
-                    result = frontend.cancel_order()
-                    print(result)
-                    common.wait_for_keypress()
-                elif choice == 5:
-                    import voice_ordering.panda_assistant as panda_assistant
-                    panda = panda_assistant.PandaAssistant()
-                    panda.starting()
-                elif choice == 6:
-                    common.clear_console()
-                    common.loading_message_with_delay("Logging out, please wait", "blue", 2)
-                    common.clear_console()
-                    result = auth.logout_user()
-                    common.show_message_with_delay(result)
-                    dashboard_menu()
-                else:
-                    print(common.show_message_with_delay("Invalid input choice. Please enter valid menu number.", "red"))
-                    continue
-    else:
-        # Non-logged-in options
-        common.print_sub_header("User Authentication System")
-        print("1. Login")
-        print("2. Register")
-        while True:
-                choice = common.get_valid_number_input("Choose an option: ")
-                if choice == 1:
-                    common.clear_console()
-                    common.loading_message_with_delay("Login form is loading, please wait", 'green', 2)
-                    result = auth.login_user()
-                    common.show_message_with_delay(result)
-                    dashboard_menu()
-                elif choice == 2:
-                    
-                    common.clear_console()
-                    common.loading_message_with_delay("Register form is loading, please wait", 'green', 2)
-                    result = auth.register_user()
-                    common.show_message_with_delay(result)
-                    dashboard_menu()
-                else:
-                    print(common.color_text("Invalid input choice. Please enter 1 or 2 as valid menu number.", "red"))
-                    continue
 
 def main():
-    dashboard_menu()  # Display role-based menu
+    parser = argparse.ArgumentParser(description="SmartPanda restaurant terminal.")
+    parser.add_argument("--no-delay", action="store_true", help="Skip message pauses and loading animations (kiosks, scripted runs).")
+    args = parser.parse_args()
+    if args.no_delay:
+        common.set_no_delay()
+    App().run()  # Display role-based menu
 
 if __name__ == "__main__":
     main()
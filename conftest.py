@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """An empty data directory of its own for each test."""
+    directory = tmp_path / "data"
+    directory.mkdir()
+    return str(directory)
@@ -0,0 +1,120 @@
+"""Branches: each restaurant has its own catalog, stock and orders, and all of them share user accounts.
+
+Layout of a data directory::
+
+    data/users.json, data/sessions.json       accounts and logins of every branch
+    data/products.json, data/orders.json      the main branch
+    data/branches/<name>/products.json, ...   every other branch
+
+A terminal or API process serves one branch, chosen with ``SMARTPANDA_BRANCH``
+(or ``--branch``). The default is the main branch, so an install with a single
+restaurant keeps its layout. Branches are added with::
+
+    python -m data_storage.branches create <name>
+"""
+import argparse
+import os
+import re
+import sys
+from data_storage.store import write_json_atomic
+
+DATA_DIR = "data"
+MAIN_BRANCH = "main"
+BRANCHES_DIR = "branches"
+
+# Branch names become directory names
+BRANCH_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
+
+class Branch:
+    """Where one branch keeps its files; user accounts and sessions live in the shared data directory."""
+
+    __slots__ = ("name", "data_dir", "directory")
+
+    def __init__(self, name=MAIN_BRANCH, data_dir=DATA_DIR):
+        if name != MAIN_BRANCH and not BRANCH_PATTERN.match(name):
+            raise ValueError(f"Invalid branch name '{name}'. Use lowercase letters, digits and dashes.")
+        self.name = name
+        self.data_dir = data_dir
+        self.directory = data_dir if name == MAIN_BRANCH else os.path.join(data_dir, BRANCHES_DIR, name)
+
+    @property
+    def products_file(self):
+        return os.path.join(self.directory, "products.json")
+
+    @property
+    def orders_file(self):
+        return os.path.join(self.directory, "orders.json")
+
+    @property
+    def users_file(self):
+        return os.path.join(self.data_dir, "users.json")
+
+    @property
+    def sessions_file(self):
+        return os.path.join(self.data_dir, "sessions.json")
+
+    def exists(self):
+        return os.path.isdir(self.directory)
+
+
+def get_branch(name=None, data_dir=DATA_DIR):
+    """The branch called ``name``, or the one ``SMARTPANDA_BRANCH`` selects (main by default)."""
+    return Branch(name or os.environ.get("SMARTPANDA_BRANCH") or MAIN_BRANCH, data_dir)
+
+
+def shared_data_dir(path):
+    """The data directory that the branch file at ``path`` belongs to, shared by every branch."""
+    directory = os.path.dirname(os.path.abspath(path))
+    parent = os.path.dirname(directory)
+    if os.path.basename(parent) == BRANCHES_DIR:
+        return os.path.dirname(parent)
+    return directory
+
+
+def list_branches(data_dir=DATA_DIR):
+    """Names of every branch in ``data_dir``, main first."""
+    try:
+        names = sorted(
+            name for name in os.listdir(os.path.join(data_dir, BRANCHES_DIR))
+            if BRANCH_PATTERN.match(name) and os.path.isdir(os.path.join(data_dir, BRANCHES_DIR, name))
+        )
+    except FileNotFoundError:
+        names = []
+    return [MAIN_BRANCH] + [name for name in names if name != MAIN_BRANCH]
+
+
+def create_branch(name, data_dir=DATA_DIR):
+    """Create an empty branch (no products, no orders) unless it exists; returns the Branch."""
+    branch = Branch(name, data_dir)
+    os.makedirs(branch.directory, exist_ok=True)
+    for path in (branch.products_file, branch.orders_file):
+        if not os.path.exists(path):
+            write_json_atomic(path, [])
+    return branch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or create restaurant branches.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show every branch and where its data lives.")
+    create = commands.add_parser("create", help="Add an empty branch.")
+    create.add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        try:
+            branch = create_branch(args.name, args.data_dir)
+        except ValueError as error:
+            print(f"Error: {error}")
+            return 1
+        print(f"Branch '{branch.name}' keeps its catalog and orders in {branch.directory}.")
+    else:
+        for name in list_branches(args.data_dir):
+            print(f"{name}\t{Branch(name, args.data_dir).directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import json
+import os
+from data_storage.store import store
+from data_storage.ngram_index import NgramIndex
+from data_storage.records import MISSING, Product
+from data_storage.reservations import StockReservations
+from data_storage.shared_catalog import SharedCatalog
+
+
+class Catalog:
+    """Product list shared by Inventory and Frontend, with indexes kept in step.
+
+    Iterating a catalog yields the products in their stored order, so existing
+    loops keep working, while ``get`` and ``adjust_stock`` find a product by id in
+    constant time. New ids come from a monotonic counter persisted next to the
+    products (``products.meta.json``), so an id is never handed out twice, even
+    after the product that had it was deleted. A trigram index over names,
+    categories, extras and ids serves ``search`` without scanning the catalog,
+    and a category index (with the in-stock subset) serves menu browsing.
+
+    Every product carries a ``version`` that goes up with each change. Stock moves
+    are saved as deltas through ``apply_stock`` and edits carry the version they
+    started from, so terminals sharing the data directory can't oversell or undo
+    each other's changes; ``refresh`` brings a product in line with storage.
+    Stock held by carts that are still being built is tracked by ``reservations``.
+
+    When an owner process publishes the catalog in shared memory, ``shared`` is
+    the mapped segment: ``quantity`` reads stock from it, so sales on other
+    terminals of the host show up at once, and every committed product change
+    is written back into it.
+    """
+
+    def __init__(self, products, meta, meta_file, products_file=None, shared=None):
+        self.shared = shared
+        self.products = products
+        self.by_id = {}
+        self.search_index = NgramIndex()
+        self.by_category = {}
+        self.in_stock = {}
+        self.category_names = {}
+        self._category_of = {}
+        self._position = {}
+        self._next_position = 0
+        for product in products:
+            self._index(product)
+        self.meta = meta
+        self.meta_file = meta_file
+        self.products_file = products_file
+        self.reservations = StockReservations(self)
+        highest_id = max(self.by_id, default=0)
+        self.meta["next_id"] = max(self.meta.get("next_id", 1), highest_id + 1)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __len__(self):
+        return len(self.products)
+
+    def to_json(self):
+        return self.products
+
+    def _index(self, product):
+        product_id = product["id"]
+        self.by_id[product_id] = product
+        if product_id not in self._position:
+            self._position[product_id] = self._next_position
+            self._next_position += 1
+        self.search_index.add(product_id, self.search_texts(product))
+
+        # Categories are grouped case-insensitively and shown with their first spelling
+        category = product["category"].lower()
+        self._category_of[product_id] = category
+        self.category_names.setdefault(category, product["category"])
+        self.by_category.setdefault(category, {})[product_id] = product
+        self._update_stock_index(product)
+
+    def _unindex(self, product_id, search=True):
+        if search:
+            self.search_index.remove(product_id)
+        category = self._category_of.pop(product_id, None)
+        if category is None:
+            return
+        products = self.by_category[category]
+        del products[product_id]
+        self.in_stock.get(category, {}).pop(product_id, None)
+        if not products:
+            del self.by_category[category]
+            del self.category_names[category]
+            self.in_stock.pop(category, None)
+
+    def _update_stock_index(self, product):
+        category = self._category_of[product["id"]]
+        if self.quantity(product["id"]) > 0:
+            self.in_stock.setdefault(category, {})[product["id"]] = product
+        else:
+            self.in_stock.get(category, {}).pop(product["id"], None)
+
+    def get(self, product_id):
+        """Return the product with ``product_id`` or None."""
+        return self.by_id.get(product_id)
+
+    def quantity(self, product_id):
+        """Current stock of a product (0 if it is gone), from the shared catalog when attached."""
+        product = self.by_id.get(product_id)
+        if product is None:
+            return 0
+        if self.shared is not None:
+            return self.shared.quantity(product_id, product["quantity"])
+        return product["quantity"]
+
+    def search_texts(self, product):
+        """Fields of ``product`` that search matches, most important first."""
+        return [product["name"], product["category"], *(extra["name"] for extra in product.get("extras", [])), product["id"]]
+
+    def search(self, query, limit=None):
+        """Return products whose name, category, extras or id contain ``query``, best matches first."""
+        products = (self.by_id.get(product_id) for product_id in self.search_index.search(query, limit))
+        return [product for product in products if product is not None]
+
+    def in_stock_now(self, product):
+        """True when ``product`` has stock, as ``quantity`` reports it."""
+        return self.quantity(product["id"]) > 0
+
+    def categories(self, in_stock_only=False):
+        """Category names in the order they first appear in the catalog."""
+        if not in_stock_only:
+            return list(self.category_names.values())
+        if self.shared is not None:
+            # Other terminals move stock in the segment without touching this process's index
+            return [
+                self.category_names[category] for category, products in self.by_category.items()
+                if any(map(self.in_stock_now, products.values()))
+            ]
+        return [self.category_names[category] for category in self.by_category if self.in_stock.get(category)]
+
+    def products_in(self, category, in_stock_only=False):
+        """Products in ``category`` (any letter case) in catalog order, optionally only those in stock."""
+        category = category.lower()
+        if not in_stock_only:
+            return list(self.by_category.get(category, {}).values())
+        if self.shared is not None:
+            return list(filter(self.in_stock_now, self.by_category.get(category, {}).values()))
+        # Products coming back into stock are re-added at the end, so restore catalog order
+        return sorted(self.in_stock.get(category, {}).values(), key=lambda product: self._position[product["id"]])
+
+    def allocate_id(self):
+        """Hand out the next product id from the counter shared by every terminal."""
+        return store.allocate(self.meta_file, "next_id")
+
+    def add(self, product):
+        """Append a product (a Product record or its JSON dict), index it and return the record."""
+        product = Product.from_json(product)
+        self.products.append(product)
+        self._index(product)
+        return product
+
+    def reindex(self, product_id):
+        """Refresh the indexes after the product with ``product_id`` was edited in place."""
+        product = self.by_id.get(product_id)
+        if product is None:
+            return
+        if self._category_of.get(product_id) == product["category"].lower():
+            # Same category, so the product keeps its place in it; search re-adds in place too
+            self.search_index.add(product_id, self.search_texts(product))
+            self._update_stock_index(product)
+            return
+        self._unindex(product_id, search=False)
+        self._index(product)
+
+    def remove(self, product_id):
+        """Remove the product with ``product_id`` and return it (or None)."""
+        product = self.by_id.pop(product_id, None)
+        if product is not None:
+            self.products.remove(product)
+            self._unindex(product_id)
+            self._position.pop(product_id, None)
+        return product
+
+    def adjust_stock(self, product_id, delta):
+        """Change a product's stock by ``delta`` in memory; returns the product, or None if it's gone."""
+        product = self.by_id.get(product_id)
+        if product is not None:
+            product["quantity"] += delta
+            product["version"] = product.get("version", 0) + 1
+            self._update_stock_index(product)
+        return product
+
+    def check_stock(self, deltas):
+        """Return the ids in ``deltas`` ({id: amount}) that are gone or would drop below zero."""
+        return [
+            product_id for product_id, delta in deltas.items()
+            if product_id not in self.by_id or self.quantity(product_id) + delta < 0
+        ]
+
+    def apply_stock(self, deltas):
+        """Move stock by ``deltas`` ({id: amount}) and save the moves as deltas.
+
+        Storage adds them to whatever stock is stored at commit time, so concurrent
+        checkouts on other terminals are kept; a move that would take a product
+        below zero raises ``ConflictError`` with the product refreshed.
+        """
+        for product_id, delta in deltas.items():
+            self.adjust_stock(product_id, delta)
+        store.save(self.products_file, deltas={product_id: {"quantity": delta} for product_id, delta in deltas.items()})
+
+    def refresh(self, product_id, data):
+        """Replace the product with ``product_id`` by its stored ``data`` (None when deleted)."""
+        if data is None:
+            self.remove(product_id)
+            if self.shared is not None:
+                self.shared.remove(product_id)
+            return
+        product = self.by_id.get(product_id)
+        if product is None:
+            self.add(data)
+        else:
+            for field in product.FIELDS:
+                if field not in data and field in product:
+                    object.__setattr__(product, field, MISSING)
+            product.update(data)
+            self.reindex(product_id)
+        if self.shared is not None:
+            self.shared.publish(data)
+
+    def committed(self, change):
+        """Publish the products a durable commit touched to the shared catalog."""
+        if self.shared is None:
+            return
+        for product_id in change.affected():
+            product = self.by_id.get(product_id)
+            if product is None:
+                self.shared.remove(product_id)
+            else:
+                self.shared.publish(product)
+
+
+def meta_file_for(products_file):
+    base, _ = os.path.splitext(products_file)
+    return base + ".meta.json"
+
+
+def read_meta_file(meta_file):
+    """Read the catalog counters from ``meta_file``."""
+    try:
+        with open(meta_file, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        print("Error: Catalog metadata file is corrupted. Product ids will continue after the highest existing id.")
+        return {}
+
+
+def load_catalog(products_file, read_products):
+    """Return the process-wide catalog for ``products_file`` from the shared data store.
+
+    When an owner process publishes the catalog in shared memory, the first load
+    reads the products from the segment instead of parsing the products file;
+    reloads after another process wrote the file read the file.
+    """
+    segment = {}
+
+    def read():
+        if "shared" not in segment:
+            shared = segment["shared"] = SharedCatalog.attach(products_file)
+            if shared is not None and not shared.full():
+                return list(shared)
+        return read_products()
+
+    def build(products):
+        meta_file = meta_file_for(products_file)
+        meta = store.load(meta_file, lambda: read_meta_file(meta_file), kind="meta")
+        return Catalog([Product.from_json(product) for product in products], meta, meta_file, products_file, segment.get("shared"))
+
+    return store.load(products_file, read, kind="products", factory=build)
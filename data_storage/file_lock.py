@@ -0,0 +1,118 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive cross-process lock on a sidecar ``<path>.lock`` file.
+
+    Every terminal working on the same data directory takes this lock only for
+    the few milliseconds it needs to re-read, merge and write one data file. The
+    lock is re-entrant inside a process; use ``lock_for`` so each process has a
+    single lock object per file.
+    """
+
+    def __init__(self, path):
+        self.lock_file = path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            handle = open(self.lock_file, "a+")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                handle.close()
+                self._thread_lock.release()
+                raise
+            self._handle = handle
+        self._depth += 1
+
+    def try_acquire(self):
+        """Take the lock only if no other process holds it; returns whether it was taken."""
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        if self._depth == 0:
+            handle = open(self.lock_file, "a+")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                handle.close()
+                self._thread_lock.release()
+                return False
+            self._handle = handle
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            handle, self._handle = self._handle, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                handle.close()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def lock_for(path):
+    """Return the process-wide lock guarding the data file at ``path``."""
+    key = os.path.abspath(path)
+    with _locks_lock:
+        if key not in _locks:
+            _locks[key] = FileLock(key)
+        return _locks[key]
+
+
+class locked_files:
+    """Hold the locks of several data files at once, always taken in the same order."""
+
+    def __init__(self, paths):
+        self.locks = [lock_for(path) for path in sorted({os.path.abspath(path) for path in paths})]
+
+    def __enter__(self):
+        taken = []
+        try:
+            for lock in self.locks:
+                lock.acquire()
+                taken.append(lock)
+        except BaseException:
+            for lock in reversed(taken):
+                lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self.locks):
+            lock.release()
@@ -0,0 +1,118 @@
+import heapq
+
+
+class NgramIndex:
+    """Incremental n-gram inverted index answering case-insensitive substring queries.
+
+    Every indexed text contributes all of its grams of length 1 to ``n`` to the
+    postings, so a query of up to ``n`` characters is answered by one posting
+    set and a longer query by intersecting the postings of its n-grams. The
+    candidates are then checked with a real substring test, so the results are
+    exactly those of ``query in text`` while only the candidates are scanned.
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.texts = {}
+        self.postings = {}
+        self._order = {}
+        self._next_order = 0
+
+    def __len__(self):
+        return len(self.texts)
+
+    def grams(self, text):
+        grams = set()
+        for length in range(1, self.n + 1):
+            for start in range(len(text) - length + 1):
+                grams.add(text[start:start + length])
+        return grams
+
+    def add(self, key, texts):
+        """Index ``texts`` (one string per searchable field) under ``key``.
+
+        Re-adding a key replaces its texts but keeps its place among equally
+        ranked results, so an edited product or user doesn't move in searches.
+        """
+        old_texts = self.texts.get(key)
+        if old_texts is not None:
+            self._unpost(key, old_texts)
+        texts = tuple(str(text).lower() for text in texts if text is not None)
+        self.texts[key] = texts
+        if key not in self._order:
+            self._order[key] = self._next_order
+            self._next_order += 1
+        for text in texts:
+            for gram in self.grams(text):
+                self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        """Drop ``key`` from the index."""
+        texts = self.texts.pop(key, None)
+        if texts is None:
+            return
+        self._order.pop(key, None)
+        self._unpost(key, texts)
+
+    def _unpost(self, key, texts):
+        for text in texts:
+            for gram in self.grams(text):
+                keys = self.postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.postings[gram]
+
+    def candidates(self, query):
+        """Keys whose texts contain every n-gram of ``query``."""
+        if len(query) <= self.n:
+            return self.postings.get(query, set())
+        posting_sets = []
+        for start in range(len(query) - self.n + 1):
+            keys = self.postings.get(query[start:start + self.n])
+            if not keys:
+                return set()
+            posting_sets.append(keys)
+        posting_sets.sort(key=len)
+        return set(posting_sets[0]).intersection(*posting_sets[1:])
+
+    def rank(self, query, texts):
+        """Score how well ``texts`` match ``query``: lower is better, None means no match.
+
+        An exact field beats a prefix, which beats a word start, which beats any
+        other substring; earlier fields win ties.
+        """
+        best = None
+        for field, text in enumerate(texts):
+            position = text.find(query)
+            if position < 0:
+                continue
+            if text == query:
+                score = 0
+            elif position == 0:
+                score = 1
+            elif text[position - 1] == " ":
+                score = 2
+            else:
+                score = 3
+            score = (score, field)
+            if best is None or score < best:
+                best = score
+        return best
+
+    def search(self, query, limit=None):
+        """Return keys whose texts contain ``query``, best matches first."""
+        query = query.lower()
+        if not query:
+            keys = sorted(list(self.texts), key=lambda key: self._order.get(key, 0))
+            return keys[:limit] if limit is not None else keys
+
+        ranked = []
+        # Copied, so a search can run while another thread adds or removes entries
+        for key in list(self.candidates(query)):
+            texts = self.texts.get(key)
+            score = self.rank(query, texts) if texts is not None else None
+            if score is not None:
+                ranked.append((score, self._order.get(key, 0), key))
+        ranked = heapq.nsmallest(limit, ranked) if limit is not None else sorted(ranked)
+        return [key for _, _, key in ranked]
@@ -0,0 +1,160 @@
+import bisect
+from data_storage.store import store
+from data_storage.order_journal import get_journal
+from data_storage.order_ids import is_sequenced, first_id_at
+from data_storage.records import Order
+
+
+class OrderBook:
+    """All orders in placement order, indexed by order id and by customer.
+
+    Orders are kept in an insertion-ordered dict keyed by object identity, so
+    adding and removing one is constant time and iteration still follows the
+    order history. ``get`` and ``for_user`` answer from the indexes in time
+    proportional to the result rather than the whole history. Time-ordered order
+    ids are also kept sorted, so ``placed_between`` finds the orders of a time
+    range by binary search.
+
+    With its ``journal``, the book catches up with what other processes wrote
+    by applying the events they appended rather than reloading every order.
+    """
+
+    def __init__(self, orders, journal=None):
+        self.journal = journal
+        self._orders = {}
+        self.by_id = {}
+        self.by_user = {}
+        self.sequenced = []
+        for order in orders:
+            self.add(order)
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return len(self._orders)
+
+    def snapshot(self):
+        """Return the orders as a list (safe to iterate while others add or remove)."""
+        return list(self._orders.values())
+
+    def to_json(self):
+        return self.snapshot()
+
+    def get(self, order_id, username=None):
+        """Return the order with ``order_id`` (the oldest one if legacy ids repeat) or None.
+
+        With ``username``, only that customer's order with the id is returned.
+        """
+        for order in self.by_id.get(order_id, ()):
+            if username is None or order.get("username") == username:
+                return order
+        return None
+
+    def for_user(self, username):
+        """Return the orders placed by ``username``, oldest first."""
+        return list(self.by_user.get(username, {}).values())
+
+    def scan(self, username=None):
+        """Iterate the orders (only ``username``'s if given), oldest first, without copying them.
+
+        Unlike iterating the book, the iterator reads the live index, so it must
+        be used up before orders are added or removed.
+        """
+        if username is None:
+            return iter(self._orders.values())
+        return iter(self.by_user.get(username, {}).values())
+
+    def count(self, username=None):
+        """How many orders there are (placed by ``username`` if given)."""
+        if username is None:
+            return len(self._orders)
+        return len(self.by_user.get(username, {}))
+
+    def placed_between(self, start, end):
+        """Orders with time-ordered ids issued from ``start`` up to ``end`` (seconds), oldest first.
+
+        Orders with legacy ``#SP1234`` ids carry no time and are never included.
+        """
+        low = bisect.bisect_left(self.sequenced, first_id_at(start))
+        high = bisect.bisect_left(self.sequenced, first_id_at(end))
+        return [order for order_id in self.sequenced[low:high] for order in self.by_id[order_id]]
+
+    def add(self, order):
+        """Add an order (an Order record or its JSON dict), index it and return the record."""
+        order = Order.from_json(order)
+        self._orders[id(order)] = order
+        if order["order_id"] not in self.by_id and is_sequenced(order["order_id"]):
+            # New ids arrive in order, so this is nearly always an append
+            bisect.insort(self.sequenced, order["order_id"])
+        self.by_id.setdefault(order["order_id"], []).append(order)
+        self.by_user.setdefault(order.get("username"), {})[id(order)] = order
+        return order
+
+    def remove(self, order):
+        """Remove an order and drop it from the indexes."""
+        if self._orders.pop(id(order), None) is None:
+            return
+        same_id = self.by_id[order["order_id"]]
+        same_id.remove(order)
+        if not same_id:
+            del self.by_id[order["order_id"]]
+            if is_sequenced(order["order_id"]):
+                del self.sequenced[bisect.bisect_left(self.sequenced, order["order_id"])]
+        user_orders = self.by_user[order.get("username")]
+        del user_orders[id(order)]
+        if not user_orders:
+            del self.by_user[order.get("username")]
+
+    def reload(self, orders):
+        """Replace every order by freshly loaded ``orders`` (another process changed them)."""
+        self._orders.clear()
+        self.by_id.clear()
+        self.by_user.clear()
+        self.sequenced.clear()
+        for order in orders:
+            self.add(order)
+
+    def catch_up(self, load):
+        """Apply the journal events other processes appended, or reload everything with ``load()``.
+
+        Events are applied the way ``OrderJournal.replay`` folds them into a
+        snapshot, so the book ends up as a full reload would leave it.
+        """
+        events = self.journal.read_new_events() if self.journal is not None else None
+        if events is None:
+            self.reload(load())
+            return
+        for event in events:
+            kind = event.get("event")
+            order = self.get(event.get("order_id"))
+            if kind == "created":
+                if order is None:
+                    self.add(event["order"])
+                else:
+                    order.update(event["order"])
+            elif kind == "status_changed" and order is not None:
+                order["status"] = event["status"]
+            elif kind == "cancelled" and order is not None:
+                self.remove(order)
+
+    def caught_up(self):
+        """This process's own commit was the only one to append to the journal since it was read."""
+        if self.journal is not None:
+            self.journal.caught_up()
+
+    def set_status(self, order, status):
+        """Change an order's status."""
+        order["status"] = status
+
+
+def load_order_book(orders_file, read_orders):
+    """Return the process-wide order book for ``orders_file`` from the shared data store."""
+    journal = get_journal(orders_file)
+
+    # OrderBook converts the JSON dicts to compact Order records
+    return store.load(
+        orders_file, lambda: journal.load(read_orders), kind="orders",
+        factory=lambda orders: OrderBook(orders, journal),
+        watch=[journal.journal_file, journal.compacting_file],
+    )
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from data_storage.file_lock import lock_for
+from data_storage.branches import shared_data_dir
+
+PREFIX = "#SP"
+
+# Milliseconds are counted from 2024-01-01 UTC
+EPOCH_MS = 1704067200000
+
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODES = 1 << NODE_BITS
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32: no I, L, O or U, so ids can be read out and typed back safely
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+DIGITS = 13  # 63 bits
+DECODE = {char: value for value, char in enumerate(ALPHABET)}
+
+
+def encode(value):
+    chars = []
+    for _ in range(DIGITS):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def is_sequenced(order_id):
+    """True for ids from OrderIdGenerator; legacy ``#SP1234`` ids are not."""
+    code = order_id[len(PREFIX):]
+    return order_id.startswith(PREFIX) and len(code) == DIGITS and all(char in DECODE for char in code)
+
+
+def placed_at(order_id):
+    """When a sequenced order id was issued (seconds since the epoch), or None for legacy ids."""
+    if not is_sequenced(order_id):
+        return None
+    value = 0
+    for char in order_id[len(PREFIX):]:
+        value = value * 32 + DECODE[char]
+    return ((value >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS) / 1000
+
+
+def first_id_at(timestamp):
+    """The lowest id that can be issued at ``timestamp`` (seconds), for range queries over order history."""
+    milliseconds = max(int(timestamp * 1000) - EPOCH_MS, 0)
+    return PREFIX + encode(milliseconds << (NODE_BITS + SEQUENCE_BITS))
+
+
+class OrderIdGenerator:
+    """Unique, time-ordered order ids for every terminal of every branch sharing a data directory.
+
+    An id packs the milliseconds since 2024 (41 bits), the node number of the
+    issuing process (10 bits) and a per-millisecond sequence (12 bits) into 13
+    Crockford base32 characters after ``#SP``, e.g. ``#SP0A8QWDBNM0000``. Each
+    process leases its node number by holding ``.order-node-<n>.lock`` in the data
+    directory all branches share for as long as it runs, so no two live processes
+    share one whichever branch they serve, and a process never repeats its own
+    (node, millisecond, sequence). Ids from one
+    process always go up, and ids sort by the time they were issued across
+    processes, so they serve as range and partition keys; ``first_id_at`` gives
+    the lower bound for a point in time. Legacy ``#SP1234`` ids stay valid
+    order ids; they just carry no time.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.node = None
+        self._node_lock = None
+        self._last = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def lease_node(self):
+        """Take the first node number no other running process holds."""
+        for node in range(MAX_NODES):
+            lock = lock_for(os.path.join(self.data_dir, f".order-node-{node}"))
+            if lock.try_acquire():
+                self._node_lock = lock
+                self.node = node
+                return node
+        raise RuntimeError(f"All {MAX_NODES} order id nodes are leased by running processes.")
+
+    def next_id(self):
+        with self._lock:
+            if self.node is None:
+                self.lease_node()
+            now = time.time_ns() // 1000000 - EPOCH_MS
+            if now <= self._last:
+                # Same millisecond, or the clock stepped back: keep counting from the last id
+                now = self._last
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # Out of sequence numbers; borrow the next millisecond
+                    now += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last = now
+            return PREFIX + encode((now << (NODE_BITS + SEQUENCE_BITS)) | (self.node << SEQUENCE_BITS) | self._sequence)
+
+
+_generators = {}
+_generators_lock = threading.Lock()
+
+
+def get_order_ids(orders_file):
+    """Return the process-wide id generator for the data directory that ``orders_file``'s branch belongs to."""
+    key = shared_data_dir(orders_file)
+    with _generators_lock:
+        if key not in _generators:
+            _generators[key] = OrderIdGenerator(key)
+        return _generators[key]
@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+from data_storage.file_lock import lock_for
+from data_storage.store import store, read_json, write_json_atomic, file_signature
+
+
+class OrderJournal:
+    """Append-only log of order events, folded into the orders snapshot in the background.
+
+    Every order mutation appends one small JSON line (``created``, ``status_changed``,
+    ``cancelled`` or ``restocked``) to ``orders.journal`` instead of rewriting
+    ``orders.json``. Loading reads the snapshot and replays the journal tail on top
+    of it. Once enough events pile up, a background thread writes a fresh snapshot
+    and starts a new journal, so the cost of one write does not grow with history.
+
+    Appends go through the data store, so inside ``store.transaction()`` they are
+    committed together with the product stock they belong to. Terminals sharing the
+    data directory append to the same journal, so compaction folds the journal into
+    the snapshot on disk rather than into this process's copy of the orders.
+
+    The journal remembers how far it has read, so picking up what other terminals
+    appended reads only the new lines (``read_new_events``) as long as the
+    snapshot wasn't rewritten meanwhile.
+    """
+
+    def __init__(self, orders_file, compact_every=1000):
+        self.orders_file = orders_file
+        base, _ = os.path.splitext(orders_file)
+        self.journal_file = base + ".journal"
+        self.compacting_file = self.journal_file + ".compacting"
+        self.compact_every = compact_every
+        self.pending_events = 0
+        self._lock = threading.RLock()
+        self._wake_compactor = threading.Event()
+        self._compactor = None
+        # (snapshot signature, journal inode, bytes read) of the files this process's orders reflect
+        self._position = None
+
+    def load(self, read_snapshot):
+        """Read the snapshot with ``read_snapshot`` and replay any journal events on top of it."""
+        with self._lock:
+            snapshot = file_signature(self.orders_file)
+            orders = read_snapshot()
+            # A compaction interrupted by a crash leaves its rotated journal behind
+            leftover = self.read_events(self.compacting_file)
+            events, inode, offset = self.read_tail(self.journal_file, None, 0)
+            events = leftover + events
+            self.replay(orders, events)
+            self.pending_events = len(events)
+            self._position = None if leftover else (snapshot, inode, offset)
+            return orders
+
+    def read_new_events(self):
+        """Events appended since the journal was last read, or None when everything must be reloaded.
+
+        That is the case when the snapshot was rewritten (a compaction) or a
+        compaction is under way.
+        """
+        with self._lock:
+            if self._position is None:
+                return None
+            snapshot, inode, offset = self._position
+            if file_signature(self.orders_file) != snapshot or os.path.exists(self.compacting_file):
+                return None
+            tail = self.read_tail(self.journal_file, inode, offset)
+            if tail is None:
+                return None
+            events, inode, offset = tail
+            self._position = (snapshot, inode, offset)
+            self.pending_events += len(events)
+            return events
+
+    def caught_up(self):
+        """Take the files as they are now as read (this process's orders already match them)."""
+        with self._lock:
+            try:
+                stat = os.stat(self.journal_file)
+                inode, offset = stat.st_ino, stat.st_size
+            except FileNotFoundError:
+                inode, offset = None, 0
+            self._position = (file_signature(self.orders_file), inode, offset)
+
+    def read_tail(self, path, inode, offset):
+        """Read the complete event lines of ``path`` from byte ``offset`` on.
+
+        ``inode`` is the file read before (None if there was none). Returns the
+        events, the file's inode (None while it doesn't exist) and the offset after
+        the last complete line, or None when the file read before was replaced,
+        removed or cut shorter.
+        """
+        events = []
+        try:
+            with open(path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if (inode is not None and stat.st_ino != inode) or stat.st_size < offset:
+                    return None
+                file.seek(offset)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break  # Still being written, or torn by a crash
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        break
+                    offset += len(line)
+                return events, stat.st_ino, offset
+        except FileNotFoundError:
+            return None if inode is not None else ([], None, 0)
+
+    def read_events(self, path):
+        """Read journal events from ``path``, skipping a torn last line."""
+        events = []
+        try:
+            with open(path, "r") as file:
+                for line in file:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Only the line being written during a crash can be incomplete
+                        break
+        except FileNotFoundError:
+            pass
+        return events
+
+    def replay(self, orders, events):
+        """Apply journal events to the ``orders`` list in place.
+
+        Replay is idempotent, so events already folded into the snapshot can be
+        applied again safely.
+        """
+        if not events:
+            return
+        positions = {}
+        for position, order in enumerate(orders):
+            positions.setdefault(order["order_id"], position)
+
+        for event in events:
+            kind = event.get("event")
+            position = positions.get(event.get("order_id"))
+            if kind == "created":
+                if position is None:
+                    positions[event["order_id"]] = len(orders)
+                    orders.append(event["order"])
+                else:
+                    orders[position] = event["order"]
+            elif kind == "status_changed" and position is not None:
+                orders[position]["status"] = event["status"]
+            elif kind == "cancelled" and position is not None:
+                orders[position] = None
+                del positions[event["order_id"]]
+            # "restocked" events only record the stock returned to products.json
+
+        orders[:] = [order for order in orders if order is not None]
+
+    def record(self, event, order_id, **fields):
+        """Append one event to the journal as part of the current store commit."""
+        store.append_event(self.journal_file, {"event": event, "order_id": order_id, **fields})
+        if not store.backend.journaled:
+            return  # The backend applies order events to its own tables
+        with self._lock:
+            self.pending_events += 1
+            if self.pending_events >= self.compact_every:
+                self.start_compactor()
+                self._wake_compactor.set()
+
+    def record_created(self, order):
+        self.record("created", order["order_id"], order=order)
+
+    def record_status_changed(self, order_id, status):
+        self.record("status_changed", order_id, status=status)
+
+    def record_cancelled(self, order_id):
+        self.record("cancelled", order_id)
+
+    def record_restocked(self, order_id, items):
+        restocked = [{"product_id": item["product_id"], "quantity": item["quantity"]} for item in items]
+        self.record("restocked", order_id, items=restocked)
+
+    def start_compactor(self):
+        """Start the background compaction thread once."""
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=self._compact_loop, name="order-journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def _compact_loop(self):
+        while True:
+            self._wake_compactor.wait()
+            self._wake_compactor.clear()
+            try:
+                self.compact()
+            except (OSError, ValueError) as error:
+                print(f"Error: Unable to compact the order journal ({error}).")
+
+    def compact(self):
+        """Fold the journal into a fresh ``orders.json`` snapshot.
+
+        The snapshot holds the same orders as before, so when this process's
+        copy was up to date and nobody appended meanwhile, the new files are
+        taken as its own and the next sync doesn't reload every order.
+        """
+        key = os.path.abspath(self.orders_file)
+        # Holding the snapshot's lock keeps other terminals from loading or compacting meanwhile
+        with lock_for(self.orders_file):
+            # The journal's lock keeps commits from appending while it is moved aside
+            with self._lock, lock_for(self.journal_file):
+                current = not store.backend.changed_elsewhere(key)
+                if os.path.exists(self.journal_file):
+                    if os.path.exists(self.compacting_file):
+                        with open(self.journal_file, "r") as source, open(self.compacting_file, "a") as target:
+                            target.write(source.read())
+                        os.remove(self.journal_file)
+                    else:
+                        os.replace(self.journal_file, self.compacting_file)
+                self.pending_events = 0
+
+            # Replaying and writing happen outside the journal lock so checkouts keep appending
+            orders = read_json(self.orders_file, [])
+            self.replay(orders, self.read_events(self.compacting_file))
+            write_json_atomic(self.orders_file, orders)
+            if os.path.exists(self.compacting_file):
+                os.remove(self.compacting_file)
+
+            with lock_for(self.journal_file):
+                if current and not os.path.exists(self.journal_file):
+                    store.backend.remember(key)
+                    self.caught_up()
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(orders_file):
+    """Return the process-wide journal for ``orders_file``."""
+    key = os.path.abspath(orders_file)
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = OrderJournal(orders_file)
+        return _journals[key]
@@ -0,0 +1,181 @@
+import sys
+
+# Marks a field that was absent from the JSON record, so it stays absent when written back
+MISSING = object()
+
+
+# Shared number objects for prices, which repeat on every order line
+_numbers = {}
+
+
+def intern_value(value):
+    """Share strings and prices that repeat across many records (categories, statuses, names)."""
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) in (int, float):
+        # Keyed by type too, so 100 and 100.0 stay distinct
+        return _numbers.setdefault((type(value), value), value)
+    return value
+
+
+class Record:
+    """Compact ``__slots__`` record that still reads and writes like the JSON dict it came from.
+
+    Existing code keeps using ``record["name"]``, ``record.get(...)``,
+    ``"extras" in record`` and ``record.update(...)``. ``from_json`` and
+    ``to_json`` convert losslessly: absent fields stay absent, values keep
+    their JSON types, and unknown keys are carried along in ``_extra``.
+    """
+
+    __slots__ = ("_extra",)
+    FIELDS = ()
+    FIELD_SET = frozenset()
+    INTERNED = frozenset()
+
+    def __init__(self, **values):
+        self._extra = None
+        for field in self.FIELDS:
+            object.__setattr__(self, field, MISSING)
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def from_json(cls, data):
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+
+    def to_json(self):
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not MISSING:
+                if type(value) is tuple:
+                    # Nested records (a product's extras, an order's lines) become dicts too
+                    value = [item.to_json() if isinstance(item, Record) else item for item in value]
+                data[field] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def convert(self, key, value):
+        """Normalise a value on its way into the record."""
+        return intern_value(value) if key in self.INTERNED else value
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELD_SET:
+            object.__setattr__(self, key, self.convert(key, value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()!r})"
+
+
+def record_type(name, fields, interned=(), base=Record):
+    """Build a Record subclass with one slot per field."""
+    namespace = {
+        "__slots__": fields,
+        "FIELDS": fields,
+        "FIELD_SET": frozenset(fields),
+        "INTERNED": frozenset(interned),
+    }
+    return type(name, (base,), namespace)
+
+
+class ExtraBase(Record):
+    __slots__ = ()
+
+    # Extras are shared between the catalog and every order line that picked them
+    _shared = {}
+
+    @classmethod
+    def from_json(cls, data):
+        if isinstance(data, cls):
+            return data
+        if set(data) != {"name", "price"}:
+            return cls(**data)
+        key = (data["name"], data["price"], type(data["price"]))
+        extra = cls._shared.get(key)
+        if extra is None:
+            extra = cls._shared[key] = cls(**data)
+        return extra
+
+
+Extra = record_type("Extra", ("name", "price"), interned=("name", "price"), base=ExtraBase)
+
+
+def convert_extras(extras):
+    """Store extras as a tuple of shared Extra records (an empty tuple costs nothing)."""
+    return tuple(Extra.from_json(extra) for extra in extras) if extras else ()
+
+
+class WithExtras(Record):
+    __slots__ = ()
+
+    def convert(self, key, value):
+        if key == "extras":
+            return convert_extras(value)
+        return Record.convert(self, key, value)
+
+
+Product = record_type(
+    "Product",
+    ("id", "name", "price", "quantity", "category", "extras", "version"),
+    interned=("name", "price", "category"),
+    base=WithExtras,
+)
+
+OrderLine = record_type(
+    "OrderLine",
+    ("product_id", "name", "price", "quantity", "extras"),
+    interned=("name", "price"),
+    base=WithExtras,
+)
+
+
+class OrderBase(Record):
+    __slots__ = ()
+
+    def convert(self, key, value):
+        if key == "cart":
+            return tuple(OrderLine.from_json(item) for item in value)
+        return Record.convert(self, key, value)
+
+
+Order = record_type(
+    "Order",
+    ("order_id", "username", "cart", "base_total", "extras_total", "vat", "tax", "total_price", "payment_method", "status"),
+    interned=("username", "payment_method", "status"),
+    base=OrderBase,
+)
+
+Session = record_type("Session", ("token", "username", "role", "expires"), interned=("username", "role"))
@@ -0,0 +1,144 @@
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+# How long a cart line keeps its stock without the cart being touched
+HOLD_SECONDS = 600
+
+# How often the sweeper looks for expired holds
+SWEEP_SECONDS = 5
+
+
+class Hold:
+    """Stock held for one product in one cart."""
+
+    __slots__ = ("cart_id", "product_id", "quantity", "expires")
+
+    def __init__(self, cart_id, product_id, quantity, expires):
+        self.cart_id = cart_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.expires = expires
+
+
+class StockReservations:
+    """Time-limited stock holds for carts that are still being built.
+
+    Adding a cart line holds its quantity until the cart is checked out or
+    abandoned, or until the hold expires (every change to the cart renews its
+    holds). The total held per product is kept as lines come and go, so
+    ``available`` (stock minus everything held) is a constant time lookup no
+    matter how many carts are open. A background sweeper releases expired
+    holds; checkout turns the cart's holds into the stock decrement itself.
+    """
+
+    def __init__(self, catalog, hold_seconds=HOLD_SECONDS, sweep_seconds=SWEEP_SECONDS):
+        self.catalog = catalog
+        self.hold_seconds = hold_seconds
+        self.sweep_seconds = sweep_seconds
+        self.carts = {}
+        self.held = {}
+        self._expiries = []
+        self._cart_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._sweeper = None
+
+    def available(self, product_id):
+        """Stock of ``product_id`` that no open cart is holding."""
+        return max(self.catalog.quantity(product_id) - self.held.get(product_id, 0), 0)
+
+    def held_by(self, cart_id, product_id):
+        hold = self.carts.get(cart_id, {}).get(product_id)
+        return hold.quantity if hold is not None else 0
+
+    @contextlib.contextmanager
+    def cart(self):
+        """Open a cart for the duration of the block; whatever it still holds is released after."""
+        with self._lock:
+            cart_id = next(self._cart_ids)
+            self.carts[cart_id] = {}
+        try:
+            yield cart_id
+        finally:
+            self.release_cart(cart_id)
+
+    def hold(self, cart_id, product_id, quantity):
+        """Hold ``quantity`` more of ``product_id`` for the cart; False if not enough is available.
+
+        Holding a product the cart already holds adds to that hold, so the
+        combined quantity of repeated lines is what gets checked.
+        """
+        with self._lock:
+            if quantity > self.available(product_id):
+                return False
+            holds = self.carts.setdefault(cart_id, {})
+            if product_id in holds:
+                holds[product_id].quantity += quantity
+            else:
+                holds[product_id] = Hold(cart_id, product_id, quantity, 0)
+            self.held[product_id] = self.held.get(product_id, 0) + quantity
+            self.renew(cart_id)
+            self.start_sweeper()
+            return True
+
+    def renew(self, cart_id):
+        """Push back the expiry of every hold in the cart."""
+        expires = time.monotonic() + self.hold_seconds
+        with self._lock:
+            for hold in self.carts.get(cart_id, {}).values():
+                hold.expires = expires
+                heapq.heappush(self._expiries, (expires, cart_id, hold.product_id))
+
+    def shortages(self, cart_id, quantities):
+        """Products in ``quantities`` ({id: quantity}) that the cart can't get, even counting its holds."""
+        with self._lock:
+            return [
+                product_id for product_id, quantity in quantities.items()
+                if quantity > self.available(product_id) + self.held_by(cart_id, product_id)
+            ]
+
+    def release(self, cart_id, product_id):
+        """Drop the cart's hold on one product."""
+        with self._lock:
+            hold = self.carts.get(cart_id, {}).pop(product_id, None)
+            if hold is None:
+                return
+            remaining = self.held[product_id] - hold.quantity
+            if remaining:
+                self.held[product_id] = remaining
+            else:
+                del self.held[product_id]
+
+    def release_cart(self, cart_id):
+        """Drop every hold of a cart (after checkout, or when it is abandoned)."""
+        with self._lock:
+            for product_id in list(self.carts.get(cart_id, ())):
+                self.release(cart_id, product_id)
+            self.carts.pop(cart_id, None)
+
+    def sweep(self, now=None):
+        """Release holds whose expiry has passed; returns how many were released."""
+        now = time.monotonic() if now is None else now
+        released = 0
+        with self._lock:
+            while self._expiries and self._expiries[0][0] <= now:
+                expires, cart_id, product_id = heapq.heappop(self._expiries)
+                hold = self.carts.get(cart_id, {}).get(product_id)
+                # Renewed holds leave their old entries behind in the heap
+                if hold is not None and hold.expires == expires:
+                    self.release(cart_id, product_id)
+                    released += 1
+        return released
+
+    def start_sweeper(self):
+        """Start the background sweeper thread once."""
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="stock-reservation-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_seconds)
+            self.sweep()
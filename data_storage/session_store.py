@@ -0,0 +1,227 @@
+import collections
+import json
+import os
+import secrets
+import threading
+import time
+from data_storage.store import store, write_file_durably
+from data_storage.records import Session
+
+# How long a login stays valid without being used
+SESSION_SECONDS = 12 * 60 * 60
+
+# How many sessions the lookup cache keeps
+CACHE_SIZE = 1024
+
+# Where each terminal keeps the token of its login, next to the sessions file
+TERMINALS_DIR = "terminals"
+
+
+def terminal_name():
+    """What tells this terminal apart: ``SMARTPANDA_TERMINAL``, else its tty (``pts-3``), else ``default``."""
+    name = os.environ.get("SMARTPANDA_TERMINAL")
+    if not name:
+        try:
+            name = os.ttyname(0).replace("/dev/", "")
+        except (OSError, AttributeError):
+            name = "default"
+    return "".join(char if char.isalnum() or char in "-_" else "-" for char in name)
+
+
+class SessionTable:
+    """Persisted sessions keyed by token; the collection the data store saves and merges."""
+
+    def __init__(self, sessions):
+        self.sessions = {token: Session.from_json(session) for token, session in sessions.items()}
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, token, default=None):
+        return self.sessions.get(token, default)
+
+    def to_json(self):
+        return self.sessions
+
+    def refresh(self, token, session):
+        """Replace a session by its stored data (None when it was ended elsewhere)."""
+        if session is None:
+            self.sessions.pop(token, None)
+        else:
+            self.sessions[token] = Session.from_json(session)
+        for listener in self.listeners:
+            listener(token)
+
+
+class SessionStore:
+    """Logins of every terminal and API client, keyed by opaque tokens.
+
+    Each login gets its own random token, so any number of terminals can stay
+    logged in at once. Sessions are persisted in ``sessions.json`` (or the
+    ``sessions`` table) through the data store, where logins from different
+    terminals merge instead of replacing each other. Lookups are answered from a
+    small LRU cache, so checking who is behind a token or which role they have
+    never touches ``users.json``; a session expires ``ttl`` seconds after it was
+    last used.
+
+    ``current_token`` is the login of this terminal, for the interactive app.
+    It is kept in a token file of its own under ``terminals/`` (see
+    ``terminal_name``), so restarting the app keeps the user logged in and a
+    crash leaves no session behind that nothing refers to. A token that has
+    expired or was ended elsewhere is dropped when the file is read.
+    """
+
+    def __init__(self, sessions_file, ttl=SESSION_SECONDS, cache_size=CACHE_SIZE):
+        self.sessions_file = sessions_file
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.token_file = os.path.join(os.path.dirname(sessions_file), TERMINALS_DIR, terminal_name() + ".token")
+        self._current_token = None
+        self._token_read = False  # Read on first use; API servers never read it
+        self.table = store.load(sessions_file, self.read_sessions_file, kind="sessions", factory=SessionTable)
+        self._cache = collections.OrderedDict()
+        self._lock = threading.RLock()
+        # Sessions changed by other terminals drop out of the cache
+        self.table.listeners.append(lambda token: self._cache.pop(token, None))
+
+    def read_sessions_file(self):
+        try:
+            with open(self.sessions_file, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print("Warning: sessions file is corrupted. Everyone will need to log in again.")
+            return {}
+
+    @property
+    def current_token(self):
+        if not self._token_read:
+            self._token_read = True
+            try:
+                with open(self.token_file, "r") as file:
+                    token = file.read().strip() or None
+            except FileNotFoundError:
+                token = None
+            if token is not None and self.get(token) is None:
+                self._forget_token_file()  # Expired or logged out elsewhere
+                token = None
+            self._current_token = token
+        return self._current_token
+
+    @current_token.setter
+    def current_token(self, token):
+        self._token_read = True
+        self._current_token = token
+        if token is None:
+            self._forget_token_file()
+            return
+        os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
+        temp_file = self.token_file + ".tmp"
+        write_file_durably(temp_file, token)
+        os.replace(temp_file, self.token_file)
+
+    def _forget_token_file(self):
+        try:
+            os.remove(self.token_file)
+        except FileNotFoundError:
+            pass
+
+    def start(self, username, role):
+        """Log ``username`` in and return the new session's token."""
+        token = secrets.token_urlsafe(24)
+        session = Session(token=token, username=username, role=role, expires=time.time() + self.ttl)
+        with self._lock:
+            self.table.sessions[token] = session
+            self._remember(token, session)
+        store.save(self.sessions_file, changed=[token])
+        self.purge()
+        return token
+
+    def end(self, token):
+        """Log the session with ``token`` out."""
+        if token is None:
+            return
+        with self._lock:
+            self._cache.pop(token, None)
+            ended = self.table.sessions.pop(token, None) is not None
+        if ended:
+            store.save(self.sessions_file, deleted=[token])
+
+    def get(self, token):
+        """Return the live Session for ``token``, or None if it is unknown or expired."""
+        if token is None:
+            return None
+        now = time.time()
+        with self._lock:
+            session = self._cache.get(token)
+            if session is None:
+                session = self.table.get(token)
+                if session is None:
+                    return None
+                self._remember(token, session)
+            else:
+                self._cache.move_to_end(token)
+            if session["expires"] <= now:
+                self.end(token)
+                return None
+            if session["expires"] - now < self.ttl / 2:
+                # Sliding expiry, written at most twice per lifetime rather than on every lookup
+                session["expires"] = now + self.ttl
+                store.save(self.sessions_file, changed=[token])
+            return session
+
+    def username(self, token):
+        session = self.get(token)
+        return session["username"] if session is not None else None
+
+    def role(self, token):
+        session = self.get(token)
+        return session["role"] if session is not None else None
+
+    def set_role(self, username, role):
+        """Give every live session of ``username`` a new role."""
+        with self._lock:
+            tokens = [token for token, session in self.table.sessions.items() if session["username"] == username]
+            for token in tokens:
+                self.table.sessions[token]["role"] = role
+        if tokens:
+            store.save(self.sessions_file, changed=tokens)
+
+    def end_user(self, username):
+        """Log ``username`` out everywhere (e.g. after the account was deleted)."""
+        with self._lock:
+            tokens = [token for token, session in self.table.sessions.items() if session["username"] == username]
+        for token in tokens:
+            self.end(token)
+
+    def purge(self):
+        """Drop expired sessions from storage."""
+        now = time.time()
+        with self._lock:
+            expired = [token for token, session in self.table.sessions.items() if session["expires"] <= now]
+            for token in expired:
+                self._cache.pop(token, None)
+                del self.table.sessions[token]
+        if expired:
+            store.save(self.sessions_file, deleted=expired)
+
+    def _remember(self, token, session):
+        self._cache[token] = session
+        self._cache.move_to_end(token)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+_session_stores = {}
+_session_stores_lock = threading.Lock()
+
+
+def get_session_store(sessions_file="data/sessions.json"):
+    """Return the process-wide session store for ``sessions_file``."""
+    key = os.path.abspath(sessions_file)
+    with _session_stores_lock:
+        if key not in _session_stores:
+            _session_stores[key] = SessionStore(sessions_file)
+        return _session_stores[key]
@@ -0,0 +1,272 @@
+"""Product stock and prices in one shared memory segment per host.
+
+One owner process publishes the catalog::
+
+    python -m data_storage.shared_catalog --products data/products.json
+
+Every terminal on the host that loads the same products file then maps the
+segment (see ``load_catalog``), builds its catalog from it instead of parsing
+the file, and reads stock and prices from it in place.
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from data_storage.file_lock import lock_for
+from data_storage.store import encode_collection, file_signature, read_json
+
+MAGIC = b"SPCAT2\0\0"
+HEADER = struct.Struct("<8sqqqqq")  # magic, capacity, count, text used, text capacity, incomplete
+HEADER_SIZE = 64
+COLUMNS = ("ids", "quantity", "version", "price", "text_offset", "text_length", "deleted")
+TEXT_BYTES_PER_SLOT = 512
+
+# How often the owner checks the products file for writers without the segment
+SYNC_SECONDS = 0.5
+
+# Segments this process created (and will unlink)
+_created = set()
+
+
+def segment_name(products_file):
+    """Name of the shared catalog segment for ``products_file`` (one per data directory)."""
+    digest = hashlib.sha1(os.path.abspath(products_file).encode()).hexdigest()[:12]
+    return f"smartpanda-{digest}"
+
+
+# Fields that only live in the columns
+COLUMN_FIELDS = ("id", "quantity", "version")
+
+
+def product_text(product):
+    """The string-table entry of a product: its JSON without id, quantity and version.
+
+    The price is kept here as well as in its column, so a product read back from
+    the segment has the price type (and any extra fields) of the products file.
+    """
+    data = product.to_json() if hasattr(product, "to_json") else dict(product)
+    for field in COLUMN_FIELDS:
+        data.pop(field, None)
+    return json.dumps(data, separators=(",", ":"), default=encode_collection).encode()
+
+
+class SharedCatalog:
+    """Fixed-width stock and price columns plus a string table in ``multiprocessing.shared_memory``.
+
+    Each product has a slot: its id, quantity, version and price sit in 8-byte
+    columns that every attached process reads through ``memoryview`` casts, with
+    no copying or parsing, and the rest of the product (name, category, extras)
+    is a JSON entry in an append-only string table. The owner creates the segment; any attached
+    terminal that commits a product change writes the committed values into its
+    slot, so all terminals see stock moves as soon as they are durable. Writes
+    take a cross-process lock and only ever replace a slot with a higher product
+    version, so a late writer can't roll the stock back.
+    """
+
+    def __init__(self, memory, products_file, owner=False):
+        self.memory = memory
+        self.products_file = products_file
+        self.owner = owner
+        self.lock = lock_for(os.path.join(os.path.dirname(os.path.abspath(products_file)), ".shared-catalog"))
+        magic, self.capacity, _, _, self.text_capacity, _ = HEADER.unpack_from(memory.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory segment {memory.name} is not a catalog.")
+        self.columns = {}
+        offset = HEADER_SIZE
+        for column in COLUMNS:
+            view = memory.buf[offset:offset + self.capacity * 8]
+            self.columns[column] = view.cast("d" if column == "price" else "q")
+            offset += self.capacity * 8
+        self.text = memory.buf[offset:offset + self.text_capacity]
+        self.slots = {}
+        self._scan()
+
+    @classmethod
+    def create(cls, products_file, products, capacity=None):
+        """Create the segment for ``products_file`` and publish ``products`` (JSON dicts) into it."""
+        capacity = capacity or max(1024, 2 * len(products))
+        text_capacity = capacity * TEXT_BYTES_PER_SLOT
+        name = segment_name(products_file)
+        try:
+            # A segment left behind by an owner that was killed
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        memory = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + len(COLUMNS) * capacity * 8 + text_capacity)
+        HEADER.pack_into(memory.buf, 0, MAGIC, capacity, 0, 0, text_capacity, 0)
+        _created.add(name)
+        catalog = cls(memory, products_file, owner=True)
+        for product in products:
+            catalog.publish(product)
+        return catalog
+
+    @classmethod
+    def attach(cls, products_file):
+        """Map the segment for ``products_file``, or return None if no owner published one."""
+        try:
+            memory = shared_memory.SharedMemory(name=segment_name(products_file))
+        except FileNotFoundError:
+            return None
+        if memory.name not in _created:
+            # Only the owner may unlink the segment; before Python 3.13 attaching registers it for cleanup too
+            resource_tracker.unregister(memory._name, "shared_memory")
+        try:
+            catalog = cls(memory, products_file)
+        except ValueError:
+            memory.close()
+            return None
+        # The column views must be released before the mapping can be closed
+        atexit.register(catalog.close)
+        return catalog
+
+    def _count(self):
+        return HEADER.unpack_from(self.memory.buf, 0)[2]
+
+    def _scan(self):
+        """Pick up slots other processes added since the last look."""
+        ids = self.columns["ids"]
+        for slot in range(len(self.slots), self._count()):
+            self.slots[ids[slot]] = slot
+
+    def slot(self, product_id):
+        slot = self.slots.get(product_id)
+        if slot is None:
+            self._scan()
+            slot = self.slots.get(product_id)
+        if slot is None or self.columns["deleted"][slot]:
+            return None
+        return slot
+
+    def __contains__(self, product_id):
+        return self.slot(product_id) is not None
+
+    def quantity(self, product_id, default=None):
+        slot = self.slot(product_id)
+        return default if slot is None else self.columns["quantity"][slot]
+
+    def price(self, product_id, default=None):
+        slot = self.slot(product_id)
+        return default if slot is None else self.columns["price"][slot]
+
+    def get(self, product_id):
+        """The product as a JSON dict, or None."""
+        with self.lock:  # The text entry and the numbers of one slot are read together
+            slot = self.slot(product_id)
+            if slot is None:
+                return None
+            offset, length = self.columns["text_offset"][slot], self.columns["text_length"][slot]
+            product = {"id": product_id, **json.loads(bytes(self.text[offset:offset + length]))}
+            price = self.columns["price"][slot]
+            if product.get("price") != price:
+                product["price"] = price
+            product["quantity"] = self.columns["quantity"][slot]
+            product["version"] = self.columns["version"][slot]
+        return product
+
+    def full(self):
+        """True when a product didn't fit (no free slot or string table space), so the segment lacks something."""
+        return bool(HEADER.unpack_from(self.memory.buf, 0)[5])
+
+    def __iter__(self):
+        self._scan()
+        for product_id in list(self.slots):
+            product = self.get(product_id)
+            if product is not None:
+                yield product
+
+    def publish(self, product):
+        """Write a product's committed values into its slot unless the slot already holds a newer version."""
+        product_id = product["id"]
+        version = product.get("version", 0)
+        text = product_text(product)
+        with self.lock:
+            _, capacity, count, text_used, text_capacity, incomplete = HEADER.unpack_from(self.memory.buf, 0)
+            self._scan()
+            slot = self.slots.get(product_id)
+            if slot is None:
+                if count == capacity:
+                    # Full; terminals fall back to their own copy of this product
+                    HEADER.pack_into(self.memory.buf, 0, MAGIC, capacity, count, text_used, text_capacity, 1)
+                    return False
+                slot = count
+                self.columns["ids"][slot] = product_id
+                self.columns["version"][slot] = -1
+                count += 1
+            elif self.columns["version"][slot] > version and not self.columns["deleted"][slot]:
+                return False
+            offset, length = self.columns["text_offset"][slot], self.columns["text_length"][slot]
+            if bytes(self.text[offset:offset + length]) != text:
+                if text_used + len(text) <= text_capacity:
+                    self.text[text_used:text_used + len(text)] = text
+                    self.columns["text_offset"][slot] = text_used
+                    self.columns["text_length"][slot] = len(text)
+                    text_used += len(text)
+                else:
+                    incomplete = 1  # The slot keeps its old name; new terminals must read the file
+            self.columns["price"][slot] = product.get("price", 0)
+            self.columns["quantity"][slot] = product.get("quantity", 0)
+            self.columns["version"][slot] = version
+            self.columns["deleted"][slot] = 0
+            HEADER.pack_into(self.memory.buf, 0, MAGIC, capacity, count, text_used, text_capacity, incomplete)
+            self.slots[product_id] = slot
+        return True
+
+    def remove(self, product_id):
+        with self.lock:
+            slot = self.slot(product_id)
+            if slot is not None:
+                self.columns["deleted"][slot] = 1
+
+    def sync(self, products):
+        """Publish every product of the stored catalog and retire slots of products that are gone."""
+        present = set()
+        for product in products:
+            present.add(product["id"])
+            self.publish(product)
+        for product_id in list(self.slots):
+            if product_id not in present:
+                self.remove(product_id)
+
+    def close(self):
+        for view in self.columns.values():
+            view.release()
+        self.text.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+            _created.discard(self.memory.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the product catalog in shared memory for every terminal on this host.")
+    parser.add_argument("--products", default="data/products.json")
+    args = parser.parse_args()
+
+    catalog = SharedCatalog.create(args.products, read_json(args.products, []))
+    print(f"Publishing {args.products} as shared memory segment {catalog.memory.name}. Press Ctrl+C to stop.", flush=True)
+    signature = file_signature(args.products)
+    try:
+        while True:
+            time.sleep(SYNC_SECONDS)
+            # Terminals started without the segment only write the file; pick their changes up from it
+            current = file_signature(args.products)
+            if current != signature:
+                signature = current
+                with lock_for(args.products):
+                    products = read_json(args.products, [])
+                catalog.sync(products)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,502 @@
+import json
+import os
+import sqlite3
+import threading
+from data_storage.store import ConflictError, encode_collection
+
+# Database file created next to the JSON files it replaces
+DATABASE_NAME = "smartpanda.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    price NOT NULL,
+    quantity NOT NULL,
+    category TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+
+CREATE TABLE IF NOT EXISTS extras (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    price NOT NULL,
+    PRIMARY KEY (product_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id TEXT NOT NULL,
+    username TEXT,
+    base_total,
+    extras_total,
+    vat,
+    tax,
+    total_price,
+    payment_method TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_order_id ON orders(order_id);
+CREATE INDEX IF NOT EXISTS idx_orders_username ON orders(username);
+
+CREATE TABLE IF NOT EXISTS order_lines (
+    order_seq INTEGER NOT NULL REFERENCES orders(seq) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    product_id INTEGER,
+    name TEXT,
+    price,
+    quantity,
+    extras TEXT NOT NULL,
+    PRIMARY KEY (order_seq, position)
+);
+CREATE INDEX IF NOT EXISTS idx_order_lines_product ON order_lines(product_id);
+
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    full_name TEXT,
+    email TEXT,
+    phone TEXT,
+    address TEXT,
+    password TEXT,
+    role TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    role TEXT,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions(username);
+
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS collection_versions (
+    kind TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+ORDER_COLUMNS = ("order_id", "username", "base_total", "extras_total", "vat", "tax", "total_price", "payment_method", "status")
+USER_COLUMNS = ("username", "full_name", "email", "phone", "address", "password", "role")
+SESSION_COLUMNS = ("token", "username", "role", "expires")
+
+# Collections stored as a single JSON document
+DOCUMENT_KINDS = ("meta",)
+
+# Collections the database holds; anything else stays in its JSON file
+STORED_KINDS = ("products", "orders", "users", "sessions") + DOCUMENT_KINDS
+
+
+class SqliteBackend:
+    """Storage backend keeping every collection in indexed SQLite tables.
+
+    The database lives next to the JSON files (``data/smartpanda.db``). Loading
+    still produces the same lists and dicts as the JSON backend, but commits only
+    touch the records named as changed, inside one database transaction, and
+    order events are applied to the tables directly instead of going to a journal.
+    Numeric columns carry no type affinity so prices and totals round-trip exactly.
+
+    Each commit is a ``BEGIN IMMEDIATE`` transaction, so terminals sharing the
+    database only wait for each other while one is writing. Stock deltas become
+    conditional ``UPDATE``s that refuse to go below zero, product edits check the
+    row version, and the rows touched are handed back so the live catalog picks
+    up other terminals' changes.
+
+    Every commit also bumps a version row per collection kind it wrote
+    (``collection_versions``). ``changed_elsewhere`` first asks SQLite's
+    ``PRAGMA data_version``, which only moves when another connection commits,
+    and then compares the kind's row with the version this process last
+    loaded or wrote itself, so ``store.sync()`` reloads what other terminals
+    changed and nothing else.
+    """
+
+    name = "sqlite"
+    journaled = False
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = threading.RLock()
+        self._loaded = {}  # key -> [database, kind, collection version, data_version when last checked]
+
+    def connection(self, path):
+        """Return the connection to the database that holds the collection at ``path``."""
+        database = self.database(path)
+        with self._lock:
+            if database not in self._connections:
+                # Transactions are started explicitly; other terminals' writes are waited for
+                connection = sqlite3.connect(database, check_same_thread=False, isolation_level=None, timeout=10)
+                connection.row_factory = sqlite3.Row
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=FULL")
+                connection.execute("PRAGMA foreign_keys=ON")
+                connection.executescript(SCHEMA)
+                columns = {row["name"] for row in connection.execute("PRAGMA table_info(products)")}
+                if "version" not in columns:
+                    # Databases migrated before products were versioned
+                    connection.execute("ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                self._connections[database] = connection
+            return self._connections[database]
+
+    # Loading
+
+    def database(self, path):
+        return os.path.join(os.path.dirname(os.path.abspath(path)), DATABASE_NAME)
+
+    def collection_version(self, connection, kind):
+        row = connection.execute("SELECT version FROM collection_versions WHERE kind = ?", (kind,)).fetchone()
+        return row["version"] if row else 0
+
+    def data_version(self, connection):
+        return connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self, path, kind, loader):
+        if kind not in STORED_KINDS:
+            # Anything the database doesn't model stays in its JSON file
+            return loader()
+        connection = self.connection(path)
+        with self._lock:
+            # One read transaction, so the collection version matches the rows read
+            connection.execute("BEGIN")
+            try:
+                self._loaded[os.path.abspath(path)] = [
+                    self.database(path), kind, self.collection_version(connection, kind), self.data_version(connection),
+                ]
+                if kind == "products":
+                    return self.load_products(connection)
+                if kind == "orders":
+                    return self.load_orders(connection)
+                if kind == "users":
+                    return self.load_users(connection)
+                if kind == "sessions":
+                    return {row["token"]: dict(row) for row in connection.execute("SELECT * FROM sessions")}
+                row = connection.execute("SELECT body FROM documents WHERE name = ?", (os.path.basename(path),)).fetchone()
+                return json.loads(row["body"]) if row else {}
+            finally:
+                connection.execute("COMMIT")
+
+    def load_products(self, connection, product_ids=None):
+        """Read products (all of them, or those in ``product_ids``) as JSON dicts."""
+        product_filter = extras_filter = ""
+        parameters = ()
+        if product_ids is not None:
+            parameters = tuple(product_ids)
+            placeholders = ", ".join("?" * len(parameters))
+            product_filter = f" WHERE id IN ({placeholders})"
+            extras_filter = f" WHERE product_id IN ({placeholders})"
+        extras = {}
+        for row in connection.execute(f"SELECT product_id, name, price FROM extras{extras_filter} ORDER BY product_id, position", parameters):
+            extras.setdefault(row["product_id"], []).append({"name": row["name"], "price": row["price"]})
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "price": row["price"],
+                "quantity": row["quantity"],
+                "category": row["category"],
+                "extras": extras.get(row["id"], []),
+                "version": row["version"],
+            }
+            for row in connection.execute(f"SELECT * FROM products{product_filter} ORDER BY id", parameters)
+        ]
+
+    def current_products(self, connection, product_ids):
+        """Stored state of ``product_ids``: id -> product dict, or None when deleted."""
+        current = dict.fromkeys(product_ids)
+        current.update((product["id"], product) for product in self.load_products(connection, product_ids))
+        return current
+
+    def load_orders(self, connection):
+        carts = {}
+        for row in connection.execute("SELECT * FROM order_lines ORDER BY order_seq, position"):
+            carts.setdefault(row["order_seq"], []).append({
+                "product_id": row["product_id"],
+                "name": row["name"],
+                "price": row["price"],
+                "quantity": row["quantity"],
+                "extras": json.loads(row["extras"]),
+            })
+        orders = []
+        for row in connection.execute("SELECT * FROM orders ORDER BY seq"):
+            order = {"order_id": row["order_id"], "username": row["username"], "cart": carts.get(row["seq"], [])}
+            order.update((column, row[column]) for column in ORDER_COLUMNS[2:])
+            orders.append(order)
+        return orders
+
+    def load_users(self, connection):
+        return {row["username"]: dict(row) for row in connection.execute("SELECT * FROM users ORDER BY rowid")}
+
+    # Writing
+
+    def commit(self, changes, events, collections):
+        by_database = {}
+        for key, change in changes.items():
+            by_database.setdefault(self.database(change.path), ([], []))[0].append((key, change))
+        for path, event in events:
+            by_database.setdefault(self.database(path), ([], []))[1].append(event)
+
+        refreshed = {}
+        with self._lock:
+            for database, (database_changes, database_events) in by_database.items():
+                connection = self.connection(database)
+                connection.execute("BEGIN IMMEDIATE")  # One write transaction per database
+                try:
+                    for key, change in database_changes:
+                        if self.write_change(connection, change, collections[key]):
+                            raise ConflictError(change.path, {})
+                    for event in database_events:
+                        self.apply_order_event(connection, event)
+                    kinds = {change.kind for _, change in database_changes} | ({"orders"} if database_events else set())
+                    previous = self.bump_versions(connection, kinds)
+                except BaseException as error:
+                    connection.execute("ROLLBACK")
+                    if isinstance(error, ConflictError):
+                        change = next(change for _, change in database_changes if change.path == error.path)
+                        error.current = self.current_products(connection, change.affected())
+                    raise
+                connection.execute("COMMIT")
+                self.written(database, previous)
+                for key, change in database_changes:
+                    if change.kind == "products" and not change.full:
+                        refreshed[key] = self.current_products(connection, change.affected())
+        return refreshed
+
+    def bump_versions(self, connection, kinds):
+        """Count a commit to ``kinds`` in their version rows; returns the versions before it."""
+        previous = {}
+        for kind in kinds & set(STORED_KINDS):
+            previous[kind] = self.collection_version(connection, kind)
+            connection.execute("INSERT OR REPLACE INTO collection_versions (kind, version) VALUES (?, ?)", (kind, previous[kind] + 1))
+        return previous
+
+    def written(self, database, previous):
+        """After committing, keep collections current if no other process wrote them before this commit."""
+        for loaded in self._loaded.values():
+            if loaded[0] == database and loaded[1] in previous and loaded[2] == previous[loaded[1]]:
+                loaded[2] += 1
+
+    def write_change(self, connection, change, data):
+        if change.kind == "products":
+            records = data.by_id  # Catalog id index
+            write = self.write_product
+            delete = "DELETE FROM products WHERE id = ?"
+            table_keys = "SELECT id FROM products"
+        elif change.kind == "users":
+            records = data.users  # User directory dict
+            write = self.write_user
+            delete = "DELETE FROM users WHERE username = ?"
+            table_keys = "SELECT username FROM users"
+        elif change.kind == "sessions":
+            records = data.sessions  # Session table dict
+            write = self.write_session
+            delete = "DELETE FROM sessions WHERE token = ?"
+            table_keys = "SELECT token FROM sessions"
+        elif change.kind == "orders":
+            records = {order["order_id"]: order for order in data}
+            write = self.write_order
+            delete = "DELETE FROM orders WHERE order_id = ?"
+            table_keys = "SELECT order_id FROM orders"
+        elif change.kind in DOCUMENT_KINDS:
+            connection.execute(
+                "INSERT OR REPLACE INTO documents (name, body) VALUES (?, ?)",
+                (os.path.basename(change.path), json.dumps(data)),
+            )
+            return set()
+        else:
+            return set()
+
+        if change.full:
+            # Full sync: drop rows that are gone, rewrite the rest
+            stale = [row[0] for row in connection.execute(table_keys) if row[0] not in records]
+            connection.executemany(delete, [(key,) for key in stale])
+            changed = records.keys()
+        else:
+            conflicts = self.check_versions(connection, change) if change.kind == "products" else set()
+            if conflicts:
+                return conflicts
+            connection.executemany(delete, [(key,) for key in change.deleted])
+            changed = change.changed
+        for record_key in changed:
+            if record_key in records:
+                write(connection, records[record_key])
+        if change.kind == "products" and not change.full:
+            return self.apply_stock_deltas(connection, change)
+        return set()
+
+    def check_versions(self, connection, change):
+        """Edited products whose stored version is no longer the one the edit started from."""
+        conflicts = set()
+        for product_id, expected in change.versions.items():
+            row = connection.execute("SELECT version FROM products WHERE id = ?", (product_id,)).fetchone()
+            if row is not None and row["version"] != expected:
+                conflicts.add(product_id)
+        return conflicts
+
+    def apply_stock_deltas(self, connection, change):
+        """Add stock deltas to the stored quantities; returns products that would go below zero."""
+        conflicts = set()
+        for product_id, fields in change.deltas.items():
+            if product_id in change.changed or product_id in change.deleted:
+                continue  # The edit already wrote the in-memory values
+            delta = fields.get("quantity", 0)
+            cursor = connection.execute(
+                "UPDATE products SET quantity = quantity + ?, version = version + 1 WHERE id = ? AND quantity + ? >= 0",
+                (delta, product_id, delta),
+            )
+            if cursor.rowcount == 0 and delta < 0:
+                conflicts.add(product_id)  # Sold out meanwhile, or the product is gone
+        return conflicts
+
+    def write_product(self, connection, product):
+        connection.execute(
+            "INSERT OR REPLACE INTO products (id, name, price, quantity, category, version) VALUES (?, ?, ?, ?, ?, ?)",
+            (product["id"], product["name"], product["price"], product["quantity"], product["category"], product.get("version", 0)),
+        )
+        connection.execute("DELETE FROM extras WHERE product_id = ?", (product["id"],))
+        connection.executemany(
+            "INSERT INTO extras (product_id, position, name, price) VALUES (?, ?, ?, ?)",
+            [(product["id"], position, extra["name"], extra["price"]) for position, extra in enumerate(product.get("extras", []))],
+        )
+
+    def write_user(self, connection, user):
+        connection.execute(
+            f"INSERT OR REPLACE INTO users ({', '.join(USER_COLUMNS)}) VALUES ({', '.join('?' * len(USER_COLUMNS))})",
+            tuple(user.get(column) for column in USER_COLUMNS),
+        )
+
+    def write_session(self, connection, session):
+        connection.execute(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(SESSION_COLUMNS)}) VALUES ({', '.join('?' * len(SESSION_COLUMNS))})",
+            tuple(session.get(column) for column in SESSION_COLUMNS),
+        )
+
+    def write_order(self, connection, order):
+        connection.execute("DELETE FROM orders WHERE order_id = ?", (order["order_id"],))
+        cursor = connection.execute(
+            f"INSERT INTO orders ({', '.join(ORDER_COLUMNS)}) VALUES ({', '.join('?' * len(ORDER_COLUMNS))})",
+            tuple(order.get(column) for column in ORDER_COLUMNS),
+        )
+        connection.executemany(
+            "INSERT INTO order_lines (order_seq, position, product_id, name, price, quantity, extras) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (cursor.lastrowid, position, item["product_id"], item["name"], item["price"], item["quantity"], json.dumps(item.get("extras", []), default=encode_collection))
+                for position, item in enumerate(order["cart"])
+            ],
+        )
+
+    def apply_order_event(self, connection, event):
+        """Apply one order journal event directly to the order tables."""
+        kind = event["event"]
+        if kind == "created":
+            self.write_order(connection, event["order"])
+        elif kind == "status_changed":
+            connection.execute("UPDATE orders SET status = ? WHERE order_id = ?", (event["status"], event["order_id"]))
+        elif kind == "cancelled":
+            connection.execute("DELETE FROM orders WHERE order_id = ?", (event["order_id"],))
+        # "restocked" is covered by the product rows saved in the same transaction
+
+    def allocate(self, path, field, floor):
+        """Hand out the next value of the counter ``field`` in a stored document."""
+        connection = self.connection(path)
+        name = os.path.basename(path)
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT body FROM documents WHERE name = ?", (name,)).fetchone()
+                document = json.loads(row["body"]) if row else {}
+                value = max(document.get(field, 1), floor)
+                document[field] = value + 1
+                connection.execute("INSERT OR REPLACE INTO documents (name, body) VALUES (?, ?)", (name, json.dumps(document)))
+                # The loaded document doesn't hold the new value, so this process reloads it too
+                self.bump_versions(connection, {"meta"})
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        return value
+
+    def watch(self, key, paths):
+        pass  # Order events are rows, not a journal file
+
+    def remember(self, key):
+        pass
+
+    def changed_elsewhere(self, key):
+        loaded = self._loaded.get(key)
+        if loaded is None:
+            return False  # Kept in its JSON file
+        connection = self.connection(key)
+        with self._lock:
+            data_version = self.data_version(connection)
+            if data_version == loaded[3]:
+                return False  # No other connection committed anything since the last look
+            if self.collection_version(connection, loaded[1]) != loaded[2]:
+                return True  # Reloading records the new versions
+            loaded[3] = data_version
+            return False
+
+    def forget(self, key=None):
+        with self._lock:
+            if key is None:
+                self._loaded.clear()
+            else:
+                self._loaded.pop(key, None)
+
+
+def migrate_from_json(data_dir="data"):
+    """Copy products, orders, users and sessions from the JSON files into SQLite, once."""
+    from data_storage.catalog import Catalog
+    from data_storage.order_journal import OrderJournal
+    from data_storage.user_directory import UserDirectory
+    from data_storage.session_store import SessionTable
+    from data_storage.store import Change, recover_commit
+
+    def read(name, default):
+        try:
+            with open(os.path.join(data_dir, name), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return default
+
+    recover_commit(data_dir)
+    orders_file = os.path.join(data_dir, "orders.json")
+    products = read("products.json", [])
+    collections = {
+        "products": (products, "products.json"),
+        "meta": (read("products.meta.json", {}), "products.meta.json"),
+        "orders": (OrderJournal(orders_file).load(lambda: read("orders.json", [])), "orders.json"),
+        "users": (read("users.json", {}), "users.json"),
+        "sessions": (read("sessions.json", {}), "sessions.json"),
+    }
+
+    backend = SqliteBackend()
+    connection = backend.connection(orders_file)
+    if connection.execute("SELECT EXISTS (SELECT 1 FROM products UNION ALL SELECT 1 FROM users)").fetchone()[0]:
+        raise RuntimeError(f"{os.path.join(data_dir, DATABASE_NAME)} already has data; migration only runs once.")
+
+    changes = {}
+    for kind, (_, file_name) in collections.items():
+        change = Change(os.path.join(data_dir, file_name), kind)
+        change.full = True
+        changes[kind] = change
+    data = {kind: records for kind, (records, _) in collections.items()}
+    data["products"] = Catalog(products, data["meta"], os.path.join(data_dir, "products.meta.json"))
+    data["users"] = UserDirectory(data["users"])
+    data["sessions"] = SessionTable(data["sessions"])
+    backend.commit(changes, [], data)
+    return {kind: len(records) for kind, records in data.items() if kind != "meta"}
+
+
+if __name__ == "__main__":
+    import sys
+
+    counts = migrate_from_json(sys.argv[1] if len(sys.argv) > 1 else "data")
+    print("Migrated " + ", ".join(f"{count} {kind}" for kind, count in counts.items()) + " to SQLite.")
+    print("Set SMARTPANDA_STORAGE=sqlite to run the app on the new database.")
@@ -0,0 +1,729 @@
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from data_storage.file_lock import lock_for, locked_files
+
+# Prefix of the commit manifests written next to the data files during a multi-file commit
+MANIFEST_PREFIX = ".commit"
+
+# How long the writer waits for more commits to join the one it is about to write
+COMMIT_WINDOW = 0.002
+
+# Collections made of keyed records, which can be merged with another process's copy
+RECORD_KEYS = {"products": "id", "users": "username", "sessions": "token"}
+
+
+class ConflictError(Exception):
+    """Another process changed records this commit depends on; nothing was written.
+
+    ``current`` maps the record keys that differ from the live collection to their
+    stored data (None when gone). The store has already refreshed the live
+    collection with it, so the caller can check again and retry.
+    """
+
+    def __init__(self, path, current):
+        super().__init__(f"Records {sorted(current, key=str)} in {path} were changed by another process.")
+        self.path = path
+        self.current = current
+
+
+# What a commit can fail with: a conflict with another process, or the disk or database refusing the write
+STORAGE_ERRORS = (ConflictError, OSError, sqlite3.Error)
+
+
+def fsync_directory(directory):
+    """Flush a directory entry so a rename inside it survives a crash."""
+    if os.name == "nt":
+        return  # Directories can't be opened for fsync on Windows
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_file_durably(path, content):
+    """Write ``content`` to ``path`` and fsync it."""
+    with open(path, "w") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def encode_collection(value):
+    """JSON fallback for collections and records (catalog, Product, Order...) that expose ``to_json``."""
+    if hasattr(value, "to_json"):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(data):
+    """Serialise a collection the way the data files are laid out."""
+    return json.dumps(data, indent=4, default=encode_collection)
+
+
+def write_json_atomic(path, data):
+    """Replace ``path`` with ``data`` as JSON via a fsynced temp file and a rename."""
+    temp_file = path + ".tmp"
+    write_file_durably(temp_file, dump_json(data))
+    os.replace(temp_file, path)
+    fsync_directory(os.path.dirname(path))
+
+
+def append_durably(path, content, offset=None):
+    """Append ``content`` to ``path`` and fsync it, optionally truncating to ``offset`` first."""
+    with open(path, "a") as file:
+        if offset is not None:
+            file.truncate(offset)
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def file_signature(path):
+    """Identify the current contents of a file by inode, size and modification time."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def read_json(path, default):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+
+def apply_manifest(directory, manifest_file, manifest):
+    for temp_file, target in manifest["renames"]:
+        temp_file = os.path.join(directory, temp_file)
+        if os.path.exists(temp_file):
+            os.replace(temp_file, os.path.join(directory, target))
+    for target, offset, content in manifest["appends"]:
+        append_durably(os.path.join(directory, target), content, offset)
+    fsync_directory(directory)
+    os.remove(manifest_file)
+
+
+def recover_commit(directory):
+    """Finish multi-file commits that were interrupted after their manifest became durable."""
+    for manifest_file in glob.glob(os.path.join(directory, MANIFEST_PREFIX + "*.json")):
+        try:
+            with open(manifest_file, "r") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            continue  # Another process finished it
+        except json.JSONDecodeError:
+            # The manifest itself was torn, so the commit never happened
+            os.remove(manifest_file)
+            continue
+        targets = [target for _, target in manifest["renames"]] + [target for target, _, _ in manifest["appends"]]
+        # A process still committing holds these locks, so only orphaned manifests are applied here
+        with locked_files([os.path.join(directory, target) for target in targets]):
+            if os.path.exists(manifest_file):
+                apply_manifest(directory, manifest_file, manifest)
+
+
+class Change:
+    """Pending change to one collection: which records were touched, or all of them.
+
+    ``changed`` records are written as they are in memory, provided their stored
+    version still matches ``versions``; ``deltas`` ({key: {field: amount}}) are
+    added to whatever value is stored when the commit happens.
+    """
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.changed = set()
+        self.deleted = set()
+        self.deltas = {}
+        self.versions = {}
+        self.full = False
+
+    def merge(self, changed, deleted, deltas=None, versions=None):
+        if changed is None and deleted is None and deltas is None:
+            self.full = True
+            return
+        self.changed.update(changed or ())
+        self.deleted.update(deleted or ())
+        for record_key, fields in (deltas or {}).items():
+            record_deltas = self.deltas.setdefault(record_key, {})
+            for field, amount in fields.items():
+                record_deltas[field] = record_deltas.get(field, 0) + amount
+        for record_key, version in (versions or {}).items():
+            self.versions.setdefault(record_key, version)  # The first edit's base is the one to check
+
+    def absorb(self, other):
+        """Add another pending change to the same collection to this one."""
+        if other.full:
+            self.full = True
+        self.merge(other.changed, other.deleted, other.deltas, other.versions)
+
+    def affected(self):
+        return self.changed | self.deleted | set(self.deltas)
+
+
+def merge_records(change, stored, records):
+    """Fold ``change`` into ``stored`` (key -> JSON record as on disk); returns the conflicting keys.
+
+    Edits replace the stored record with the in-memory one from ``records`` unless
+    the stored version moved on, deltas are added to the stored values and may
+    not take stock below zero, and deletions drop the record.
+    """
+    conflicts = set()
+    for record_key in change.changed - change.deleted:
+        base = stored.get(record_key)
+        expected = change.versions.get(record_key)
+        if base is not None and expected is not None and base.get("version", 0) != expected:
+            conflicts.add(record_key)
+        elif record_key in records:
+            record = records[record_key]
+            stored[record_key] = record.to_json() if hasattr(record, "to_json") else dict(record)
+
+    for record_key, fields in change.deltas.items():
+        if record_key in change.changed or record_key in change.deleted:
+            continue  # The edit already carries the in-memory values
+        base = stored.get(record_key)
+        if base is None:
+            if any(amount < 0 for amount in fields.values()):
+                conflicts.add(record_key)  # Can't take stock from a product that is gone
+            continue
+        record = dict(base)
+        for field, amount in fields.items():
+            record[field] = record.get(field, 0) + amount
+        if record.get("quantity", 0) < 0:
+            conflicts.add(record_key)
+            continue
+        record["version"] = base.get("version", 0) + 1
+        stored[record_key] = record
+
+    for record_key in change.deleted:
+        stored.pop(record_key, None)
+    return conflicts
+
+
+def stored_records(kind, layout):
+    """Key the records of a collection as laid out in its JSON file (a list or a dict)."""
+    record_key = RECORD_KEYS[kind]
+    return {record[record_key]: record for record in (layout.values() if isinstance(layout, dict) else layout)}
+
+
+def differences(stored, records):
+    """Stored records that the live ``records`` lack or hold differently (None when deleted)."""
+    current = {key: None for key in records if key not in stored}
+    for key, data in stored.items():
+        record = records.get(key)
+        if record is None or (record.to_json() if hasattr(record, "to_json") else record) != data:
+            current[key] = data
+    return current
+
+
+def keyed_records(kind, collection):
+    """The record dict behind a catalog (by id), user directory (by username) or session table (by token)."""
+    if kind == "products":
+        return collection.by_id
+    if kind == "sessions":
+        return collection.sessions
+    return collection.users
+
+
+class JsonBackend:
+    """Default backend: one JSON document per collection plus append-only journals.
+
+    Several terminals may share the data directory. A commit locks only the files
+    it writes, and only while it writes them. When another process rewrote a file
+    since this one last read or wrote it, the stored records are re-read and the
+    change is merged into them record by record (edits checked against the record
+    version, stock applied as deltas), so nobody's updates are lost.
+
+    A file's signature (inode, size and modification time, see ``file_signature``)
+    is remembered whenever this process reads or writes it, which tells
+    ``changed_elsewhere`` without parsing anything whether another process has
+    written it since. Files ``watch``ed along with a collection (the order
+    journal) count as part of its signature.
+    """
+
+    name = "json"
+    journaled = True
+
+    def __init__(self):
+        self._digests = {}
+        self._signatures = {}
+        self._watched = {}
+        self._recovered = set()
+
+    def watch(self, key, paths):
+        """Count changes to ``paths`` as changes to the collection stored at ``key``."""
+        self._watched[key] = [os.path.abspath(path) for path in paths]
+
+    def signature(self, key):
+        return tuple(file_signature(path) for path in [key] + self._watched.get(key, []))
+
+    def load(self, path, kind, loader):
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in self._recovered:
+            recover_commit(directory)
+            self._recovered.add(directory)
+        key = os.path.abspath(path)
+        with lock_for(path):
+            # Taken first: watched files aren't covered by the lock, and anything
+            # appended during the read then shows up as a change later
+            signature = self.signature(key)
+            data = loader()
+            self._signatures[key] = signature
+        return data
+
+    def changed_elsewhere(self, key):
+        return self.signature(key) != self._signatures.get(key)
+
+    def remember(self, key):
+        """Take the files of ``key`` as they are now for this process's own writing (e.g. a compaction)."""
+        self._signatures[key] = self.signature(key)
+
+    def commit(self, changes, events, collections):
+        with locked_files([change.path for change in changes.values()] + [path for path, _ in events]):
+            return self._commit(changes, events, collections)
+
+    def _commit(self, changes, events, collections):
+        renames = []
+        refreshed = {}
+        # Collections whose journal only this commit appends to stay in step with their files
+        appended = {os.path.abspath(path) for path, _ in events}
+        current = [
+            key for key, watched in self._watched.items()
+            if appended.intersection(watched) and not self.changed_elsewhere(key)
+        ]
+        for key, change in changes.items():
+            data = collections[key]
+            merged = change.kind in RECORD_KEYS and not change.full and self.changed_elsewhere(key)
+            if merged:
+                data, refreshed[key] = self.merge_stored(change, data)
+            content = dump_json(data)
+            digest = hashlib.sha1(content.encode()).digest()
+            if self._digests.get(key) == digest and not merged:
+                continue  # Nothing changed since the last write
+            temp_file = change.path + ".tmp"
+            write_file_durably(temp_file, content)
+            renames.append((temp_file, change.path, key, digest))
+
+        # Coalesce journal lines per file, keeping their order
+        grouped = {}
+        for path, event in events:
+            grouped[path] = grouped.get(path, "") + json.dumps(event, separators=(",", ":"), default=encode_collection) + "\n"
+
+        if len(renames) + len(grouped) > 1:
+            self._commit_with_manifest(renames, grouped)
+        else:
+            for temp_file, path, _, _ in renames:
+                os.replace(temp_file, path)
+                fsync_directory(os.path.dirname(path))
+            for path, content in grouped.items():
+                append_durably(path, content)
+
+        for _, _, key, digest in renames:
+            self._digests[key] = digest
+            self._signatures[key] = self.signature(key)
+        for key in current:
+            self._signatures[key] = self.signature(key)
+            if hasattr(collections.get(key), "caught_up"):
+                collections[key].caught_up()
+        return refreshed
+
+    def merge_stored(self, change, collection):
+        """Re-read a file another process rewrote and merge ``change`` into it.
+
+        Returns the merged data to write and every stored record that differs from
+        the live collection, so it can be brought up to date; raises ConflictError
+        (writing nothing) if the change can't be merged.
+        """
+        layout = read_json(change.path, [] if change.kind == "products" else {})
+        stored = stored_records(change.kind, layout)
+        records = keyed_records(change.kind, collection)
+        before = dict(stored)
+        if merge_records(change, stored, records):
+            raise ConflictError(change.path, differences(before, records))
+        return (stored if isinstance(layout, dict) else list(stored.values())), differences(stored, records)
+
+    def _commit_with_manifest(self, renames, grouped):
+        directory = os.path.dirname(os.path.abspath(renames[0][1] if renames else next(iter(grouped))))
+        relative = lambda path: os.path.relpath(os.path.abspath(path), directory)
+        appends = []
+        for path, content in grouped.items():
+            offset = os.path.getsize(path) if os.path.exists(path) else 0
+            appends.append((relative(path), offset, content))
+        manifest = {
+            "renames": [(relative(temp_file), relative(path)) for temp_file, path, _, _ in renames],
+            "appends": appends,
+        }
+
+        # The commit is durable as soon as the manifest is; each committer writes its own
+        manifest_file = os.path.join(directory, f"{MANIFEST_PREFIX}-{os.getpid()}-{threading.get_ident()}.json")
+        write_file_durably(manifest_file, json.dumps(manifest))
+        fsync_directory(directory)
+        apply_manifest(directory, manifest_file, manifest)
+
+    def allocate(self, path, field, floor):
+        """Hand out the next value of the counter ``field`` in the JSON document at ``path``."""
+        with lock_for(path):
+            document = read_json(path, {})
+            value = max(document.get(field, 1), floor)
+            document[field] = value + 1
+            write_json_atomic(path, document)
+            self._signatures[os.path.abspath(path)] = self.signature(os.path.abspath(path))
+        return value
+
+    def forget(self, key=None):
+        if key is None:
+            self._digests.clear()
+            self._signatures.clear()
+        else:
+            self._digests.pop(key, None)
+            self._signatures.pop(key, None)
+
+
+def create_backend(name=None):
+    """Build the storage backend named by ``name`` or the ``SMARTPANDA_STORAGE`` variable."""
+    name = (name or os.environ.get("SMARTPANDA_STORAGE") or "json").lower()
+    if name == "json":
+        return JsonBackend()
+    if name == "sqlite":
+        from data_storage.sqlite_backend import SqliteBackend
+        return SqliteBackend()
+    raise ValueError(f"Unknown storage backend '{name}'. Use 'json' or 'sqlite'.")
+
+
+class CommitTicket:
+    """One queued commit; ``wait`` returns once it is durable or raises why it failed."""
+
+    __slots__ = ("changes", "events", "error", "_done")
+
+    def __init__(self, changes, events):
+        self.changes = changes
+        self.events = events
+        self.error = None
+        self._done = threading.Event()
+
+    def finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+
+
+class CommitWriter:
+    """Single thread that performs every commit of a store, grouping those that queue up together.
+
+    Callers hand over their pending changes and wait on a ticket. The writer takes
+    the first queued commit; if others are already queued behind it, it also
+    collects whatever arrives within ``window`` seconds, and writes the lot as
+    one commit: one rewrite per file and one fsync
+    per file and journal, however many orders were placed meanwhile. If the group
+    fails (say one checkout lost a stock conflict), each commit in it is retried
+    on its own so only the one at fault gets the error.
+    """
+
+    def __init__(self, write, window=COMMIT_WINDOW):
+        self.write = write
+        self.window = window
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, changes, events):
+        """Queue a commit and return its ticket."""
+        ticket = CommitTicket(changes, events)
+        if threading.current_thread() is self._thread:
+            self._run([ticket])  # Committing from the writer itself must not wait on the queue
+            return ticket
+        self.start()
+        self._queue.put(ticket)
+        return ticket
+
+    def start(self):
+        """Start the writer thread once."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="data-store-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            group = [self._queue.get()]
+            # A lone commit is written at once; during a burst the writer lingers for stragglers
+            deadline = None
+            while True:
+                try:
+                    if deadline is None:
+                        group.append(self._queue.get_nowait())
+                        deadline = time.monotonic() + self.window
+                    else:
+                        group.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            self._run(group)
+
+    def _run(self, group):
+        changes = {}
+        events = []
+        for ticket in group:
+            for key, change in ticket.changes.items():
+                if key not in changes:
+                    changes[key] = Change(change.path, change.kind)
+                changes[key].absorb(change)
+            events.extend(ticket.events)
+        try:
+            self.write(changes, events, alone=len(group) == 1)
+        except BaseException as error:
+            if len(group) == 1:
+                group[0].finish(error)
+            else:
+                for ticket in group:
+                    self._run([ticket])
+            return
+        for ticket in group:
+            ticket.finish()
+
+
+class DataStore:
+    """Process-wide holder of the collections used by every module.
+
+    Each collection is loaded once per process and the same live object is
+    handed out to every caller, so ``Inventory``, ``Frontend``, ``UserAuth``
+    and ``PandaAssistant`` all work on one shared copy of the data.
+
+    Saving only marks a collection (or some of its records) dirty. Inside
+    ``transaction()`` all saves and journal events are committed together as
+    one unit by the backend: the JSON backend writes temp files and renames
+    them behind a durable manifest, the SQLite backend uses one database
+    transaction and only touches the records that changed. All commits go
+    through one writer thread, which writes commits from concurrent callers
+    together (group commit); each caller still returns only once its own
+    commit is durable.
+
+    Stock is saved as deltas and product edits carry the version they were
+    based on, so commits from several terminals merge instead of overwriting
+    each other. A commit that can't be merged raises ``ConflictError`` once the
+    records involved have been refreshed from storage.
+
+    Loading is read-through: once a collection is loaded, ``load`` and ``sync``
+    only compare the file's signature with the one it was read at. Nothing is
+    parsed while it is unchanged (a hit); when another process wrote it, the
+    file is read again and folded into the live collection in place (a reload),
+    so every object holding it sees the fresh data. ``stats`` counts both.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+        self._collections = {}
+        self._kinds = {}
+        self._loaders = {}
+        self._open_transactions = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.writer = CommitWriter(self._write)
+
+    @property
+    def lock(self):
+        """Lock held while collections are loaded or committed."""
+        return self._lock
+
+    def use_backend(self, backend):
+        """Switch to another backend, dropping everything loaded through the old one."""
+        with self._lock:
+            self.backend = backend
+            self._collections.clear()
+            self._kinds.clear()
+            self._loaders.clear()
+
+    def _pending(self):
+        if not hasattr(self._local, "depth"):
+            self._local.depth = 0
+            self._local.changes = {}
+            self._local.events = []
+        return self._local
+
+    def load(self, path, loader, kind=None, factory=None, watch=()):
+        """Return the cached collection for ``path``, loading it on first use.
+
+        ``loader`` reads the JSON file; other backends load the collection by ``kind``
+        (``products``, ``orders``, ``users``, ``sessions`` or ``meta``) instead.
+        ``factory`` wraps the loaded data once, e.g. in an indexed collection.
+        ``watch`` names further files the loader reads, such as a journal.
+        An already loaded collection is brought up to date if its files changed.
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            if key not in self._collections:
+                self._kinds[key] = kind
+                self._loaders[key] = (path, loader)
+                if watch:
+                    self.backend.watch(key, watch)
+                data = self.backend.load(path, kind, loader)
+                self._collections[key] = factory(data) if factory else data
+                self.misses += 1
+            else:
+                self._sync(key)
+            return self._collections[key]
+
+    def sync(self, path=None):
+        """Reload one loaded collection (or all of them) if another process changed its files."""
+        with self._lock:
+            for key in [os.path.abspath(path)] if path is not None else list(self._collections):
+                if key in self._collections:
+                    self._sync(key)
+
+    def _sync(self, key):
+        if self._open_transactions or not self.backend.changed_elsewhere(key):
+            # Uncommitted in-memory changes must not be overwritten; the next sync picks it up
+            self.hits += 1
+            return
+        path, loader = self._loaders[key]
+        kind = self._kinds[key]
+        collection = self._collections[key]
+        if self.backend.journaled and hasattr(collection, "catch_up"):
+            # Reads only what was appended to its journal, unless the snapshot was rewritten
+            self.backend.load(path, kind, lambda: collection.catch_up(loader))
+            self.reloads += 1
+            return
+        data = self.backend.load(path, kind, loader)
+        if kind in RECORD_KEYS:
+            self.refresh(key, differences(stored_records(kind, data), keyed_records(kind, collection)))
+        elif hasattr(collection, "reload"):
+            collection.reload(data)
+        elif isinstance(collection, dict):
+            collection.clear()
+            collection.update(data)
+        self.reloads += 1
+
+    def stats(self):
+        """How often loads were answered without parsing (hits), first loads (misses) and reloads."""
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+    def save(self, path, data=None, changed=None, deleted=None, deltas=None, versions=None):
+        """Mark a collection dirty and commit it unless a transaction is open.
+
+        ``changed`` and ``deleted`` name the record keys that were touched, which lets
+        record-oriented backends skip the rest; leave them all out to save everything.
+        ``deltas`` ({key: {field: amount}}) are added to the stored values at commit
+        time and ``versions`` ({key: version}) are the versions the edits started from.
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            if data is not None:
+                self._collections[key] = data
+            kind = self._kinds.get(key)
+        pending = self._pending()
+        if key not in pending.changes:
+            pending.changes[key] = Change(path, kind)
+        pending.changes[key].merge(changed, deleted, deltas, versions)
+        if pending.depth == 0:
+            self.commit()
+
+    def append_event(self, path, event):
+        """Add ``event`` to the journal at ``path`` as part of the current commit."""
+        pending = self._pending()
+        pending.events.append((path, event))
+        if pending.depth == 0:
+            self.commit()
+
+    def allocate(self, path, field):
+        """Hand out the next value of a counter kept in a document collection, across processes."""
+        key = os.path.abspath(path)
+        with self._lock:
+            document = self._collections[key]
+            value = self.backend.allocate(path, field, document.get(field, 1))
+            document[field] = value + 1
+        return value
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Group every save and journal event made inside the block into one durable commit."""
+        pending = self._pending()
+        if pending.depth == 0:
+            with self._lock:
+                self._open_transactions += 1
+        pending.depth += 1
+        try:
+            yield self
+        except BaseException:
+            pending.depth -= 1
+            if pending.depth == 0:
+                # The in-memory objects are shared, so whatever changed is still written
+                self._close_transaction()
+            raise
+        pending.depth -= 1
+        if pending.depth == 0:
+            self._close_transaction()
+
+    def _close_transaction(self):
+        try:
+            self.commit()
+        finally:
+            with self._lock:
+                self._open_transactions -= 1
+
+    def commit(self):
+        """Write the calling thread's pending changes as one unit and wait until they are durable."""
+        pending = self._pending()
+        changes, pending.changes = pending.changes, {}
+        events, pending.events = pending.events, []
+        if not changes and not events:
+            return
+        self.writer.submit(changes, events).wait()
+
+    def _write(self, changes, events, alone=True):
+        """Commit on the writer thread; conflicts refresh the collection only for a lone commit."""
+        with self._lock:
+            try:
+                refreshed = self.backend.commit(changes, events, self._collections)
+            except ConflictError as conflict:
+                if alone:
+                    # In a group, other commits' in-memory changes must survive for their retry
+                    self.refresh(os.path.abspath(conflict.path), conflict.current)
+                raise
+            for key, records in (refreshed or {}).items():
+                self.refresh(key, records)
+            for key, change in changes.items():
+                collection = self._collections.get(key)
+                if hasattr(collection, "committed"):
+                    collection.committed(change)
+
+    def refresh(self, key, records):
+        """Bring records of a live collection in line with their stored data."""
+        collection = self._collections.get(key)
+        if hasattr(collection, "refresh"):
+            for record_key, data in records.items():
+                collection.refresh(record_key, data)
+
+    def forget(self, path=None):
+        """Drop one cached collection (or all of them) so the next load rereads it."""
+        with self._lock:
+            if path is None:
+                self._collections.clear()
+                self._loaders.clear()
+                self.backend.forget()
+            else:
+                key = os.path.abspath(path)
+                self._collections.pop(key, None)
+                self._loaders.pop(key, None)
+                self.backend.forget(key)
+
+
+# Single store shared by the whole process
+store = DataStore()
@@ -0,0 +1,105 @@
+from data_storage.ngram_index import NgramIndex
+
+
+class UserDirectory:
+    """User accounts keyed by username, with the lookup indexes UserAuth needs.
+
+    Email and phone have hash indexes so uniqueness checks during registration
+    are constant time, a role index lists workers without scanning customers,
+    and an n-gram index over username, email, full name and phone serves admin
+    substring and prefix search. Everything is kept in step by ``add``,
+    ``remove`` and ``set_role``.
+    """
+
+    # Fields with a hash index for uniqueness checks
+    UNIQUE_FIELDS = ("email", "phone")
+
+    def __init__(self, users):
+        self.users = {}
+        self.by_field = {field: {} for field in self.UNIQUE_FIELDS}
+        self.by_role = {}
+        self.search_index = NgramIndex()
+        for user in users.values():
+            self.add(user)
+
+    def __contains__(self, username):
+        return username in self.users
+
+    def __getitem__(self, username):
+        return self.users[username]
+
+    def __len__(self):
+        return len(self.users)
+
+    def __iter__(self):
+        return iter(self.users)
+
+    def get(self, username, default=None):
+        return self.users.get(username, default)
+
+    def values(self):
+        return self.users.values()
+
+    def to_json(self):
+        return self.users
+
+    def add(self, user):
+        """Add (or replace) a user and index it."""
+        username = user["username"]
+        if username in self.users:
+            # The search index re-adds in place, keeping the user's rank among ties
+            self._unindex(username, self.users[username])
+        self.users[username] = user
+        for field in self.UNIQUE_FIELDS:
+            if user.get(field):
+                self.by_field[field].setdefault(user[field], set()).add(username)
+        self.by_role.setdefault(user.get("role"), {})[username] = user
+        self.search_index.add(username, [user.get("username"), user.get("email"), user.get("full_name"), user.get("phone")])
+
+    def remove(self, username):
+        """Remove a user and drop it from the indexes; returns the user or None."""
+        user = self.users.pop(username, None)
+        if user is None:
+            return None
+        self._unindex(username, user)
+        self.search_index.remove(username)
+        return user
+
+    def _unindex(self, username, user):
+        for field in self.UNIQUE_FIELDS:
+            usernames = self.by_field[field].get(user.get(field))
+            if usernames is not None:
+                usernames.discard(username)
+                if not usernames:
+                    del self.by_field[field][user[field]]
+        self.by_role.get(user.get("role"), {}).pop(username, None)
+
+    def set_role(self, username, role):
+        """Change a user's role and move it in the role index."""
+        user = self.users[username]
+        self.by_role.get(user.get("role"), {}).pop(username, None)
+        user["role"] = role
+        self.by_role.setdefault(role, {})[username] = user
+
+    def refresh(self, username, user):
+        """Replace a user by its stored data (None when the account was deleted)."""
+        if user is None:
+            self.remove(username)
+        else:
+            self.add(user)
+
+    def is_unique(self, field, value):
+        """True when no user has ``value`` in ``field``."""
+        if field == "username":
+            return value not in self.users
+        if field in self.by_field:
+            return not self.by_field[field].get(value)
+        return all(user.get(field) != value for user in self.users.values())
+
+    def with_roles(self, roles):
+        """Users holding any of ``roles``, grouped in the order the roles are given."""
+        return [user for role in roles for user in self.by_role.get(role, {}).values()]
+
+    def search(self, query, limit=None):
+        """Users whose username, email, full name or phone contain ``query``, best matches first."""
+        return [self.users[username] for username in self.search_index.search(query, limit)]
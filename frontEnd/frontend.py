@@ -1,71 +1,108 @@
-import json
-import random
+import contextlib
+import types
 import utilities.common as common
-import user_authentication.user_auth as user_auth_management
+from data_storage.store import store, STORAGE_ERRORS
+from data_storage.session_store import get_session_store
+from data_storage.branches import get_branch
+from services.order_service import OrderService, OrderLine
+from services.validation import InvalidRequest
+from services.report_service import ReportService
+from utilities import paging
+
+# Filters of the order lists match these fields
+ORDER_FILTER = paging.text_filter(lambda order: (order["order_id"], order["status"], order.get("username"), order["payment_method"]))
+MY_ORDER_FILTER = paging.text_filter(lambda order: (order["order_id"], order["status"], *(item["name"] for item in order["cart"])))
+
+
+def order_details(order):
+    """An order with its items and charges, as shown to the customer who placed it."""
+    lines = [common.color_text(f"Order ID: {order['order_id']}", bg_color="blue", style="bold"), "Items:"]
+    for item in order['cart']:
+        # Handling missing 'extras' key
+        extras = ", ".join(extra['name'] for extra in item.get('extras', [])) if item.get('extras') else "None"
+        lines.append(f"- {item['name']} (Quantity: {item['quantity']}, Price: {common.format_currency(item['price'])}, Extras: {extras})")
+    lines += [
+        f"Subtotal: {common.format_currency(order['base_total'])}",
+        f"Extras Total: {common.format_currency(order['extras_total'])}",
+        f"VAT: {common.format_currency(order['vat'])}",
+        f"Tax: {common.format_currency(order['tax'])}",
+        f"Total Price: {common.format_currency(order['total_price'])}",
+        f"Payment Method: {order['payment_method']}",
+        f"Status: {order['status']}",
+        common.color_text("-" * 40, style="dim"),
+    ]
+    return "\n".join(lines)
+
+
+def order_summary(order):
+    """An order's id, status and total, as listed to workers."""
+    return "\n".join((
+        common.color_text(f"Order ID: {order['order_id']}", bg_color="blue", style="bold"),
+        f"Order Status: {order['status']}",
+        f"Total Price: {common.format_currency(order['total_price'])}",
+        common.color_text("-" * 40, style="dim"),
+    ))
 
-class Frontend:
-    def __init__(self, products_file="data/products.json", orders_file="data/orders.json"):
-        self.products_file = products_file
-        self.orders_file = orders_file
-        self.products = self.load_products()
-        self.orders = self.load_orders()
-        user_auth = user_auth_management.UserAuth()
-        self.current_user = user_auth.session.get("username")  # Fetch the current user's username
-    def load_products(self):
-        """Load products from the JSON file."""
-        try:
-            with open(self.products_file, "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            print("Error: Products file is corrupted. Starting with an empty inventory.")
-            return []
-
-    def save_products(self):
-        """Save the updated product list to the products JSON file."""
-        try:
-            with open(self.products_file, "w") as file:
-                json.dump(self.products, file, indent=4)
-        except FileNotFoundError:
-            print("Error: Unable to save products. Ensure the directory exists.")
-
-    def load_orders(self):
-        """Load orders from the specified JSON file."""
-        try:
-            with open(self.orders_file, "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            print("Error: Orders file is corrupted. Starting with an empty order list.")
-            return []
 
+class Frontend:
+    def __init__(self, products_file=None, orders_file=None, token=None, sessions_file="data/sessions.json", branch=None):
+        # Catalog and orders of this terminal's branch unless files are given; sessions are shared
+        self.branch = get_branch(branch)
+        self.service = OrderService(products_file or self.branch.products_file, orders_file or self.branch.orders_file)
+        self.products = self.service.products
+        self.orders = self.service.orders
+        self.sessions = get_session_store(sessions_file)  # Session lookups never load the user accounts
+        self.token = token  # An API client's session; None means this terminal's login
+
+    @property
+    def session_token(self):
+        return self.token if self.token is not None else self.sessions.current_token
+
+    @property
+    def current_user(self):
+        """Username of the logged-in customer."""
+        return self.sessions.username(self.session_token)
+
+    @contextlib.contextmanager
     def save_orders(self):
-        """Save the current list of orders to a JSON file."""
-        try:
-            with open(self.orders_file, "w") as file:
-                json.dump(self.orders, file, indent=4)
-            print(common.color_text("The Order updated successfully.", bg_color='blue', style='bold'))
-        except Exception as e:
-            print(common.color_text("Error order updating. Please try again.", color='red', style='bold'))
+        """Commit the order events and stock changes made in the block as one durable unit.
 
+        Yields an outcome whose ``saved`` is True once the commit is durable;
+        when the change is refused or the commit fails it stays False, and the
+        caller must not report success.
+        """
+        outcome = types.SimpleNamespace(saved=False)
+        try:
+            with store.transaction():
+                yield outcome
+        except (InvalidRequest,) + STORAGE_ERRORS as error:
+            print(common.color_text(f"Error order updating ({error}). Please try again.", color='red', style='bold'))
+            return
+        outcome.saved = True
+        print(common.color_text("The Order updated successfully.", bg_color='blue', style='bold'))
+
+    def report_shortages(self, result, cart_id=None):
+        """Tell the customer why a checkout was refused, naming the products it could not get."""
+        reservations = self.products.reservations
+        if not result.shortages:
+            common.show_message_with_delay(result.error, "red")
+        for product_id in result.shortages:
+            product = self.products.get(product_id)
+            if product is None:
+                common.show_message_with_delay(f"Product {product_id} is no longer available.", "red")
+            else:
+                available = reservations.available(product_id) + reservations.held_by(cart_id, product_id)
+                common.show_message_with_delay(f"Not enough stock for {product['name']}. Available stock: {available}", "red")
 
     def new_order(self):
         """Create a new order by selecting products and checkout."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Place New Order")
+        common.new_screen("Place New Order")
 
-        # Show products by category
+        # Show products by category (read from the catalog's category index, in-stock only)
         print("Select what you want to have now:")
-        category_choice = 1
-        categories = []
-        for product in self.products:
-            if product['category'] not in categories:
-                categories.append(product['category'])
-                print(f"{category_choice}. {product['category']}")
-                category_choice += 1
+        categories = self.products.categories(in_stock_only=True)
+        for category_choice, category in enumerate(categories, start=1):
+            print(f"{category_choice}. {category}")
 
         category_id = common.get_valid_number_input("Enter the number corresponding to the category: ")
         if category_id < 1 or category_id > len(categories):
@@ -74,270 +111,234 @@ class Frontend:
 
         category = categories[category_id - 1]
 
-        # Show products in the selected category
-        available_products = []
-        for product in self.products:
-            if product['category'].lower() == category.lower():
-                available_products.append(product)
+        # Show products in the selected category that are in stock
+        available_products = self.products.products_in(category, in_stock_only=True)
 
         print(common.color_text(f"\nProducts in '{category}' category:", bg_color="blue"))
         print(common.color_text("--------------------------------", style="dim"))
         for product in available_products:
-            print(common.color_text(f"{product['id']}. {product['name']} - {common.format_currency(product['price'])} (Stock: {product['quantity']})", style='bold'))
-
-        # Add products to cart
-        cart = []
-        while True:
-            product_id = common.get_valid_number_input("Enter product ID to add to cart (0 to finish): ")
-            if product_id == 0:
-                break
-
-            product = None
-            for available_product in available_products:
-                if available_product['id'] == product_id:
-                    product = available_product
+            print(common.color_text(f"{product['id']}. {product['name']} - {common.format_currency(product['price'])} (Stock: {self.products.reservations.available(product['id'])})", style='bold'))
+
+        # Every line holds its stock until checkout; leaving the cart releases what it holds
+        with self.products.reservations.cart() as cart_id:
+            # Add products to cart
+            lines = []
+            while True:
+                product_id = common.get_valid_number_input("Enter product ID to add to cart (0 to finish): ")
+                if product_id == 0:
                     break
 
-            if product:
-                quantity = common.get_valid_number_input(f"Enter quantity for {product['name']}: ")
-                if quantity <= 0:
-                    print(common.color_text("Quantity must be positive value", color='red'))
+                # Only products from the chosen category can be added
+                product = self.products.get(product_id)
+                if product and product['category'].lower() != category.lower():
+                    product = None
+
+                if product:
                     quantity = common.get_valid_number_input(f"Enter quantity for {product['name']}: ")
-                if product['quantity'] >= quantity:
-                    # Add extras
-                    extras = []
-                    if "extras" in product and product["extras"]:
-                        print("Available extras:")
-                        for idx, extra in enumerate(product["extras"], start=1):
-                            print(f"{idx}. {extra['name']} - {common.format_currency(extra['price'])}")
-                        while True:
-                            extra_choice = common.get_valid_number_input("Enter extra number to add (0 to finish): ")
-                            if extra_choice == 0:
-                                break
-                            if 1 <= extra_choice <= len(product["extras"]):
-                                extras.append(product["extras"][extra_choice - 1])
-                            else:
-                                common.show_message_with_delay("Invalid extra selection. Try again.", "red")
-
-                    # Add product to cart
-                    cart.append({
-                        "product_id": product['id'],
-                        "name": product['name'],
-                        "price": product['price'],
-                        "quantity": quantity,
-                        "extras": extras
-                    })
-                    common.show_message_with_delay(f"{product['name']} added to cart.", color='green')
+                    if quantity <= 0:
+                        print(common.color_text("Quantity must be positive value", color='red'))
+                        quantity = common.get_valid_number_input(f"Enter quantity for {product['name']}: ")
+                    # Holds add up per product, so repeated lines are checked against their total
+                    if self.products.reservations.hold(cart_id, product['id'], quantity):
+                        # Add extras
+                        extras = []
+                        if "extras" in product and product["extras"]:
+                            print("Available extras:")
+                            for idx, extra in enumerate(product["extras"], start=1):
+                                print(f"{idx}. {extra['name']} - {common.format_currency(extra['price'])}")
+                            while True:
+                                extra_choice = common.get_valid_number_input("Enter extra number to add (0 to finish): ")
+                                if extra_choice == 0:
+                                    break
+                                if 1 <= extra_choice <= len(product["extras"]):
+                                    extras.append(product["extras"][extra_choice - 1])
+                                else:
+                                    common.show_message_with_delay("Invalid extra selection. Try again.", "red")
+
+                        # Add product to cart
+                        lines.append(OrderLine(product['id'], quantity, [extra['name'] for extra in extras]))
+                        common.show_message_with_delay(f"{product['name']} added to cart.", color='green')
+                    else:
+                        common.show_message_with_delay(f"Not enough stock for {product['name']}. Available stock: {self.products.reservations.available(product['id'])}", "red")
                 else:
-                    common.show_message_with_delay(f"Not enough stock for {product['name']}. Available stock: {product['quantity']}", "red")
-            else:
-                common.show_message_with_delay("Invalid product ID.", "red")
-
-        # Checkout
-        if cart:
-            order_id = f"#SP{random.randint(1000, 9999)}"
-            base_total = sum(item['price'] * item['quantity'] for item in cart)
-            extras_total = sum(extra['price'] for item in cart for extra in item['extras'])
-
-            # Calculate VAT and Tax
-            vat_tax_details = common.calculate_vat_and_tax(base_total + extras_total)
-            total_price = vat_tax_details['total']
-
-            # Display order summary
-            print(f"\nYour order ID: {common.color_text(order_id, bg_color='blue', style='bold')}")
-            print(f"Subtotal: {common.color_text(common.format_currency(base_total), bg_color='blue', style='bold')}")
-            print(f"Extras: {common.color_text(common.format_currency(extras_total), bg_color='blue')}")
-            print(f"VAT (15%): {common.color_text(common.format_currency(vat_tax_details['vat']), bg_color='blue')}")
-            print(f"Tax (5%): {common.color_text(common.format_currency(vat_tax_details['tax']), bg_color='blue')}")
-            print(f"Total: {common.color_text(common.format_currency(total_price), bg_color='blue', style='bold')}")
-
-            payment_method = input("Choose payment method (1. Bank Transfer, 2. Credit Card): ")
-            if payment_method == '1':
-                common.show_message_with_delay(f"Payment successful with Bank transfer! Order {order_id} placed.", color='green')
-            elif payment_method == '2':
-                card_info = input("Enter your credit card info: ")
-                common.show_message_with_delay(f"Payment successful with card! Order {order_id} placed.", color='green')
-            else:
-                common.show_message_with_delay("Invalid payment method selected. Try again", "red")
-                return
-
-            order = {
-                "order_id": order_id,
-                "username": self.current_user,  # Add username to the order
-                "cart": cart,
-                "base_total": base_total,
-                "extras_total": extras_total,
-                "vat": vat_tax_details['vat'],
-                "tax": vat_tax_details['tax'],
-                "total_price": total_price,
-                "payment_method": "Bank Transfer" if payment_method == '1' else "Credit Card",
-                "status": "Pending"  # Default status is Pending
-            }
-            self.orders.append(order)
-            self.save_orders()
-
-
-            # Save the updated product list
-            for item in cart:
-                for product in self.products:
-                    if product['id'] == item['product_id']:
-                        product['quantity'] -= item['quantity']
-            self.save_products()
+                    common.show_message_with_delay("Invalid product ID.", "red")
+
+            # Checkout
+            if lines:
+                try:
+                    cart = self.service.build_cart(lines)
+                except InvalidRequest as error:
+                    common.show_message_with_delay(str(error), "red")
+                    return
+                order_id = self.service.new_order_id()
+                totals = self.service.price_cart(cart)
+
+                # Display order summary
+                print(f"\nYour order ID: {common.color_text(order_id, bg_color='blue', style='bold')}")
+                print(f"Subtotal: {common.color_text(common.format_currency(totals['base_total']), bg_color='blue', style='bold')}")
+                print(f"Extras: {common.color_text(common.format_currency(totals['extras_total']), bg_color='blue')}")
+                print(f"VAT (15%): {common.color_text(common.format_currency(totals['vat']), bg_color='blue')}")
+                print(f"Tax (5%): {common.color_text(common.format_currency(totals['tax']), bg_color='blue')}")
+                print(f"Total: {common.color_text(common.format_currency(totals['total_price']), bg_color='blue', style='bold')}")
+
+                payment_method = input("Choose payment method (1. Bank Transfer, 2. Credit Card): ")
+                if payment_method == '2':
+                    card_info = input("Enter your credit card info: ")
+                elif payment_method != '1':
+                    common.show_message_with_delay("Invalid payment method selected. Try again", "red")
+                    return
 
-        else:
-            common.show_message_with_delay("No products selected for the order.", "red")
+                result = self.service.place_order(
+                    self.current_user,  # Add username to the order
+                    lines,
+                    "Bank Transfer" if payment_method == '1' else "Credit Card",
+                    cart_id,
+                    order_id=order_id,
+                )
+                if not result.placed:
+                    self.report_shortages(result, cart_id)
+                    return
+                if payment_method == '1':
+                    common.show_message_with_delay(f"Payment successful with Bank transfer! Order {order_id} placed.", color='green')
+                else:
+                    common.show_message_with_delay(f"Payment successful with card! Order {order_id} placed.", color='green')
+
+            else:
+                common.show_message_with_delay("No products selected for the order.", "red")
 
     def view_my_orders(self):
-        """View all orders placed by the current user."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("My Orders")
+        """View the orders placed by the current user, a page at a time."""
+        common.new_screen("My Orders")
 
         if not self.orders:
-            print(common.color_text("No orders found.", color="red"))
-            return
+            return common.color_text("No orders found.", color="red")
 
-        user_orders = []
-        for order in self.orders:
-            if order['username'] == self.current_user:
-                user_orders.append(order)
+        username = self.current_user
+        if not self.orders.count(username):
+            return common.color_text("No orders found for the current user.", color="red")
 
-        if not user_orders:
-            print(common.color_text("No orders found for the current user.", color="red"))
-            return
-
-        for order in user_orders:
-            print(common.color_text(f"Order ID: {order['order_id']}", bg_color="blue", style="bold"))
-            print("Items:")
-            for item in order['cart']:
-                # Handling missing 'extras' key
-                extras = ", ".join(extra['name'] for extra in item.get('extras', [])) if item.get('extras') else "None"
-                print(f"- {item['name']} (Quantity: {item['quantity']}, Price: {common.format_currency(item['price'])}, Extras: {extras})")
-            print(f"Subtotal: {common.format_currency(order['base_total'])}")
-            print(f"Extras Total: {common.format_currency(order['extras_total'])}")
-            print(f"VAT: {common.format_currency(order['vat'])}")
-            print(f"Tax: {common.format_currency(order['tax'])}")
-            print(f"Total Price: {common.format_currency(order['total_price'])}")
-            print(f"Payment Method: {order['payment_method']}")
-            print(f"Status: {order['status']}")
-            print(common.color_text("-" * 40, style="dim"))
+        # Only the orders of the page on screen are formatted
+        pager = paging.Pager(lambda: self.orders.scan(username), paging.page_size(12), lambda: self.orders.count(username))
+        return paging.browse(
+            "My Orders", pager, lambda orders: "\n".join(map(order_details, orders)),
+            common.color_text("No orders match the filter.", color="yellow"), MY_ORDER_FILTER,
+        )
 
 
     def update_order(self):
         """Update an existing order by first canceling it and placing a new one."""
-        self.view_my_orders()
+        my_orders = self.view_my_orders()
+        if my_orders is not None:
+            print(my_orders)
         order_id = input("Enter the Order ID to update: ").strip()
 
-        user_orders = [order for order in self.orders if order['username'] == self.current_user]
-
-        for order in user_orders:
-            if order['order_id'] == order_id:
-                # Restock the products
-                for item in order['cart']:
-                    for product in self.products:
-                        if product['id'] == item['product_id']:
-                            product['quantity'] += item['quantity']
-
-                self.orders.remove(order)
-                self.save_orders()
-                self.save_products()
-                common.show_message_with_delay(f"Order {order_id} has been canceled. You can now place a new order.", "green")
-                self.new_order()
-                return
+        order = self.service.find_order(order_id, username=self.current_user)
+        if not order:
+            common.show_message_with_delay("Order ID not found. Please try again.", "red")
+            return
 
-        common.show_message_with_delay("Order ID not found. Please try again.", "red")
+        with self.save_orders() as outcome:
+            self.service.cancel_order(order_id, username=self.current_user)
+        if not outcome.saved:
+            return
+        common.show_message_with_delay(f"Order {order_id} has been canceled. You can now place a new order.", "green")
+        self.new_order()
 
     def view_all_orders(self):
-        """Admin/Manager/Staff can view all orders with order number and total price."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("All Orders")
+        """Admin/Manager/Staff can view all orders with order number and total price, a page at a time."""
+        common.new_screen("All Orders")
 
         if not self.orders:
-            print(common.color_text("No orders found.", color="red"))
-            return
-
-        total_sales = 0
-        for order in self.orders:
-            print(common.color_text(f"Order ID: {order['order_id']}", bg_color="blue", style="bold"))
-            print(f"Order Status: {order['status']}")
-            print(f"Total Price: {common.format_currency(order['total_price'])}")
-            total_sales += order['total_price']
+            return common.color_text("No orders found.", color="red")
+
+        def total_sales():
+            return common.color_text(f"Total Sales: {common.format_currency(sum(order['total_price'] for order in self.orders.scan()))}", bg_color="yellow", style="bold")
+
+        pager = paging.Pager(self.orders.scan, paging.page_size(4), self.orders.count)
+        return paging.browse(
+            "All Orders", pager, lambda orders: "\n".join(map(order_summary, orders)),
+            common.color_text("No orders match the filter.", color="yellow"), ORDER_FILTER, total_sales,
+        )
+
+    def view_branch_report(self):
+        """Admin can view sales and stock of every branch, side by side and combined."""
+        common.new_screen("Branch Report")
+
+        report = common.loading_message("Collecting the reports of every branch", "green", ReportService(self.branch.data_dir).consolidated)
+        for branch in report["branches"]:
+            print(common.color_text(f"Branch: {branch['branch']}", bg_color="blue", style="bold"))
+            print(f"Orders: {branch['orders']}")
+            print(f"Sales: {common.format_currency(branch['sales'])}")
+            print(f"Stock Value: {common.format_currency(branch['stock_value'])}")
             print(common.color_text("-" * 40, style="dim"))
 
-        print(common.color_text(f"Total Sales: {common.format_currency(total_sales)}", bg_color="yellow", style="bold"))
+        print(common.color_text(f"All Branches: {report['orders']} orders", bg_color="yellow", style="bold"))
+        for status, count in report["by_status"].items():
+            print(f"{status}: {count}")
+        print(common.color_text(f"Total Sales: {common.format_currency(report['sales'])}", bg_color="yellow", style="bold"))
+
+        if report["top_products"]:
+            print("\nBest Sellers:")
+            for name, quantity in report["top_products"].items():
+                print(f"- {name}: {quantity}")
+        if report["low_stock"]:
+            print(common.color_text("\nRunning Low:", color="red", style="bold"))
+            for item in report["low_stock"]:
+                print(f"- {item['name']} ({item['branch']}): {item['quantity']} left")
 
     def update_order_status(self):
         """Admin/Manager/Staff can update the status of an order."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Update Order Status")
+        common.new_screen("Update Order Status")
 
         order_id = input("Enter the Order ID to update status: ").strip()
 
         # Check if the order exists
-        order_found = False
-        for order in self.orders:
-            if order['order_id'] == order_id:
-                order_found = True
-                # Show current status and options to update
-                print(f"Current Status: {order['status']}")
-                print("Select new status:")
-                print("1. Pending")
-                print("2. Completed")
-                print("3. Cancelled")
-                new_status_choice = common.get_valid_number_input("Enter your choice (1/2/3): ")
-
-                if new_status_choice == 1:
-                    order['status'] = "Pending"
-                elif new_status_choice == 2:
-                    order['status'] = "Completed"
-                elif new_status_choice == 3:
-                    order['status'] = "Cancelled"
-                else:
-                    common.show_message_with_delay("Invalid choice. Please try again.", "red")
-                    return
+        order = self.service.find_order(order_id)
+        if not order:
+            common.show_message_with_delay("Order ID not found. Please try again.", "red")
+            return
 
-                self.save_orders()
-                common.show_message_with_delay(f"Order {order_id} status updated to {order['status']}.", "green")
-                break
+        # Show current status and options to update
+        print(f"Current Status: {order['status']}")
+        print("Select new status:")
+        print("1. Pending")
+        print("2. Completed")
+        print("3. Cancelled")
+        new_status_choice = common.get_valid_number_input("Enter your choice (1/2/3): ")
+
+        if new_status_choice == 1:
+            new_status = "Pending"
+        elif new_status_choice == 2:
+            new_status = "Completed"
+        elif new_status_choice == 3:
+            new_status = "Cancelled"
+        else:
+            common.show_message_with_delay("Invalid choice. Please try again.", "red")
+            return
 
-        if not order_found:
-            common.show_message_with_delay("Order ID not found. Please try again.", "red")
+        with self.save_orders() as outcome:
+            self.service.set_status(order_id, new_status)
+        if not outcome.saved:
+            return
+        common.show_message_with_delay(f"Order {order_id} status updated to {order['status']}.", "green")
 
     def cancel_order(self):
         """Cancel an order by its order ID (Admin/Manager/Staff can cancel any order, user can cancel only their own)."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Cancel Order")
+        common.new_screen("Cancel Order")
 
         order_id = input("Enter the Order ID to cancel: ").strip()
 
         # Check if the order exists
-        order_found = False
-        for order in self.orders:
-            if order['order_id'] == order_id:
-                order_found = True
-                # Check if the user is allowed to cancel
-                if self.current_user == order['username'] or user_auth_management.UserAuth().session.get("role") in ['admin', 'manager', 'staff']:
-                    # Restock the products
-                    for item in order['cart']:
-                        for product in self.products:
-                            if product['id'] == item['product_id']:
-                                product['quantity'] += item['quantity']
-
-                    self.orders.remove(order)
-                    self.save_orders()
-                    self.save_products()
-                    common.show_message_with_delay(f"Order {order_id} has been canceled.", "green")
-                else:
-                    common.show_message_with_delay("You are not authorized to cancel this order.", "red")
-                break
-
-        if not order_found:
+        order = self.service.find_order(order_id)
+        if not order:
             common.show_message_with_delay("Order ID not found. Please try again.", "red")
+            return
 
-
-
-
-    
+        # Check if the user is allowed to cancel
+        if self.service.can_cancel(order, self.current_user, self.sessions.role(self.session_token)):
+            with self.save_orders() as outcome:
+                self.service.cancel_order(order_id)
+            if outcome.saved:
+                common.show_message_with_delay(f"Order {order_id} has been canceled.", "green")
+        else:
+            common.show_message_with_delay("You are not authorized to cancel this order.", "red")
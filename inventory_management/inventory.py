@@ -1,38 +1,34 @@
-import json
 import utilities.common as common
+from services.inventory_service import InventoryService, CATEGORIES
+from services.validation import InvalidRequest
+from utilities.table import Table, Column
+from utilities import paging
+from data_storage.branches import get_branch
+
+def product_table(catalog):
+    """How product lists are shown; stock is what ``catalog.quantity`` reports, as at checkout."""
+    return Table([
+        Column("ID", 5, key="id"),
+        Column("Name", 20, key="name"),
+        Column("Price", 10, value=lambda product: common.format_currency(product["price"])),
+        Column("Quantity", 10, value=lambda product: catalog.quantity(product["id"])),
+        Column("Category", 15, key="category"),
+        Column("Extras", 20, value=lambda product: ", ".join(extra["name"] for extra in product["extras"])),
+    ])
+
+# The product list's filter matches these fields
+PRODUCT_FILTER = paging.text_filter(lambda product: (product["id"], product["name"], product["category"], *(extra["name"] for extra in product["extras"])))
 
 class Inventory:
-    def __init__(self, products_file="data/products.json"):
-        self.products_file = products_file
-        self.products = self.load_products()
+    def __init__(self, products_file=None, branch=None):
+        # The catalog of this terminal's branch unless a file is given
+        self.service = InventoryService(products_file or get_branch(branch).products_file)
+        self.products = self.service.products
+        self.table = product_table(self.products)
 
-    def load_products(self):
-        """Load products from the specified JSON file."""
-        try:
-            with open(self.products_file, "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            # Return an empty list if the file doesn't exist
-            return []
-        except json.JSONDecodeError:
-            # Handle corrupted JSON file gracefully
-            print("Error: Products file is corrupted. Starting with an empty inventory.")
-            return []
-
-    def save_products(self):
-        """Save the products to the specified JSON file."""
-        try:
-            # Ensure the directory structure exists by attempting to write the file
-            with open(self.products_file, "w") as file:
-                json.dump(self.products, file, indent=4)
-        except FileNotFoundError:
-            # Create a new file if it doesn't exist
-            print("Error: Unable to save products. Ensure the directory exists.")
     def add_product(self):
         """Add a new product to the inventory."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Add Product")
+        common.new_screen("Add Product")
 
         # Get valid product name
         name = common.get_valid_text_input("Enter product name: ")
@@ -49,7 +45,7 @@ class Inventory:
             quantity = common.get_valid_number_input("Enter product quantity: ")
 
         # Category selection with validation
-        categories = ["Snacks", "Lunch", "Dinner", "Drinks", "Desserts"]
+        categories = CATEGORIES
         print("Select a category:")
         category_id = 0
         for category in categories:
@@ -72,66 +68,39 @@ class Inventory:
             extra_price = common.get_valid_number_input(f"Enter price for {extra_name}: ")
             extras.append({"name": extra_name, "price": extra_price})
 
-        # Assigning ID to the product
-        product_id = len(self.products) + 1
-
-        product = {
-            "id": product_id,
-            "name": name,
-            "price": price,
-            "quantity": quantity,
-            "category": category,
-            "extras": extras
-        }
-
-        self.products.append(product)
-        self.save_products()
+        try:
+            self.service.create_product(name, price, quantity, category, extras)
+        except InvalidRequest as error:
+            print(common.color_text(f"Error: {error}", "red"))
+            return
         print(common.color_text(f"Product '{name}' added successfully!", "green", style="bold"))
 
-    def view_all_products(self, category=None):
-        """View all products, optionally filtered by category."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("View Products")
-
-        filtered_products = self.products if not category else [product for product in self.products if product["category"].lower() == category.lower()]
-
-        if not filtered_products:
-            return common.color_text("No products found.", color="yellow", style="italic")
-
-        name_width = 20
-        price_width = 10
-        quantity_width = 10
-        category_width = 15
-        extras_width = 20
-
-        # Header with blue background
-        header = common.color_text(f"{'ID':<5}{'Name':<{name_width}}{'Price':<{price_width}}{'Quantity':<{quantity_width}}{'Category':<{category_width}}{'Extras':<{extras_width}}", bg_color="blue", style="bold")
-        
-        # Create separator line
-        separator = "-" * 85
-
-        # Format each product row to match the fixed column widths
-        rows = "\n".join(
-            f"{product['id']:<5}{product['name']:<{name_width}}{common.format_currency(product['price']):<{price_width}}{product['quantity']:<{quantity_width}}{product['category']:<{category_width}}{', '.join([extra['name'] for extra in product['extras']]):<{extras_width}}"
-            for product in filtered_products
+    def view_all_products(self, category=None, in_stock_only=False):
+        """View all products a page at a time, optionally filtered by category and to in-stock items."""
+        common.new_screen("View Products")
+
+        if category:
+            # Index-backed, so only the category's products are listed
+            pager = paging.Pager(lambda: iter(self.products.products_in(category, in_stock_only)))
+        elif in_stock_only:
+            pager = paging.Pager(lambda: filter(self.products.in_stock_now, self.products))
+        else:
+            pager = paging.Pager(lambda: iter(self.products), count=lambda: len(self.products))
+
+        return paging.browse(
+            "View Products", pager, self.table.render,
+            common.color_text("No products match the filter.", color="yellow", style="italic"), PRODUCT_FILTER,
+            nothing=common.color_text("No products found.", color="yellow", style="italic"),
         )
 
-        return f"{header}\n{separator}\n{rows}"
-
-    def search_product(self):
-        """Search for a product by ID, name, or category."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Search Product")
+    def search_product(self, limit=None):
+        """Search for a product by ID, name, category or extra, best matches first."""
+        common.new_screen("Search Product")
 
         search_key = input("Search by product ID, name, or category: ").lower()
 
-        # Search for the product by ID, name, or category
-        results = [
-            product for product in self.products
-            if search_key in str(product["id"]) or search_key in product["name"].lower() or search_key in product["category"].lower()
-        ]
+        # Search the catalog's trigram index by ID, name, category or extra
+        results = self.products.search(search_key, limit)
 
         if not results:
             return common.color_text(f"No products found matching '{search_key}'.", color="yellow")
@@ -141,13 +110,13 @@ class Inventory:
 
     def update_product(self):
         """Update product details."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Update Product")
+        common.new_screen("Update Product")
 
         product_id = int(input("Enter the product ID to update: "))
 
-        product_to_update = next((product for product in self.products if product["id"] == product_id), None)
+        product_to_update = self.products.get(product_id)
+        # The edit only goes through if nobody else changes the product meanwhile
+        version = product_to_update.get("version", 0) if product_to_update else 0
 
         if not product_to_update:
             return common.color_text(f"Product with ID '{product_id}' not found.", color="yellow")
@@ -158,7 +127,7 @@ class Inventory:
         new_quantity = int(input(f"Enter new quantity (current: {product_to_update['quantity']}): "))
         
         
-        categories = ["Snacks", "Lunch", "Dinner", "Drinks", "Desserts"]
+        categories = CATEGORIES
         print("Select a category:")
         category_id = 0
         for category in categories:
@@ -182,26 +151,27 @@ class Inventory:
             extra_price = common.get_valid_number_input(f"Enter price for {extra_name}: ")
             new_extras.append({"name": extra_name, "price": extra_price})
 
-        product_to_update.update({
-            "name": new_name or product_to_update["name"],
-            "price": new_price or product_to_update["price"],
-            "quantity": new_quantity or product_to_update["quantity"],
-            "category": new_category or product_to_update["category"],
-            "extras": new_extras or product_to_update["extras"]
-        })
-
-        self.save_products()
+        try:
+            updated = self.service.edit_product(product_id, {
+                "name": new_name or product_to_update["name"],
+                "price": new_price or product_to_update["price"],
+                "quantity": new_quantity or product_to_update["quantity"],
+                "category": new_category or product_to_update["category"],
+                "extras": new_extras or [extra.to_json() for extra in product_to_update["extras"]]
+            }, version)
+        except InvalidRequest as error:
+            return common.color_text(f"Error: {error}", color="red")
+        if updated is None:
+            return common.color_text("The product was changed on another terminal. Please review it and try again.", color="red")
         return common.color_text(f"Product '{product_to_update['name']}' updated successfully.", "green", style="bold")
 
     def delete_product(self):
         """Delete a product from the inventory."""
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Delete Product")
+        common.new_screen("Delete Product")
 
         product_id = int(input("Enter the product ID to delete: "))
 
-        product_to_delete = next((product for product in self.products if product["id"] == product_id), None)
+        product_to_delete = self.products.get(product_id)
 
         if not product_to_delete:
             return common.color_text(f"Product with ID '{product_id}' not found.", color="yellow")
@@ -211,28 +181,9 @@ class Inventory:
         if confirmation != 'y':
             return common.color_text("Product deletion canceled.", color="yellow")
 
-        self.products.remove(product_to_delete)
-        self.save_products()
+        self.service.remove_product(product_id)
         return common.color_text(f"Product '{product_to_delete['name']}' deleted successfully.", "green", style="bold")
 
     def view_products_by_list(self, product_list):
         """Helper method to view products from a provided list."""
-        name_width = 20
-        price_width = 10
-        quantity_width = 10
-        category_width = 15
-        extras_width = 20
-
-        # Header with blue background
-        header = common.color_text(f"{'ID':<5}{'Name':<{name_width}}{'Price':<{price_width}}{'Quantity':<{quantity_width}}{'Category':<{category_width}}{'Extras':<{extras_width}}", bg_color="blue", style="bold")
-        
-        # Create separator line
-        separator = "-" * 85
-
-        # Format each product row to match the fixed column widths
-        rows = "\n".join(
-            f"{product['id']:<5}{product['name']:<{name_width}}{common.format_currency(product['price']):<{price_width}}{product['quantity']:<{quantity_width}}{product['category']:<{category_width}}{', '.join([extra['name'] for extra in product['extras']]):<{extras_width}}"
-            for product in product_list
-        )
-
-        return f"{header}\n{separator}\n{rows}"
+        return self.table.render(product_list)
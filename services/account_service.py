@@ -0,0 +1,118 @@
+import hashlib
+import json
+import re
+from data_storage.store import store
+from data_storage.user_directory import UserDirectory
+from data_storage.session_store import get_session_store
+from services.validation import InvalidRequest
+
+ROLES = ("admin", "manager", "staff", "customer")
+
+USERNAME_PATTERN = re.compile(r"^[a-zA-Z0-9_]{3,20}$")
+EMAIL_PATTERN = re.compile(r"^[\w.-]+@[a-zA-Z\d.-]+\.[a-zA-Z]{2,}$")
+PHONE_PATTERN = re.compile(r"^\d{10,15}$")
+
+
+class AccountService:
+    """User accounts and logins without any terminal I/O.
+
+    Registration, authentication, sessions, role changes and account removal
+    for the CLI's ``UserAuth`` screens and the HTTP API. Invalid input raises
+    ``InvalidRequest``; logins are tokens from the shared session store.
+    """
+
+    def __init__(self, users_file="data/users.json", sessions_file="data/sessions.json"):
+        self.users_file = users_file
+        self.sessions = get_session_store(sessions_file)
+        self.users = store.load(users_file, self.read_users_file, kind="users", factory=UserDirectory)
+
+    def read_users_file(self):
+        """Read users from the JSON file."""
+        try:
+            with open(self.users_file, "r") as file:
+                users = json.load(file)
+                # Ensure the structure is correct and each user has a 'username'
+                for username, user_data in users.items():
+                    if 'username' not in user_data:
+                        user_data['username'] = username  # Add username key if missing
+                return users
+        except FileNotFoundError:
+            return {}  # Return an empty dictionary if the file doesn't exist
+        except json.JSONDecodeError:
+            print("Warning: users.json is empty or corrupted. Starting with an empty user database.")
+            return {}  # Return an empty dictionary if the file is empty or corrupted
+
+    def save_users(self, changed=None, deleted=None):
+        store.save(self.users_file, self.users, changed=changed, deleted=deleted)
+
+    def hash_password(self, password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def is_unique(self, field, value):
+        # Username, email and phone are answered from hash indexes
+        return self.users.is_unique(field, value)
+
+    def register(self, username, full_name, email, phone, address, password):
+        """Create a customer account and return it; raises InvalidRequest."""
+        if not USERNAME_PATTERN.match(username):
+            raise InvalidRequest("Invalid username. Use 3-20 alphanumeric characters or underscores.")
+        if not EMAIL_PATTERN.match(email):
+            raise InvalidRequest("Invalid email format.")
+        if not PHONE_PATTERN.match(phone):
+            raise InvalidRequest("Invalid phone number. Must be 10-15 digits.")
+        if not password:
+            raise InvalidRequest("Password can't be empty.")
+        for field, value in (("username", username), ("email", email), ("phone", phone)):
+            if not self.is_unique(field, value):
+                raise InvalidRequest(f"{field.capitalize()} already exists.")
+
+        # Add user information to the indexed user directory
+        self.users.add({
+            "username": username,
+            "full_name": full_name,
+            "email": email,
+            "phone": phone,
+            "address": address,
+            "password": self.hash_password(password),  # Store hashed password
+            "role": "customer"  # Default role
+        })
+        self.save_users(changed=[username])
+        return self.users.get(username)
+
+    def authenticate(self, username, password):
+        """Return the user if the password is right, otherwise None."""
+        user = self.users.get(username)
+        if user is None or user["password"] != self.hash_password(password):
+            return None
+        return user
+
+    def login(self, username, password):
+        """Start a session for the user; returns its token, or None for a wrong username or password."""
+        user = self.authenticate(username, password)
+        if user is None:
+            return None
+        return self.sessions.start(username, user["role"])
+
+    def logout(self, token):
+        self.sessions.end(token)
+
+    def set_role(self, username, role):
+        """Give a user a new role, also in their live sessions; returns the user, or None if there is none."""
+        if role not in ROLES:
+            raise InvalidRequest(f"Role must be one of {', '.join(ROLES)}.")
+        if username not in self.users:
+            return None
+        self.users.set_role(username, role)
+        self.save_users(changed=[username])
+        self.sessions.set_role(username, role)  # Takes effect in live sessions too
+        return self.users.get(username)
+
+    def delete_user(self, username):
+        """Remove an account and log it out everywhere; returns the removed user, or None."""
+        user = self.users.get(username)
+        if user is None:
+            return None
+        self.users.remove(username)
+        self.save_users(deleted=[username])
+        self.sessions.end_user(username)
+        return user
@@ -0,0 +1,150 @@
+import json
+from data_storage.store import store, ConflictError
+from data_storage.catalog import load_catalog
+from services.validation import InvalidRequest, check_price
+
+CATEGORIES = ("Snacks", "Lunch", "Dinner", "Drinks", "Desserts")
+
+# Fields of a product that an edit may change
+EDITABLE_FIELDS = ("name", "price", "quantity", "category", "extras")
+
+
+class RestockItem:
+    """Stock to add to one product (a negative quantity writes stock off)."""
+
+    __slots__ = ("product_id", "quantity")
+
+    def __init__(self, product_id, quantity):
+        self.product_id = product_id
+        self.quantity = quantity
+
+
+class InventoryService:
+    """Catalog maintenance without any terminal I/O: adding, editing, removing and restocking products.
+
+    Used by the CLI's ``Inventory`` screens and the HTTP API. Bad input raises
+    ``InvalidRequest``; an edit that lost the race against another terminal
+    returns None. ``restock`` moves the stock of any number of products in one
+    commit, as deltas, so it never undoes sales made meanwhile.
+    """
+
+    def __init__(self, products_file="data/products.json"):
+        self.products_file = products_file
+        self.products = load_catalog(products_file, self.read_products_file)
+
+    def read_products_file(self):
+        """Read products from the specified JSON file."""
+        try:
+            with open(self.products_file, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            # Return an empty list if the file doesn't exist
+            return []
+        except json.JSONDecodeError:
+            # Handle corrupted JSON file gracefully
+            print("Error: Products file is corrupted. Starting with an empty inventory.")
+            return []
+
+    def save_products(self, changed=None, deleted=None, versions=None):
+        """Save the products, optionally naming the product IDs that changed or were deleted.
+
+        ``versions`` gives the version each edited product had when the edit started;
+        returns False if another terminal changed one of them in the meantime.
+        """
+        try:
+            store.save(self.products_file, self.products, changed=changed, deleted=deleted, versions=versions)
+        except ConflictError:
+            # The catalog now shows the other terminal's version
+            return False
+        return True
+
+    def validate(self, fields):
+        """Check product fields (any subset of EDITABLE_FIELDS); raises InvalidRequest."""
+        if "name" in fields and not str(fields["name"]).strip():
+            raise InvalidRequest("Product name can't be empty.")
+        if "price" in fields:
+            check_price(fields["price"])
+        if "quantity" in fields and (type(fields["quantity"]) is not int or fields["quantity"] < 0):
+            raise InvalidRequest("Quantity must be a whole number of zero or more.")
+        if "category" in fields and not str(fields["category"]).strip():
+            raise InvalidRequest("Category can't be empty.")
+        for extra in fields.get("extras", ()):
+            if not isinstance(extra, dict) or set(extra) != {"name", "price"}:
+                raise InvalidRequest("Extras must be a list of {name, price} entries.")
+            if type(extra["price"]) not in (int, float) or extra["price"] < 0:
+                raise InvalidRequest(f"The price of {extra['name']} can't be negative.")
+        unknown = set(fields) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise InvalidRequest(f"Products have no field {sorted(unknown)[0]}.")
+
+    def create_product(self, name, price, quantity, category, extras=()):
+        """Add a product with a freshly allocated id and save it; returns the Product record."""
+        self.validate({"name": name, "price": price, "quantity": quantity, "category": category, "extras": list(extras)})
+
+        # Assigning ID to the product (reserved across terminals, never reuses the id of a deleted product)
+        product_id = self.products.allocate_id()
+
+        product = {
+            "id": product_id,
+            "name": name,
+            "price": price,
+            "quantity": quantity,
+            "category": category,
+            "extras": list(extras)
+        }
+
+        with store.lock:
+            product = self.products.add(product)
+        self.save_products(changed=[product_id])
+        return product
+
+    def edit_product(self, product_id, changes, version):
+        """Apply ``changes`` to a product whose edit started at ``version``.
+
+        Returns the product, or None if it is gone or another terminal changed it
+        first (the catalog then shows their version).
+        """
+        self.validate(changes)
+        with store.lock:
+            product = self.products.get(product_id)
+            if product is None or product.get("version", 0) != version:
+                return None
+            product.update({**changes, "version": version + 1})
+            self.products.reindex(product_id)
+        if not self.save_products(changed=[product_id], versions={product_id: version}):
+            return None
+        return product
+
+    def remove_product(self, product_id):
+        """Delete a product; returns it, or None if there was no such product."""
+        with store.lock:
+            product = self.products.remove(product_id)
+        if product is not None:
+            self.save_products(deleted=[product_id])
+        return product
+
+    def restock(self, items):
+        """Add stock to many products in one commit; returns the ids that don't exist.
+
+        ``items`` are RestockItems; several items for the same product add up. Stock
+        is moved as deltas, so sales made on other terminals meanwhile are kept.
+        """
+        deltas = {}
+        for item in items:
+            if type(item.quantity) is not int or item.quantity == 0:
+                raise InvalidRequest(f"The restock quantity of product {item.product_id} must be a non-zero whole number.")
+            deltas[item.product_id] = deltas.get(item.product_id, 0) + item.quantity
+        try:
+            with store.transaction():
+                with store.lock:
+                    missing = [product_id for product_id in deltas if self.products.get(product_id) is None]
+                    moves = {product_id: delta for product_id, delta in deltas.items() if product_id not in missing}
+                    short = self.products.check_stock(moves)
+                    if not short and moves:
+                        self.products.apply_stock(moves)
+        except ConflictError as conflict:
+            # Another terminal sold the stock being written off; the products were refreshed
+            short = [product_id for product_id in conflict.current if product_id in deltas] or list(deltas)
+        if short:
+            raise InvalidRequest(f"Writing off that much would take product {short[0]} below zero.")
+        return missing
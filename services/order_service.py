@@ -0,0 +1,294 @@
+import json
+import utilities.common as common
+from data_storage.store import store, ConflictError
+from data_storage.order_journal import get_journal
+from data_storage.catalog import load_catalog
+from data_storage.order_book import load_order_book
+from data_storage.order_ids import get_order_ids
+from services.validation import InvalidRequest, check_quantity
+
+# How often a checkout re-checks stock after another terminal changed the same products
+STOCK_RETRIES = 5
+
+PAYMENT_METHODS = ("Bank Transfer", "Credit Card")
+ORDER_STATUSES = ("Pending", "Completed", "Cancelled")
+STAFF_ROLES = ("admin", "manager", "staff")
+
+NOT_ENOUGH_STOCK = "Not enough stock."
+BUSY = "The products are busy on other terminals. Please try again."
+
+
+class OrderLine:
+    """One product of an order: its id, how many, and the names of the extras chosen."""
+
+    __slots__ = ("product_id", "quantity", "extras")
+
+    def __init__(self, product_id, quantity=1, extras=()):
+        self.product_id = product_id
+        self.quantity = quantity
+        self.extras = tuple(extras)
+
+
+class OrderRequest:
+    """An order to place: the customer, their OrderLines and the payment method.
+
+    ``order_id`` is only given when the id was already shown to the customer;
+    otherwise a new one is picked as the order is placed.
+    """
+
+    __slots__ = ("username", "lines", "payment_method", "order_id")
+
+    def __init__(self, username, lines, payment_method="Credit Card", order_id=None):
+        self.username = username
+        self.lines = list(lines)
+        self.payment_method = payment_method
+        self.order_id = order_id
+
+
+class OrderResult:
+    """Outcome of placing one order.
+
+    ``order`` is the placed Order record, or None if the order was refused; then
+    ``error`` says why and ``shortages`` lists the product ids that ran out.
+    """
+
+    __slots__ = ("order", "shortages", "error")
+
+    def __init__(self, order=None, shortages=(), error=None):
+        self.order = order
+        self.shortages = list(shortages)
+        self.error = error
+
+    @property
+    def placed(self):
+        return self.order is not None
+
+
+class OrderService:
+    """Ordering rules without any terminal I/O: pricing, checkout, cancelling and status changes.
+
+    The CLI (``Frontend``), the HTTP API and bulk imports all go through this
+    class. Inputs are OrderLine/OrderRequest objects and business rule
+    violations come back as ``InvalidRequest`` or as a refused OrderResult, never
+    as printed messages. ``place_orders`` validates a whole batch first and
+    commits every order that can be filled in one transaction, so importing
+    thousands of delivery-platform orders costs one durable write instead of
+    one per order.
+    """
+
+    def __init__(self, products_file="data/products.json", orders_file="data/orders.json"):
+        self.products_file = products_file
+        self.orders_file = orders_file
+        self.journal = get_journal(orders_file)
+        self.order_ids = get_order_ids(orders_file)
+        self.products = load_catalog(products_file, self.read_products_file)
+        self.orders = load_order_book(orders_file, self.read_orders_file)
+
+    def read_products_file(self):
+        """Read products from the JSON file."""
+        try:
+            with open(self.products_file, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            print("Error: Products file is corrupted. Starting with an empty inventory.")
+            return []
+
+    def read_orders_file(self):
+        """Read orders from the specified JSON file."""
+        try:
+            with open(self.orders_file, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            print("Error: Orders file is corrupted. Starting with an empty order list.")
+            return []
+
+    def new_order_id(self):
+        """Issue the id for a new order: unique across terminals and in time order."""
+        return self.order_ids.next_id()
+
+    def build_cart(self, lines):
+        """Turn OrderLines into cart items priced from the catalog; raises InvalidRequest."""
+        cart = []
+        for line in lines:
+            product = self.products.get(line.product_id)
+            if product is None:
+                raise InvalidRequest(f"Product {line.product_id} does not exist.")
+            check_quantity(line.quantity, f"The quantity of {product['name']}")
+            offered = {extra["name"]: extra for extra in product.get("extras", ())}
+            for name in line.extras:
+                if name not in offered:
+                    raise InvalidRequest(f"{product['name']} has no extra {name}.")
+            cart.append({
+                "product_id": product['id'],
+                "name": product['name'],
+                "price": product['price'],
+                "quantity": line.quantity,
+                "extras": [offered[name] for name in line.extras]
+            })
+        if not cart:
+            raise InvalidRequest("The order has no items.")
+        return cart
+
+    def price_cart(self, cart):
+        """Totals of a cart: subtotal, extras, VAT, tax and the price to pay."""
+        base_total = sum(item['price'] * item['quantity'] for item in cart)
+        extras_total = sum(extra['price'] for item in cart for extra in item['extras'])
+
+        # Calculate VAT and Tax
+        vat_tax_details = common.calculate_vat_and_tax(base_total + extras_total)
+        return {
+            "base_total": base_total,
+            "extras_total": extras_total,
+            "vat": vat_tax_details['vat'],
+            "tax": vat_tax_details['tax'],
+            "total_price": vat_tax_details['total'],
+        }
+
+    def prepare(self, request):
+        """Build the order for an OrderRequest, not yet placed; raises InvalidRequest."""
+        if not request.username:
+            raise InvalidRequest("Every order needs the username of its customer.")
+        if request.payment_method not in PAYMENT_METHODS:
+            raise InvalidRequest(f"Payment method must be one of {', '.join(PAYMENT_METHODS)}.")
+        cart = self.build_cart(request.lines)
+        return {
+            "order_id": request.order_id or self.new_order_id(),
+            "username": request.username,
+            "cart": cart,
+            **self.price_cart(cart),
+            "payment_method": request.payment_method,
+            "status": "Pending"  # Default status is Pending
+        }
+
+    def cart_deltas(self, cart, sign=-1):
+        """Stock moves for a cart: taken (sign -1) on checkout, returned (sign 1) on cancel."""
+        deltas = {}
+        for item in cart:
+            deltas[item['product_id']] = deltas.get(item['product_id'], 0) + sign * item['quantity']
+        return deltas
+
+    def place_order(self, username, lines, payment_method="Credit Card", cart_id=None, order_id=None):
+        """Place one order and take its stock; returns an OrderResult.
+
+        The stock the cart ``cart_id`` holds counts as its own, and once the order
+        is placed the holds are released in favour of the real decrement. Stock is
+        taken as deltas on whatever the data files hold at commit time; if another
+        terminal sold the same products meanwhile, those products are refreshed and
+        checked again.
+        """
+        try:
+            order = self.prepare(OrderRequest(username, lines, payment_method, order_id))
+        except InvalidRequest as error:
+            return OrderResult(error=str(error))
+
+        reservations = self.products.reservations
+        deltas = self.cart_deltas(order['cart'])
+        for _ in range(STOCK_RETRIES):
+            try:
+                # The order and the stock it takes are committed together
+                with store.transaction():
+                    # Checked and taken under the store lock, so concurrent checkouts in this process can't interleave
+                    with store.lock:
+                        shortages = reservations.shortages(cart_id, {product_id: -delta for product_id, delta in deltas.items()})
+                        if shortages:
+                            return OrderResult(shortages=shortages, error=NOT_ENOUGH_STOCK)
+                        self.products.apply_stock(deltas)
+                        self.journal.record_created(order)
+            except ConflictError:
+                continue  # The products involved were refreshed; check them again
+            reservations.release_cart(cart_id)
+            return OrderResult(self.orders.add(order))  # Stored as a compact Order record
+        return OrderResult(error=BUSY)
+
+    def place_orders(self, requests):
+        """Validate and place a batch of OrderRequests; returns an OrderResult for each, in order.
+
+        Invalid orders and orders the stock can't cover are refused one by one;
+        every other order is committed in a single transaction, with the stock of
+        the whole batch taken as one set of deltas. Earlier orders in the batch
+        get the stock first.
+        """
+        results = [None] * len(requests)
+        prepared = []
+        for index, request in enumerate(requests):
+            try:
+                prepared.append((index, self.prepare(request)))
+            except InvalidRequest as error:
+                results[index] = OrderResult(error=str(error))
+
+        reservations = self.products.reservations
+        for _ in range(STOCK_RETRIES):
+            accepted = []
+            try:
+                with store.transaction():
+                    with store.lock:
+                        taken = {}
+                        for index, order in prepared:
+                            wanted = self.cart_deltas(order['cart'], sign=1)
+                            shortages = [
+                                product_id for product_id, quantity in wanted.items()
+                                if taken.get(product_id, 0) + quantity > reservations.available(product_id)
+                            ]
+                            if shortages:
+                                results[index] = OrderResult(shortages=shortages, error=NOT_ENOUGH_STOCK)
+                                continue
+                            for product_id, quantity in wanted.items():
+                                taken[product_id] = taken.get(product_id, 0) + quantity
+                            accepted.append((index, order))
+                        if accepted:
+                            self.products.apply_stock({product_id: -quantity for product_id, quantity in taken.items()})
+                            for _, order in accepted:
+                                self.journal.record_created(order)
+            except ConflictError:
+                continue  # The products involved were refreshed; check the batch again
+            for index, order in accepted:
+                results[index] = OrderResult(self.orders.add(order))
+            return results
+        for index, _ in prepared:
+            results[index] = OrderResult(error=BUSY)
+        return results
+
+    def find_order(self, order_id, username=None):
+        """Return the order with ``order_id`` (only ``username``'s, if given) or None.
+
+        Ids are matched case-insensitively, as customers tend to type them in lower case.
+        """
+        return self.orders.get(order_id, username=username) or self.orders.get(order_id.strip().upper(), username=username)
+
+    def can_cancel(self, order, username, role):
+        """Customers may cancel their own orders; admins, managers and staff any order."""
+        return username == order['username'] or role in STAFF_ROLES
+
+    def cancel_order(self, order_id, username=None):
+        """Cancel an order: its stock goes back and the order is removed, as one commit.
+
+        Returns the cancelled order, or None if there is no such order (of ``username``, if given).
+        """
+        order = self.find_order(order_id, username)
+        if order is None:
+            return None
+        with store.transaction():
+            with store.lock:
+                # Restock the products
+                self.products.apply_stock(self.cart_deltas(order['cart'], sign=1))
+                self.journal.record_restocked(order['order_id'], order['cart'])
+
+                self.orders.remove(order)
+                self.journal.record_cancelled(order['order_id'])
+        return order
+
+    def set_status(self, order_id, status):
+        """Set an order's status and journal the change; returns the order, or None if there is none."""
+        if status not in ORDER_STATUSES:
+            raise InvalidRequest(f"Status must be one of {', '.join(ORDER_STATUSES)}.")
+        order = self.find_order(order_id)
+        if order is None:
+            return None
+        with store.transaction():
+            self.orders.set_status(order, status)
+            self.journal.record_status_changed(order['order_id'], status)
+        return order
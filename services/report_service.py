@@ -0,0 +1,99 @@
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+from data_storage.branches import DATA_DIR, get_branch, list_branches
+from services.order_service import OrderService
+
+# Products with this much stock or less are listed as running low
+LOW_STOCK = 5
+
+# How many best sellers a report lists
+TOP_PRODUCTS = 10
+
+
+def branch_report(branch_name, data_dir=DATA_DIR):
+    """Sales and stock figures of one branch, as plain JSON-able data."""
+    branch = get_branch(branch_name, data_dir)
+    service = OrderService(branch.products_file, branch.orders_file)
+    by_status = collections.Counter()
+    sold = collections.Counter()
+    sales = 0
+    orders = service.orders.snapshot()
+    for order in orders:
+        by_status[order["status"]] += 1
+        if order["status"] == "Cancelled":
+            continue
+        sales += order["total_price"]
+        for item in order["cart"]:
+            sold[item["name"]] += item["quantity"]
+
+    products = service.products
+    return {
+        "branch": branch.name,
+        "orders": len(orders),
+        "sales": round(sales, 2),
+        "by_status": dict(by_status),
+        "top_products": dict(sold.most_common(TOP_PRODUCTS)),
+        # Every product's sales, so the merged best sellers are ranked on complete counts
+        "sold": dict(sold),
+        "stock_value": round(sum(product["price"] * products.quantity(product["id"]) for product in products), 2),
+        "low_stock": [
+            {"branch": branch.name, "id": product["id"], "name": product["name"], "quantity": products.quantity(product["id"])}
+            for product in products if products.quantity(product["id"]) <= LOW_STOCK
+        ],
+    }
+
+
+def merge_reports(reports):
+    """Combine branch reports into one chain-wide report that keeps each branch's figures.
+
+    Best sellers are ranked after the branches' full sales are added up, so a
+    product selling well everywhere shows even if no branch has it in its top list.
+    """
+    by_status = collections.Counter()
+    sold = collections.Counter()
+    for report in reports:
+        by_status.update(report["by_status"])
+        sold.update(report["sold"])
+    return {
+        "branches": reports,
+        "orders": sum(report["orders"] for report in reports),
+        "sales": round(sum(report["sales"] for report in reports), 2),
+        "by_status": dict(by_status),
+        "top_products": dict(sold.most_common(TOP_PRODUCTS)),
+        "stock_value": round(sum(report["stock_value"] for report in reports), 2),
+        "low_stock": [item for report in reports for item in report["low_stock"]],
+    }
+
+
+class ReportService:
+    """Admin reports across every branch of the chain.
+
+    Each branch's report is built in a separate worker process, so the order
+    histories are read and summed in parallel instead of one after another, and
+    the small per-branch summaries are merged here. Workers are fresh
+    interpreters: forking would copy the data store's locks in whatever state
+    this process's threads hold them.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, workers=None):
+        self.data_dir = data_dir
+        self.workers = workers or os.cpu_count() or 1
+
+    def branch(self, name):
+        """The report of a single branch, built in this process."""
+        return branch_report(name, self.data_dir)
+
+    def consolidated(self, branches=None):
+        """The merged report of ``branches`` (all of them by default)."""
+        names = list(branches or list_branches(self.data_dir))
+        for name in names:
+            if not get_branch(name, self.data_dir).exists():
+                raise ValueError(f"Unknown branch '{name}'.")
+        if len(names) == 1:
+            return merge_reports([self.branch(names[0])])
+        context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(min(self.workers, len(names)), mp_context=context) as pool:
+            reports = list(pool.map(branch_report, names, [self.data_dir] * len(names)))
+        return merge_reports(reports)
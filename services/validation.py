@@ -0,0 +1,16 @@
+class InvalidRequest(ValueError):
+    """A service call was given data that breaks a business rule; the message says which."""
+
+
+def check_quantity(value, what):
+    """Return ``value`` if it is a whole number above zero, else raise InvalidRequest."""
+    if type(value) is not int or value <= 0:
+        raise InvalidRequest(f"{what} must be a positive whole number.")
+    return value
+
+
+def check_price(value, what="Price"):
+    """Return ``value`` if it is a number above zero, else raise InvalidRequest."""
+    if type(value) not in (int, float) or value <= 0:
+        raise InvalidRequest(f"{what} must be a positive number.")
+    return value
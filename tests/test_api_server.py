@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+import pytest
+from api.server import ApiServer
+
+
+def dispatch(server, method, target, token=None, timeout=10):
+    """Dispatch one request on a daemon thread, so a deadlocked request fails the test instead of hanging it."""
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(asyncio.run(server.dispatch(method, target, headers, b""))), daemon=True,
+    )
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        pytest.fail(f"{method} {target} did not finish within {timeout} seconds")
+    return result[0]
+
+
+@pytest.fixture
+def server(data_dir):
+    return ApiServer(data_dir=data_dir, workers=4)
+
+
+def test_get_with_session_near_expiry_extends_it(server):
+    token = server.sessions.start("alice", "customer")
+    session = server.sessions.get(token)
+    session["expires"] = time.time() + 5  # Well inside the second half of its lifetime
+
+    status, body = dispatch(server, "GET", "/orders", token)
+
+    assert status == 200
+    assert body == {"orders": []}
+    assert server.sessions.get(token)["expires"] > time.time() + server.sessions.ttl / 2
+
+
+def test_get_with_expired_session_ends_it(server):
+    token = server.sessions.start("alice", "customer")
+    server.sessions.get(token)["expires"] = time.time() - 1
+
+    status, _ = dispatch(server, "GET", "/orders", token)
+
+    assert status == 401
+    assert server.sessions.table.get(token) is None
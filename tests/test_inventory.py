@@ -0,0 +1,38 @@
+import os
+import pytest
+from inventory_management.inventory import Inventory
+
+
+@pytest.fixture
+def inventory(data_dir):
+    return Inventory(products_file=os.path.join(data_dir, "products.json"))
+
+
+def answer(monkeypatch, *replies):
+    replies = iter(replies)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(replies))
+
+
+def test_update_product_keeps_current_extras(inventory, monkeypatch):
+    product = inventory.service.create_product("Bao", 4.5, 10, "Lunch", [{"name": "Egg", "price": 1}])
+    answer(monkeypatch, str(product["id"]), "Steamed Bao", "5", "12", "2", "x")
+
+    message = inventory.update_product()
+
+    assert "updated successfully" in message
+    updated = inventory.products.get(product["id"])
+    assert updated["name"] == "Steamed Bao"
+    assert [extra.to_json() for extra in updated["extras"]] == [{"name": "Egg", "price": 1}]
+    assert updated["version"] == 1
+
+
+def test_update_product_replaces_extras(inventory, monkeypatch):
+    product = inventory.service.create_product("Bao", 4.5, 10, "Lunch", [{"name": "Egg", "price": 1}])
+    answer(monkeypatch, str(product["id"]), "", "5", "12", "2", "Chili", "0.5", "x")
+
+    message = inventory.update_product()
+
+    assert "updated successfully" in message
+    updated = inventory.products.get(product["id"])
+    assert updated["name"] == "Bao"
+    assert [extra.to_json() for extra in updated["extras"]] == [{"name": "Chili", "price": 0.5}]
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+from data_storage.branches import Branch
+from data_storage.order_ids import get_order_ids
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LEASE = "import sys; from data_storage.order_ids import get_order_ids; print(get_order_ids(sys.argv[1]).lease_node())"
+
+
+def test_every_branch_leases_nodes_from_the_shared_data_dir(data_dir):
+    main = get_order_ids(Branch("main", data_dir).orders_file)
+    north = Branch("north", data_dir).orders_file
+    main.next_id()
+
+    assert get_order_ids(north) is main
+    # Another process serving another branch must not get the same node
+    leased = subprocess.run([sys.executable, "-c", LEASE, north], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert int(leased.stdout) != main.node
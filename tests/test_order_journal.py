@@ -0,0 +1,121 @@
+import json
+import os
+import pytest
+from data_storage.order_book import load_order_book
+from data_storage.order_journal import get_journal
+from data_storage.store import store, read_json, write_json_atomic
+
+
+def order(order_id, username="alice", status="Pending"):
+    return {"order_id": order_id, "username": username, "status": status, "cart": []}
+
+
+@pytest.fixture
+def orders_file(data_dir):
+    path = os.path.join(data_dir, "orders.json")
+    write_json_atomic(path, [order("#SP0001")])
+    return path
+
+
+@pytest.fixture
+def book(orders_file):
+    return load_order_book(orders_file, lambda: read_json(orders_file, []))
+
+
+def append_elsewhere(journal, *events):
+    """Append events to the journal the way another terminal's commit would."""
+    with open(journal.journal_file, "a") as file:
+        for event in events:
+            file.write(json.dumps(event) + "\n")
+
+
+def no_full_reload(monkeypatch, journal):
+    def load(read_snapshot):
+        raise AssertionError("the whole order history was reloaded")
+    monkeypatch.setattr(journal, "load", load)
+
+
+def ids(book):
+    return [(order["order_id"], order["status"]) for order in book]
+
+
+def test_sync_applies_only_the_new_journal_lines(orders_file, book, monkeypatch):
+    journal = get_journal(orders_file)
+    append_elsewhere(journal, {"event": "created", "order_id": "#SP0002", "order": order("#SP0002", "bob")})
+    store.sync(orders_file)
+    no_full_reload(monkeypatch, journal)
+
+    append_elsewhere(
+        journal,
+        {"event": "status_changed", "order_id": "#SP0001", "status": "Delivered"},
+        {"event": "cancelled", "order_id": "#SP0002"},
+        {"event": "created", "order_id": "#SP0003", "order": order("#SP0003")},
+    )
+    store.sync(orders_file)
+
+    assert ids(book) == [("#SP0001", "Delivered"), ("#SP0003", "Pending")]
+    assert [order["order_id"] for order in book.for_user("bob")] == []
+
+
+def test_own_events_are_not_applied_twice(orders_file, book, monkeypatch):
+    journal = get_journal(orders_file)
+    no_full_reload(monkeypatch, journal)
+    read = []
+    read_new_events = journal.read_new_events
+
+    def spy():
+        events = read_new_events()
+        read.extend(events or ())
+        return events
+    monkeypatch.setattr(journal, "read_new_events", spy)
+
+    book.add(order("#SP0002"))
+    journal.record_created(order("#SP0002"))
+    book.remove(book.get("#SP0002"))
+    journal.record_cancelled("#SP0002")
+    append_elsewhere(journal, {"event": "created", "order_id": "#SP0003", "order": order("#SP0003")})
+    store.sync(orders_file)
+
+    assert [event["order_id"] for event in read] == ["#SP0003"]
+    assert ids(book) == [("#SP0001", "Pending"), ("#SP0003", "Pending")]
+
+
+def test_a_torn_line_is_read_once_complete(orders_file, book):
+    journal = get_journal(orders_file)
+    line = json.dumps({"event": "created", "order_id": "#SP0002", "order": order("#SP0002")})
+    with open(journal.journal_file, "a") as file:
+        file.write(line[:20])
+    store.sync(orders_file)
+    assert ids(book) == [("#SP0001", "Pending")]
+
+    with open(journal.journal_file, "a") as file:
+        file.write(line[20:] + "\n")
+    store.sync(orders_file)
+
+    assert ids(book) == [("#SP0001", "Pending"), ("#SP0002", "Pending")]
+
+
+def test_compaction_here_keeps_reading_incrementally(orders_file, book, monkeypatch):
+    journal = get_journal(orders_file)
+    book.add(order("#SP0002"))
+    journal.record_created(order("#SP0002"))
+    journal.compact()
+    no_full_reload(monkeypatch, journal)
+
+    append_elsewhere(journal, {"event": "status_changed", "order_id": "#SP0002", "status": "Ready"})
+    store.sync(orders_file)
+
+    assert ids(book) == [("#SP0001", "Pending"), ("#SP0002", "Ready")]
+    assert read_json(orders_file, []) == [order("#SP0001"), order("#SP0002")]
+
+
+def test_compaction_elsewhere_reloads_the_snapshot(orders_file, book):
+    journal = get_journal(orders_file)
+    append_elsewhere(journal, {"event": "created", "order_id": "#SP0002", "order": order("#SP0002")})
+    # Another terminal folds the journal into a new snapshot and starts a new journal
+    write_json_atomic(orders_file, [order("#SP0001", status="Delivered"), order("#SP0002")])
+    os.remove(journal.journal_file)
+    append_elsewhere(journal, {"event": "created", "order_id": "#SP0003", "order": order("#SP0003")})
+    store.sync(orders_file)
+
+    assert ids(book) == [("#SP0001", "Delivered"), ("#SP0002", "Pending"), ("#SP0003", "Pending")]
@@ -0,0 +1,50 @@
+import json
+import os
+import pytest
+from data_storage.store import write_json_atomic
+from services.order_service import OrderService, OrderLine, NOT_ENOUGH_STOCK
+
+BAO = {"id": 1, "name": "Bao", "price": 4.5, "quantity": 5, "category": "Lunch", "extras": []}
+
+
+@pytest.fixture
+def service(data_dir):
+    products_file = os.path.join(data_dir, "products.json")
+    write_json_atomic(products_file, [BAO])
+    return OrderService(products_file, os.path.join(data_dir, "orders.json"))
+
+
+def sell_elsewhere(path, product_id, quantity):
+    """Take stock the way another terminal's checkout commits it."""
+    with open(path) as file:
+        products = json.load(file)
+    for product in products:
+        if product["id"] == product_id:
+            product.update(quantity=product["quantity"] - quantity, version=product.get("version", 0) + 1)
+    write_json_atomic(path, products)
+
+
+def stored_quantity(service, product_id):
+    with open(service.products_file) as file:
+        return {product["id"]: product["quantity"] for product in json.load(file)}[product_id]
+
+
+def test_checkouts_on_two_terminals_both_take_stock(service):
+    sell_elsewhere(service.products_file, 1, 2)
+
+    result = service.place_order("alice", [OrderLine(1, 2)])
+
+    assert result.order is not None
+    assert stored_quantity(service, 1) == 1
+    assert service.products.quantity(1) == 1
+
+
+def test_checkout_is_refused_when_another_terminal_sold_the_stock(service):
+    sell_elsewhere(service.products_file, 1, 4)
+
+    result = service.place_order("alice", [OrderLine(1, 2)])
+
+    assert result.order is None and result.error == NOT_ENOUGH_STOCK
+    assert result.shortages == [1]
+    assert stored_quantity(service, 1) == 1
+    assert service.orders.count() == 0
@@ -0,0 +1,70 @@
+import json
+import os
+import pytest
+from data_storage.records import Product
+from data_storage.store import store, differences, write_json_atomic, ConflictError
+from services.inventory_service import InventoryService
+
+BAO = {"id": 1, "name": "Bao", "price": 4.5, "quantity": 10, "category": "Lunch", "extras": [{"name": "Egg", "price": 1}]}
+TEA = {"id": 2, "name": "Tea", "price": 2, "quantity": 30, "category": "Drinks", "extras": []}
+
+
+def test_differences_compares_nested_records_by_value():
+    records = {1: Product.from_json(BAO), 2: Product.from_json(TEA)}
+    renamed = dict(TEA, name="Green Tea")
+
+    assert differences({1: BAO, 2: TEA}, records) == {}
+    assert differences({1: BAO, 2: renamed}, records) == {2: renamed}
+    assert differences({1: BAO}, records) == {2: None}
+
+
+@pytest.fixture
+def products_file(data_dir):
+    path = os.path.join(data_dir, "products.json")
+    write_json_atomic(path, [BAO, TEA])
+    return path
+
+
+def edit_elsewhere(path, product_id, **fields):
+    """Rewrite a product the way another terminal's commit would."""
+    with open(path) as file:
+        products = json.load(file)
+    for product in products:
+        if product["id"] == product_id:
+            product.update(fields, version=product.get("version", 0) + 1)
+    write_json_atomic(path, products)
+
+
+def test_sync_refreshes_only_records_changed_elsewhere(products_file, monkeypatch):
+    catalog = InventoryService(products_file).products
+    refreshed = []
+    monkeypatch.setattr(catalog, "refresh", lambda product_id, data: refreshed.append(product_id))
+
+    edit_elsewhere(products_file, 2, name="Green Tea")
+    store.sync(products_file)
+
+    assert refreshed == [2]
+
+
+def test_conflict_reports_only_the_conflicting_record(products_file):
+    service = InventoryService(products_file)
+    edit_elsewhere(products_file, 2, name="Green Tea")
+    service.products.get(2)["name"] = "Black Tea"
+
+    with pytest.raises(ConflictError) as raised:
+        store.save(products_file, changed=[2], versions={2: 0})
+
+    assert list(raised.value.current) == [2]
+    assert service.products.get(2)["name"] == "Green Tea"
+
+
+def test_edits_from_two_terminals_merge(products_file):
+    service = InventoryService(products_file)
+    edit_elsewhere(products_file, 2, name="Green Tea")
+
+    assert service.edit_product(1, {"price": 5}, 0) is not None
+
+    with open(products_file) as file:
+        stored = {product["id"]: product for product in json.load(file)}
+    assert stored[1]["price"] == 5 and stored[1]["extras"] == [{"name": "Egg", "price": 1}]
+    assert stored[2]["name"] == "Green Tea"
@@ -1,45 +1,54 @@
-import json
 import utilities.common as common
-import hashlib
+from services.account_service import AccountService, USERNAME_PATTERN, EMAIL_PATTERN, PHONE_PATTERN
+from services.validation import InvalidRequest
+from utilities.table import Table, Column
+from utilities import paging
+
+# How user lists are shown
+USER_TABLE = Table([
+    Column(" Username", 20, key="username"),
+    Column("Role", 20, key="role"),
+    Column("Email", 35, key="email"),
+])
+
+WORKER_TABLE = Table([
+    Column(" Username", 20, key="username"),
+    Column("Full Name", 25, key="full_name"),
+    Column("Email", 35, key="email"),
+    Column("Role", 15, key="role"),
+])
+
+# The user list's filter matches these fields
+USER_FILTER = paging.text_filter(lambda user: (user.get("username"), user.get("email"), user.get("full_name"), user.get("role")))
 
 class UserAuth:
-    def __init__(self, users_file="data/users.json", session_file="data/session.json"):
-        self.users_file = users_file
-        self.session_file = session_file
-        self.users = self.load_users()
-        self.session = self.load_session()
+    def __init__(self, users_file="data/users.json", sessions_file="data/sessions.json"):
+        self.accounts = AccountService(users_file, sessions_file)
+        self.sessions = self.accounts.sessions
+        self.users = self.accounts.users
+
+    # The logged-in session of this terminal ({} when logged out)
+    @property
+    def session(self):
+        return self.sessions.get(self.sessions.current_token) or {}
 
     # Register user
     def register_user(self):
-        common.clear_console()
-        common.print_main_header()  # Fixed main header for all the time
-        common.print_sub_header("New User Register")
+        common.new_screen("New User Register")
 
         # Collect user inputs
-        username = common.get_valid_username(self)
+        username = common.get_valid_username(self, USERNAME_PATTERN.match)
         full_name = input("Enter your full name: ").strip()
-        email = common.get_valid_email(self)
-        phone = common.get_valid_phone(self)
+        email = common.get_valid_email(self, EMAIL_PATTERN.match)
+        phone = common.get_valid_phone(self, PHONE_PATTERN.match)
         address = input("Enter your address: ").strip()
         password = input("Enter your password: ").strip()
 
-        # Check if username already exists
-        if username in self.users:
-            return common.color_text("Error: Username already exists.", "red")
-
-        # Add user information to the dictionary
-        self.users[username] = {
-            "username": username,
-            "full_name": full_name,
-            "email": email,
-            "phone": phone,
-            "address": address,
-            "password": self.hash_password(password),  # Store hashed password
-            "role": "customer"  # Default role
-        }
-
-        # Save users and return success message
-        self.save_users()
+        # Username, email and phone are checked again as the account is created
+        try:
+            self.accounts.register(username, full_name, email, phone, address, password)
+        except InvalidRequest as error:
+            return common.color_text(f"Error: {error}", "red")
         return common.color_text(f"User {username.title()} registered successfully.", "green")
 
 
@@ -47,9 +56,7 @@ class UserAuth:
 
     # Login a user
     def login_user(self):
-        common.clear_console()
-        common.print_main_header()  # Fixed main header for all the time
-        common.print_sub_header("User Login Form")
+        common.new_screen("User Login Form")
 
         username = input("Username: ").strip()
         password = input("Password: ").strip()
@@ -59,84 +66,43 @@ class UserAuth:
         if not user:
             return common.color_text("Username not found. Enter correct your username!", color="red", style="bold")
 
+        # A new session of its own, so other terminals stay logged in
+        token = self.accounts.login(username, password)
+
         # Error message for incorrect password
-        if user["password"] != self.hash_password(password):
+        if token is None:
             return common.color_text("Incorrect password. Please enter your correct password!", color="red", style="bold")
 
-        # Success message for login
-        self.session = {"username": username, "role": user["role"]}
-        self.save_session()
+        self.accounts.logout(self.sessions.current_token)
+        self.sessions.current_token = token
         
         # Displaying a success message with green text and background
         return common.color_text(f" Welcome back {username.title()}! ", color="green", style="bold", bg_color="blue")
   
 
-    # Load users from file
-    def load_users(self):
-        try:
-            with open(self.users_file, "r") as file:
-                users = json.load(file)
-                # Ensure the structure is correct and each user has a 'username'
-                for username, user_data in users.items():
-                    if 'username' not in user_data:
-                        user_data['username'] = username  # Add username key if missing
-                return users
-        except FileNotFoundError:
-            return {}  # Return an empty dictionary if the file doesn't exist
-        except json.JSONDecodeError:
-            print("Warning: users.json is empty or corrupted. Starting with an empty user database.")
-            return {}  # Return an empty dictionary if the file is empty or corrupted
-
-
-
-    # Save users to file
-    def save_users(self):
-        with open(self.users_file, "w") as file:
-            json.dump(self.users, file, indent=4)
-
-    # Load session data
-    def load_session(self):
-        try:
-            with open(self.session_file, "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}
-
-    # Save session data
-    def save_session(self):
-        with open(self.session_file, "w") as file:
-            json.dump(self.session, file, indent=4)
-
     # Check if a field is unique
     def is_unique(self, field, value):
-        # Check if any user has the same field value
-        return all(user.get(field) != value for user in self.users.values())
+        return self.accounts.is_unique(field, value)
     
 
     # Check if logged in
     def is_logged_in(self):
-        return "username" in self.session
+        return self.sessions.get(self.sessions.current_token) is not None
 
     # Check role
     def has_role(self, role):
-        return self.session.get("role") == role
+        return self.sessions.role(self.sessions.current_token) == role
 
     # Logout user
     def logout_user(self):
-        self.session = {}
-        self.save_session()
+        self.accounts.logout(self.sessions.current_token)
+        self.sessions.current_token = None
         return common.color_text(f"You have successfully logged out", "green")
 
-    
-    # Method to hash a password
-    def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
-    
+
     # View all users (Admin only)
     def view_all_users(self):
-        common.clear_console()
-        common.print_main_header()  # Fixed main header for all the time
-        common.print_sub_header("View All Users")
+        common.new_screen("View All Users")
 
         if not self.has_role("admin"):
             return common.color_text("Permission denied. Only admins can view all users.", color="red", style="bold")
@@ -144,70 +110,32 @@ class UserAuth:
         if not self.users:
             return common.color_text("No users found in the system.", color="yellow", style="italic")
 
-        username_width = 20
-        role_width = 20
-        email_width = 35
-
-        # Header with blue background
-        header = common.color_text(f"{' Username':<{username_width}}{'Role':<{role_width}}{'Email':<{email_width}}", bg_color="blue", style="bold")
-        
-        # Create separator line
-        separator = "-" * 75
-
-        # Format each user row to match the fixed column widths
-        rows = "\n".join(
-            f"{user['username']:<{username_width}}{user['role']:<{role_width}}{user['email']:<{email_width}}"
-            for user in self.users.values()
+        pager = paging.Pager(lambda: iter(self.users.values()), count=lambda: len(self.users))
+        return paging.browse(
+            "View All Users", pager, USER_TABLE.render,
+            common.color_text("No users match the filter.", color="yellow", style="italic"), USER_FILTER,
         )
-
-        # Return the complete formatted string with sub-header as title
-        return f"{header}\n{separator}\n{rows}"
     
 
     # Search a user by username, email, phone or full name (Admin only)
     def search_user(self):
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Search Users")
+        common.new_screen("Search Users")
         user_search_key = input("Search by username, email, phone or full name: ")
 
         if not self.has_role("admin"):
             return common.color_text("Permission denied. Only admins can search for users.", color="red", style="bold")
 
-        results = [
-            user for user in self.users.values()
-            if user_search_key.lower() in user["username"].lower()
-            or user_search_key.lower() in user["email"].lower()
-            or user_search_key.lower() in user["full_name"].lower()
-            or user_search_key in user["phone"]
-        ]
+        # Answered from the n-gram index over username, email, full name and phone
+        results = self.users.search(user_search_key)
 
         if not results:
             return common.color_text(f"No users found matching '{user_search_key}'.", color="yellow")
 
-        username_width = 20
-        role_width = 20
-        email_width = 35
-
-        # Header with blue background
-        header = common.color_text(f"{' Username':<{username_width}}{'Role':<{role_width}}{'Email':<{email_width}}", bg_color="blue", style="bold")
-        
-        # Create separator line
-        separator = "-" * 75
-
-        # Format each user row to match the fixed column widths
-        rows = "\n".join(
-            f"{user['username']:<{username_width}}{user['role']:<{role_width}}{user['email']:<{email_width}}"
-            for user in results
-        )
-
-        return f"{header}\n{separator}\n{rows}"
+        return USER_TABLE.render(results)
     
     # Delete a user by username, email and phone (Admin only)
     def delete_user(self):
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Delete User")
+        common.new_screen("Delete User")
 
         if not self.has_role("admin"):
             return common.color_text("Permission denied. Only admins can delete users.", color="red", style="bold")
@@ -224,7 +152,7 @@ class UserAuth:
         target_username = input("\nEnter the username of the user you want to delete: ")
 
         # Check if the user exists in the search results (you can assume search_user already filters results)
-        user_to_delete = next((user for user in self.users.values() if user["username"] == target_username), None)
+        user_to_delete = self.users.get(target_username)
 
         if not user_to_delete:
             return common.color_text(f"User '{target_username}' not found.", color="yellow")
@@ -235,9 +163,8 @@ class UserAuth:
         if confirmation != 'y':
             return common.color_text("User deletion canceled.", color="yellow")
 
-        # Delete the user
-        del self.users[target_username]
-        self.save_users()
+        # Delete the user (and log the deleted account out everywhere)
+        self.accounts.delete_user(target_username)
 
         return common.color_text(f"User '{target_username}' has been deleted successfully.", color="green", style="bold")
 
@@ -245,9 +172,7 @@ class UserAuth:
 
     # Update user role (Admin only)
     def update_role(self):
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("Update User Role")
+        common.new_screen("Update User Role")
 
         target_username = input("Enter the username: ")
         valid_roles = ["admin", "manager", "staff", "customer"]  # Define the valid roles
@@ -276,45 +201,22 @@ class UserAuth:
         else:
             return common.color_text("Invalid choice. Please select a valid role number.", color="red", style="bold")
 
-        # Assign the selected role
-        self.users[target_username]["role"] = selected_role
-        self.save_users()
+        # Assign the selected role (takes effect in live sessions too)
+        self.accounts.set_role(target_username, selected_role)
 
         return common.color_text(f"Updated {target_username}'s role to {selected_role}.", color="green", style="bold")
 
     # View all workers (Admin only)
     def view_all_workers(self):
-        common.clear_console()
-        common.print_main_header()
-        common.print_sub_header("View All Workers")
+        common.new_screen("View All Workers")
 
         if not self.has_role("admin"):
             return common.color_text("Permission denied. Only admins can view workers.", color="red", style="bold")
 
-        workers = []
-        for user in self.users.values():
-            if user["role"] in ['admin', 'manager', 'staff']:
-                workers.append(user)
+        workers = self.users.with_roles(['admin', 'manager', 'staff'])
 
 
         if not workers:
             return common.color_text("No workers (admin, managers or staff) found in the system.", color="yellow", style="italic")
 
-        username_width = 20
-        full_name_width = 25
-        email_width = 35
-        role_width = 15
-
-        # Header with blue background
-        header = common.color_text(f"{' Username':<{username_width}}{'Full Name':<{full_name_width}}{'Email':<{email_width}}{'Role':<{role_width}}", bg_color="blue", style="bold")
-        
-        # Create separator line
-        separator = "-" * 75
-
-        # Format each user row to match the fixed column widths
-        rows = "\n".join(
-            f"{worker['username']:<{username_width}}{worker['full_name']:<{full_name_width}}{worker['email']:<{email_width}}{worker['role']:<{role_width}}"
-            for worker in workers
-        )
-
-        return f"{header}\n{separator}\n{rows}"
\ No newline at end of file
+        return WORKER_TABLE.render(workers)
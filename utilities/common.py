@@ -1,23 +1,37 @@
+import functools
 import os
 import re
 import time
 import sys
+import threading
+from utilities.terminal import Renderer
 
+# ANSI foreground codes by color name
+COLOR_CODES = {
+    "black": 30, "red": 31, "green": 32, "yellow": 33,
+    "blue": 34, "magenta": 35, "cyan": 36, "white": 37,
+}
 
-# Function for main header
-def print_main_header():
-    
+
+# Draws every screen; see utilities/terminal.py
+renderer = Renderer()
+
+# Header blocks never change, so each is rendered once
+@functools.lru_cache(maxsize=None)
+def main_header_block():
     header_text = "SmartPanda Dashboard"
+    line = color_text("=" * 50, color="white", style="dim", bg_color="blue")
+    return f"{line}\n{color_text(header_text.center(50), color='white', bg_color='blue')}\n{line}\n"
 
-    print(color_text("=" * 50, color="white", style="dim", bg_color="blue"))
-    print(color_text(header_text.center(50), color="white", bg_color="blue"))
-    print(color_text("=" * 50, color="white", style="dim", bg_color="blue"))
+@functools.lru_cache(maxsize=128)
+def sub_header_block(sub_title):
+    line = color_text("-" * 50, style="dim", bg_color="")
+    return f"{line}\n{color_text(sub_title.center(50), bg_color='white')}\n{line}\n"
 
-# Function for sub header
-def print_sub_header(sub_title):
-    print(color_text("-" * 50, style="dim", bg_color=""))
-    print(color_text(sub_title.center(50), bg_color="white"))
-    print(color_text("-" * 50, style="dim", bg_color=""))
+def new_screen(sub_title=None):
+    """Start a screen: the main header and, if given, a sub header, redrawing only what changed."""
+    wait_for_messages()
+    renderer.screen([main_header_block()] + ([sub_header_block(sub_title)] if sub_title else []))
 
 # Formatting Numbers (Currency)
 def format_currency(amount):
@@ -41,69 +55,57 @@ def calculate_vat_and_tax(amount, vat_rate=0.15, tax_rate=0.05):
     return {"vat": vat, "tax": tax, "total": total}
 
 
-def color_text(text, color=None, style=None, bg_color=None):
-    # ANSI escape codes for colors
-    colors = {
-        "red": "\033[31m",
-        "green": "\033[32m",
-        "yellow": "\033[33m",
-        "blue": "\033[34m",
-        "magenta": "\033[35m",
-        "cyan": "\033[36m",
-        "white": "\033[37m",
-        "reset": "\033[0m"
-    }
-
-    # ANSI escape codes for background colors
-    bg_colors = {
-        "black": "\033[40m",
-        "red": "\033[41m",
-        "green": "\033[42m",
-        "yellow": "\033[43m",
-        "blue": "\033[44m",
-        "magenta": "\033[45m",
-        "cyan": "\033[46m",
-        "white": "\033[47m",
-        "reset": "\033[0m"
-    }
-
-    # ANSI escape codes for styles
-    styles = {
-        "bold": "\033[1m",
-        "italic": "\033[3m",
-        "underline": "\033[4m",
-        "strikethrough": "\033[9m",
-        "dim": "\033[2m",
-        "blinking": "\033[5m",
-        "reverse": "\033[7m"
-    }
-
-    # Initialize the final text string
-    final_text = ""
-
-    # Apply color if specified
-    if color in colors:
-        final_text += colors[color]
-    
-    # Apply background color if specified
-    if bg_color in bg_colors:
+# ANSI escape codes for colors, background colors and styles
+COLORS = {
+    "red": "\033[31m",
+    "green": "\033[32m",
+    "yellow": "\033[33m",
+    "blue": "\033[34m",
+    "magenta": "\033[35m",
+    "cyan": "\033[36m",
+    "white": "\033[37m",
+}
+
+BG_COLORS = {
+    "black": "\033[40m",
+    "red": "\033[41m",
+    "green": "\033[42m",
+    "yellow": "\033[43m",
+    "blue": "\033[44m",
+    "magenta": "\033[45m",
+    "cyan": "\033[46m",
+    "white": "\033[47m",
+}
+
+STYLES = {
+    "bold": "\033[1m",
+    "italic": "\033[3m",
+    "underline": "\033[4m",
+    "strikethrough": "\033[9m",
+    "dim": "\033[2m",
+    "blinking": "\033[5m",
+    "reverse": "\033[7m",
+}
+
+# Resets color, background and style at once
+RESET = "\033[0m"
+
+
+@functools.lru_cache(maxsize=None)
+def style_codes(color=None, style=None, bg_color=None):
+    """The (prefix, suffix) that give text the color, style and background; built once per combination."""
+    prefix = COLORS.get(color, "")
+    if bg_color in BG_COLORS:
         if color == bg_color:
-            return text  # Background and text color same provided that's why returnin without implecation
-        final_text += bg_colors[bg_color]
-
-    # Apply style if specified
-    if style in styles:
-        final_text += styles[style]
-    
-    # Add the actual text
-    final_text += text
+            return "", ""  # Background and text color same provided that's why returning without implication
+        prefix += BG_COLORS[bg_color]
+    prefix += STYLES.get(style, "")
+    return sys.intern(prefix), (RESET if prefix else "")
 
-    # Reset color, style, and background color at the end
-    final_text += colors["reset"]  # Reset color
-    final_text += bg_colors["reset"]  # Reset background color
-    final_text += "\033[0m"  # Reset style
 
-    return final_text
+def color_text(text, color=None, style=None, bg_color=None):
+    prefix, suffix = style_codes(color, style, bg_color)
+    return f"{prefix}{text}{suffix}"
 
 # Example usage:
 # print(color_text("This is bold and red text on a yellow background", color="black", style="bold", bg_color="green"))
@@ -145,50 +147,90 @@ def get_valid_number_input(prompt):
 
 # Clear Console
 def clear_console():
-    os.system("cls" if os.name == "nt" else "clear")
+    wait_for_messages()
+    renderer.clear()
+
+# No-delay mode (SMARTPANDA_NO_DELAY=1 or ``app.py --no-delay``): no message pauses or loading animation,
+# for kiosks that must feel instant and for scripted or headless runs
+no_delay = os.environ.get("SMARTPANDA_NO_DELAY", "") not in ("", "0")
+
+# How often the loading animation adds a dot
+DOT_SECONDS = 0.25
+
+# The time until which the last message must stay on screen
+_message_hold_until = 0.0
+
+def set_no_delay(enabled=True):
+    global no_delay
+    no_delay = enabled
+
+def wait_for_messages():
+    """Keep the last message readable for what is left of its delay."""
+    global _message_hold_until
+    remaining = _message_hold_until - time.monotonic()
+    _message_hold_until = 0.0
+    if remaining > 0 and not no_delay:
+        time.sleep(remaining)
 
 # Show Message with Delay
 def show_message_with_delay(message, color="white", delay=2):
-    print(color_text(message, color))
-    time.sleep(delay)
+    """Print ``message`` and keep it on screen for ``delay`` seconds before the console is next cleared.
 
-def loading_message_with_delay(message, color="white", delay=2):
-    """Display a loading message with an animated dot sequence and a delay, ensuring each dot has the same color."""
-    # ANSI codes for different colors
-    color_codes = {
-        "black": 30, "red": 31, "green": 32, "yellow": 33,
-        "blue": 34, "magenta": 35, "cyan": 36, "white": 37,
-    }
+    The time is not waited here: whatever runs before the next screen (loading,
+    queries, the user typing) counts towards it.
+    """
+    global _message_hold_until
+    print(color_text(message, color))
+    _message_hold_until = max(_message_hold_until, time.monotonic() + delay)
 
-    # Set the color code
-    color_code = color_codes.get(color, 37)  # Default to white if color is not recognized
+def loading_message(message, color="white", work=None):
+    """Show ``message`` with animated dots while ``work`` runs on a background thread, and return its result.
 
-    # Print the message with color
+    The dots stop as soon as the work is done, so a screen takes as long as its
+    loading really does. Without ``work`` the message is only shown. ``work``
+    must not read input or print, since the animation owns the line meanwhile.
+    """
+    color_code = COLOR_CODES.get(color, 37)  # Default to white if color is not recognized
     sys.stdout.write(f"\033[{color_code}m{message}\033[0m")
     sys.stdout.flush()  # Flush the output buffer to immediately display the message
-    
-    # Animate dots with the same color until the delay time is over
-    start_time = time.time()
-    while time.time() - start_time < delay:
-        sys.stdout.write(f"\033[{color_code}m.\033[0m")  # Color the dot the same as the message
-        sys.stdout.flush()  # Ensure the dot is immediately displayed
-        time.sleep(0.5)  # Add a 0.5 second delay between each dot
-    
+
+    outcome = {}
+    if work is not None:
+        def run():
+            try:
+                outcome["result"] = work()
+            except BaseException as error:
+                outcome["error"] = error
+
+        worker = threading.Thread(target=run, name="loading", daemon=True)
+        worker.start()
+        worker.join(DOT_SECONDS)
+        while worker.is_alive():
+            if not no_delay:
+                sys.stdout.write(f"\033[{color_code}m.\033[0m")  # Color the dot the same as the message
+                sys.stdout.flush()
+            worker.join(DOT_SECONDS)
+
     # Move to the next line after the loading animation
     sys.stdout.write("\n")
     sys.stdout.flush()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
 
 
 def wait_for_keypress():
     """Wait for the user to press Enter."""
+    global _message_hold_until
     input("\nPress Enter to continue...")
+    _message_hold_until = 0.0  # Whatever was shown has been read
 
 
 # Get Valid Username
-def get_valid_username(auth):
+def get_valid_username(auth, is_valid):
     while True:
         username = input("Enter a username: ").strip()
-        if not re.match(r"^[a-zA-Z0-9_]{3,20}$", username):
+        if not is_valid(username):
             print(color_text("Invalid username. Use 3-20 alphanumeric characters or underscores.", "red"))
         elif not auth.is_unique("username", username):
             print(color_text("Username already exists. Please try another.", "red"))
@@ -196,10 +238,10 @@ def get_valid_username(auth):
             return username
 
 # Get Valid Email
-def get_valid_email(auth):
+def get_valid_email(auth, is_valid):
     while True:
         email = input("Enter your email: ").strip()
-        if not re.match(r"^[\w.-]+@[a-zA-Z\d.-]+\.[a-zA-Z]{2,}$", email):
+        if not is_valid(email):
             print(color_text("Invalid email format. Please try again.", "red"))
         elif not auth.is_unique("email", email):
             print(color_text("Email already exists. Please try another.", "red"))
@@ -207,10 +249,10 @@ def get_valid_email(auth):
             return email
 
 # Get Valid Phone Number
-def get_valid_phone(auth):
+def get_valid_phone(auth, is_valid):
     while True:
         phone = input("Enter your phone number: ").strip()
-        if not re.match(r"^\d{10,15}$", phone):
+        if not is_valid(phone):
             print(color_text("Invalid phone number. Must be 10-15 digits.", "red"))
         elif not auth.is_unique("phone", phone):
             print(color_text("Phone number already exists. Please try another.", "red"))
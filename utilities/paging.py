@@ -0,0 +1,141 @@
+import itertools
+import math
+import utilities.common as common
+from data_storage.store import store
+
+# Screen lines taken by the headers, a table's title and separator rows, the page line and the prompt
+RESERVED_LINES = 12
+
+NAVIGATION = "[n]ext  [p]revious  [j]ump <page>  [f]ilter <text>  [Enter] done: "
+
+
+def page_size(lines_per_row=1):
+    """How many rows of ``lines_per_row`` lines fit on the terminal below the headers."""
+    return max(3, (common.renderer.rows() - RESERVED_LINES) // lines_per_row)
+
+
+def text_filter(fields):
+    """Build ``match(text)``, a predicate keeping rows where any of ``fields(row)`` contains ``text`` (any case)."""
+    def match(text):
+        text = text.lower()
+        return lambda row: any(text in str(value).lower() for value in fields(row) if value is not None)
+    return match
+
+
+class Page:
+    __slots__ = ("number", "rows", "has_next")
+
+    def __init__(self, number, rows, has_next):
+        self.number = number
+        self.rows = rows
+        self.has_next = has_next
+
+
+class Pager:
+    """A collection read one page at a time.
+
+    ``source`` returns a fresh iterator over the rows each time it is called,
+    so a page always shows current data and nothing but the page is copied.
+    ``cursors[n]`` is where page ``n`` starts in that iteration; a page is read
+    by skipping to its cursor (``islice`` does that without building rows) and
+    taking ``size`` rows, and the row after them gives the next page's cursor.
+    Going back or jumping to a page already seen starts from its cursor, and
+    jumping further walks forward from the last known one. With a filter the
+    cursors count the rows skipped by it too, so later pages don't test them
+    again.
+    """
+
+    def __init__(self, source, size=None, count=None):
+        self.source = source
+        self.size = size or page_size()
+        self.count = count
+        self.match = None
+        self.cursors = [0]
+
+    def set_filter(self, match):
+        """Show only rows ``match`` accepts (None shows all); paging starts over."""
+        self.match = match
+        self.cursors = [0]
+
+    def pages(self):
+        """The number of pages, when it is known without reading the rows."""
+        if self.match is None and self.count is not None:
+            return max(1, math.ceil(self.count() / self.size))
+        return None
+
+    def scan(self, cursor):
+        rows = enumerate(self.source())
+        if cursor:
+            rows = itertools.islice(rows, cursor, None)
+        if self.match is not None:
+            match = self.match
+            rows = (pair for pair in rows if match(pair[1]))
+        return rows
+
+    def fetch(self, number):
+        """Page ``number`` (from 0), or the last page when there are fewer."""
+        number = max(0, number)
+        known = min(number, len(self.cursors) - 1)
+        rows = self.scan(self.cursors[known])
+        while True:
+            page = list(itertools.islice(rows, self.size))
+            following = next(rows, None)
+            if following is not None and known + 1 == len(self.cursors):
+                self.cursors.append(following[0])
+            if known == number or following is None:
+                return Page(known, [row for _, row in page], following is not None)
+            rows = itertools.chain((following,), rows)
+            known += 1
+
+
+def browse(title, pager, render, empty, match=None, footer=None, nothing=None):
+    """Show ``pager`` a page at a time under ``title``, until the user is done.
+
+    ``render(rows)`` formats a page and ``empty`` is shown when a filter leaves
+    nothing; ``match(text)`` builds the filter predicate (no filtering without
+    it). ``footer()`` is printed under the last page. A list that fits on one
+    page is returned as text instead, like any other view, and ``nothing`` (if
+    given) is returned when there are no rows at all; after paging, None is
+    returned.
+    """
+    page = pager.fetch(0)
+    if nothing is not None and not page.rows:
+        return nothing
+    if not page.has_next:
+        text = render(page.rows)
+        return f"{text}\n{footer()}" if footer else text
+
+    number = 0
+    notice = ""
+    while True:
+        common.new_screen(title)
+        print(render(page.rows) if page.rows else empty)
+        if footer and not page.has_next and pager.match is None:
+            print(footer())
+        pages = pager.pages()
+        position = f"Page {page.number + 1} of {pages}" if pages else f"Page {page.number + 1}" + ("" if page.has_next else " (last)")
+        if pager.match is not None:
+            position += " (filtered)"
+        print(common.color_text(f"{position}{notice}", style="dim"))
+        notice = ""
+
+        command, _, argument = input(NAVIGATION).strip().partition(" ")
+        command = command.lower()
+        if command in ("", "q", "quit"):
+            return None
+        if command in ("n", "next"):
+            number = page.number + 1 if page.has_next else page.number
+        elif command in ("p", "prev", "previous"):
+            number = page.number - 1
+        elif command in ("j", "jump") and argument.strip().isdigit():
+            number = int(argument) - 1
+        elif command.isdigit():
+            number = int(command) - 1
+        elif command in ("f", "filter") and match is not None:
+            pager.set_filter(match(argument.strip()) if argument.strip() else None)
+            number = 0
+        else:
+            notice = "  - unknown command"
+        # Pick up what other terminals changed before reading the page
+        store.sync()
+        page = pager.fetch(number)
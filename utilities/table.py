@@ -0,0 +1,55 @@
+import operator
+from utilities.common import style_codes
+
+
+class Column:
+    """One column of a Table: its title, width and how to get the cell text from a row.
+
+    ``key`` reads ``row[key]``; ``value`` is a function of the row instead. The
+    width includes the space before the next column; a column grows when a cell
+    in the rows being shown would not leave that space.
+    """
+
+    __slots__ = ("title", "width", "value")
+
+    def __init__(self, title, width=0, key=None, value=None):
+        self.title = title
+        self.width = width
+        self.value = value or operator.itemgetter(key if key is not None else title.strip().lower())
+
+
+class Table:
+    """Fixed-width text tables, as the inventory and user screens list products and users.
+
+    The header's color codes are looked up once, when the table is defined.
+    ``render`` builds the cells a column at a time, so the loops over rows run
+    inside ``map``, takes each column's width from its longest cell, then
+    formats every line with one format string built for those widths and joins
+    them once.
+    """
+
+    def __init__(self, columns, header_style=None):
+        self.columns = list(columns)
+        self.header_codes = style_codes(**(header_style or {"bg_color": "blue", "style": "bold"}))
+
+    def cells(self, rows):
+        """Each column's cells as strings, and the width each column needs for them."""
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        columns = [list(map(str, map(column.value, rows))) for column in self.columns]
+        widths = [
+            max(column.width, len(column.title) + 1, max(map(len, cells), default=0) + 1)
+            for column, cells in zip(self.columns, columns)
+        ]
+        return columns, widths
+
+    def lines(self, rows):
+        """The header, the separator and one line per row."""
+        columns, widths = self.cells(rows)
+        line = "".join(f"{{:<{width}}}" for width in widths).format
+        prefix, suffix = self.header_codes
+        yield prefix + line(*(column.title for column in self.columns)) + suffix
+        yield "-" * sum(widths)
+        yield from map(line, *columns)
+
+    def render(self, rows):
+        return "\n".join(self.lines(rows))
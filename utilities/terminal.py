@@ -0,0 +1,125 @@
+"""Screen drawing with ANSI control sequences, without starting a ``clear`` process."""
+import atexit
+import os
+import shutil
+import sys
+
+CSI = "\033["
+HOME = CSI + "H"
+CLEAR_SCREEN = CSI + "2J" + CSI + "3J"  # The visible screen and the scrollback
+CLEAR_BELOW = CSI + "J"
+RESET_MARGINS = CSI + "r"
+
+
+def enable_ansi():
+    """Make sure the console interprets control sequences; False if it can't (old Windows consoles)."""
+    if os.name != "nt":
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except (AttributeError, OSError):
+        return False
+
+
+class Renderer:
+    """Draws screens that start with a fixed header block, redrawing only what changed.
+
+    ``screen`` takes the header blocks of the new screen (pre-rendered strings,
+    such as the main header and the screen's sub header). The header is pinned
+    above a scrolling region, so long screens scroll beneath it and it is always
+    where it was drawn: a screen with the same header only moves the cursor
+    below it and erases the old body, and one with a new sub header rewrites
+    from the first block that differs. Everything is one write, with no
+    subprocess. Output that isn't a terminal (a pipe, a log file) gets the
+    header text and no control sequences.
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream
+        self.blocks = []  # The header blocks on screen, top to bottom
+        self.margins = None  # (first body row, last row) of the scrolling region in use
+        self._ansi = None
+        atexit.register(self.restore)
+
+    @property
+    def stream(self):
+        # Looked up on each use, so redirected stdout is respected
+        return self._stream or sys.stdout
+
+    def is_terminal(self):
+        try:
+            terminal = self.stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+        if terminal and self._ansi is None:
+            self._ansi = enable_ansi()
+        return terminal
+
+    def rows(self):
+        try:
+            return os.get_terminal_size(self.stream.fileno()).lines
+        except (AttributeError, ValueError, OSError):
+            return shutil.get_terminal_size().lines
+
+    def write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def clear(self):
+        """Blank the whole screen, header included."""
+        self.blocks = []
+        if not self.is_terminal():
+            return
+        if not self._ansi:
+            os.system("cls")
+            return
+        self.margins = None
+        self.write(RESET_MARGINS + HOME + CLEAR_SCREEN)
+
+    def screen(self, blocks):
+        """Start a new screen topped by ``blocks``; the cursor ends on the first body line."""
+        blocks = list(blocks)
+        if not self.is_terminal() or not self._ansi:
+            self.clear()
+            self.blocks = blocks
+            self.write("".join(blocks))
+            return
+
+        kept = 0
+        while kept < min(len(blocks), len(self.blocks)) and blocks[kept] == self.blocks[kept]:
+            kept += 1
+        kept_lines = sum(block.count("\n") for block in blocks[:kept])
+        header_lines = sum(block.count("\n") for block in blocks)
+        rows = self.rows()
+        margins = (header_lines + 1, rows) if header_lines < rows - 1 else None
+
+        if kept == 0:
+            parts = [RESET_MARGINS, HOME, CLEAR_SCREEN]
+        else:
+            # Erasing below works across the scrolling region, so the kept blocks are left alone
+            parts = [f"{CSI}{kept_lines + 1};1H", CLEAR_BELOW]
+        parts.extend(blocks[kept:])
+        if margins is None:
+            # Too short for a pinned header; resetting the region homes the cursor too
+            parts.append(f"{RESET_MARGINS}{CSI}{header_lines + 1};1H")
+        elif margins != self.margins or kept == 0:
+            # Setting the region homes the cursor, so move back below the header
+            parts.append(f"{CSI}{margins[0]};{margins[1]}r{CSI}{margins[0]};1H")
+        self.write("".join(parts))
+        self.blocks = blocks
+        self.margins = margins
+
+    def restore(self):
+        """Give the whole screen back to the shell."""
+        if self.margins is not None:
+            self.margins = None
+            try:
+                self.write(RESET_MARGINS + CSI + f"{self.rows()};1H\n")
+            except (OSError, ValueError):
+                pass  # The stream is already closed
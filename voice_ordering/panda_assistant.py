@@ -2,15 +2,14 @@ import speech_recognition as sr
 import pyttsx3
 import frontEnd.frontend as frontend_management
 import utilities.common as common
-import user_authentication.user_auth as user_auth_system
 
 class PandaAssistant:
-    def __init__(self):
+    def __init__(self, frontend=None):
         # Initialize the speech engine
         self.engine = pyttsx3.init()
         self.engine.setProperty('rate', 150)  # Speed of speech
         self.engine.setProperty('volume', 0.9)  # Volume level
-        self.frontend = frontend_management.Frontend()
+        self.frontend = frontend or frontend_management.Frontend()
 
     def speak(self, text):
         """Converts text to speech and shows it as text."""
@@ -49,61 +48,63 @@ class PandaAssistant:
                 return None
 
     def handle_command(self, command):
-        """Handles voice commands specific to restaurant management."""
-        import app
+        """Handles voice commands specific to restaurant management.
+
+        Returns False once the assistant should hand back to the menu it was started from.
+        """
         if command:
             if "menu" in command:
                 self.speak("Redirecting you to available menu page...")
                 common.clear_console()
-                common.loading_message_with_delay("Redirecting you to available menu page...", color='green')
+                common.loading_message("Redirecting you to available menu page...", color='green')
                 common.clear_console()
                 self.frontend.new_order()
 
                 common.wait_for_keypress()
-                app.main() # Returning to main menu from here
+                return False  # Returning to main menu from here
             elif "place an order" in command or "order" in command:
                 self.speak("What would you like to order? Redirecting to order page")
                 common.clear_console()
-                common.loading_message_with_delay("Redirecting you to available menu page...", color='green')
+                common.loading_message("Redirecting you to available menu page...", color='green')
                 common.clear_console()
                 self.frontend.new_order()
 
                 common.wait_for_keypress()
-                app.main() # Returning to main menu from here
+                return False  # Returning to main menu from here
 
             elif "view my orders" in command or "view" in command:
                 self.speak("Redirecting to your orders page")
                 common.clear_console()
-                common.loading_message_with_delay("Redirecting to your orders page...", color='green')
+                common.loading_message("Redirecting to your orders page...", color='green')
                 common.clear_console()
-                self.frontend.view_my_orders()
-
-                common.wait_for_keypress()
-                app.main() # Returning to main menu from here
+                my_orders = self.frontend.view_my_orders()
+                if my_orders is not None:  # None once the orders were paged through
+                    print(my_orders)
+                    common.wait_for_keypress()
+                return False  # Returning to main menu from here
             elif "update" in command:
                 self.speak("Redirecting to your order update page")
                 common.clear_console()
-                common.loading_message_with_delay("Redirecting to your order update page...", color='green')
+                common.loading_message("Redirecting to your order update page...", color='green')
                 common.clear_console()
                 self.frontend.update_order()
 
                 common.wait_for_keypress()
-                app.main() # Returning to main menu from here
+                return False  # Returning to main menu from here
             elif "cancel" in command:
                 self.speak("Redirecting to your order cancel page")
                 common.clear_console()
-                common.loading_message_with_delay("Redirecting to your order cancel page...", color='green')
+                common.loading_message("Redirecting to your order cancel page...", color='green')
                 common.clear_console()
                 self.frontend.cancel_order()
 
                 common.wait_for_keypress()
-                app.main() # Returning to main menu from here
+                return False  # Returning to main menu from here
                 
             elif "exit" in command or "quit" in command:
                 self.speak("Thank you for using Panda Restaurant Management System. Goodbye!")
 
                 common.wait_for_keypress()
-                app.main() # Returning to main menu from here
                 return False  # Exit the loop
             else:
                 self.speak("I'm sorry, I didn't understand your command.")